@@ -0,0 +1,5 @@
+"""
+Timing and peak memory benchmarks for the power kernels.
+
+Run with ``python -m benchmarks`` from the repository root. See :mod:`benchmarks.run`.
+"""
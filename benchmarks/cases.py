@@ -0,0 +1,253 @@
+"""
+The benchmark cases.
+
+Each case is a name and a setup function. The setup function builds the inputs, which are not timed,
+and returns the function of no arguments which is timed. A setup function raises ImportError when
+the code it benchmarks can not be imported, and the case is then reported as skipped.
+
+The designs are the fixtures of tests/test_multirep.py, tests/test_unirep.py, tests/test_samplesize.py,
+tests/test_noncentralitydistribution.py and tests/test_davies.py, scaled up for the medium and large
+sizes. b is the number of columns of U, i.e. the dimension of SIGMA star, and N the total sample size.
+"""
+import subprocess
+import sys
+
+import numpy as np
+
+from pyglimmpse import multirep, unirep, samplesize
+from pyglimmpse.chisquareterm import ChiSquareTerm
+from pyglimmpse.constants import Constants
+from pyglimmpse.probf import probf, probf_array
+from pyglimmpse.WeightedSumOfNoncentralChiSquaresDistribution import WeightedSumOfNoncentralChiSquaresDistribution
+from tests.test_unirep import ConfidenceInterval
+
+# b and rep_N for each size. The small design is the fixture used throughout tests/test_multirep.py
+SIZES = {'small': (2, 20),
+         'medium': (8, 200),
+         'large': (32, 20000)}
+
+MULTIREP_TESTS = [multirep.hlt_one_moment_null_approximator,
+                  multirep.hlt_two_moment_null_approximator,
+                  multirep.hlt_one_moment_null_approximator_obrien_shieh,
+                  multirep.hlt_two_moment_null_approximator_obrien_shieh,
+                  multirep.pbt_one_moment_null_approx,
+                  multirep.pbt_two_moment_null_approx,
+                  multirep.pbt_one_moment_null_approx_obrien_shieh,
+                  multirep.pbt_two_moment_null_approx_obrien_shieh,
+                  multirep.wlk_two_moment_null_approx,
+                  multirep.wlk_two_moment_null_approx_obrien_shieh,
+                  multirep.special]
+
+UNIREP_TESTS = [unirep.uncorrected,
+                unirep.geisser_greenhouse,
+                unirep.hyuhn_feldt,
+                unirep.chi_muller,
+                unirep.box]
+
+# (fcrit, df1, df2, noncen) reaching each branch of probf, after tests/test_probf.py
+PROBF_REGIMES = {Constants.FMETHOD_NOAPPROXIMATION: (2.5, 3, 20, 5),
+                 Constants.FMETHOD_TIKU: (1, 10 ** 5, 10, 10),
+                 Constants.FMETHOD_CHI2: (1, 3, 10 ** 10, 10 ** 7),
+                 Constants.FMETHOD_NORMAL_SM: (1, 10 ** 9.5, 5, 10)}
+
+PROBF_ARRAY_SIZES = {'small': 10, 'medium': 1000, 'large': 100000}
+
+# findTruncationPoint fails with an UnboundLocalError for the fixture repeated more than 30 times
+DAVIES_TERMS = {'small': 3, 'medium': 12, 'large': 30}
+
+NONCENTRALITY_PER_GROUP_N = {'small': 5, 'medium': 50, 'large': 500}
+
+# cold start in a new interpreter, the time every worker process pays
+IMPORTS = {'python': 'pass',
+           'pyglimmpse': 'import pyglimmpse',
+           'pyglimmpse.multirep': 'import pyglimmpse.multirep',
+           'pyglimmpse.unirep': 'import pyglimmpse.unirep',
+           'pyglimmpse.samplesize': 'import pyglimmpse.samplesize',
+           'first_power': 'import numpy as np\n'
+                          'from pyglimmpse import multirep\n'
+                          'multirep.hlt_two_moment_null_approximator(rank_C=1, rank_X=1, relative_group_sizes=[1], '
+                          'rep_N=10, alpha=0.05, sigma_star=np.matrix([[2.0]]), delta_es=np.matrix([[1.0]]))'}
+
+
+def design(size):
+    """ the keyword arguments of a power calculation for a design of the given size"""
+    b, rep_N = SIZES[size]
+    if size == 'small':
+        total_N, rank_X = 20, 4
+        error_sum_square = np.matrix([[9.59999999999999000000000000, 0.000000000000000444089209850],
+                                      [0.000000000000000444089209850, 9.59999999999999000000000000]])
+        hypothesis_sum_square = np.matrix([[1.875, 1.08253175473054], [1.08253175473054, 0.625]])
+        return dict(rank_C=3,
+                    rank_X=rank_X,
+                    relative_group_sizes=[1],
+                    rep_N=rep_N,
+                    alpha=0.05,
+                    sigma_star=error_sum_square / (total_N - rank_X),
+                    delta_es=hypothesis_sum_square / rep_N)
+    # AR(1) SIGMA star and a rank 2 linear and offset effect, as in tests/test_unirep.py, scaled so that
+    # trace(INV(SIGMA star) * DELTA) * rep_N, and so the power, is the same for every size
+    sigma_star = np.matrix(0.5 ** np.abs(np.subtract.outer(np.arange(b), np.arange(b))))
+    theta = np.matrix([np.linspace(0, 1, b), np.ones(b)])
+    delta = theta.T * theta
+    return dict(rank_C=2,
+                rank_X=3,
+                relative_group_sizes=[1, 1, 1],
+                rep_N=rep_N,
+                alpha=0.05,
+                sigma_star=sigma_star,
+                delta_es=delta * 4 / (np.trace(np.linalg.solve(sigma_star, delta)) * rep_N))
+
+
+def _power_case(test, size, **kwargs):
+    def setup():
+        arguments = dict(design(size), **kwargs)
+        return lambda: test(**arguments)
+    return setup
+
+
+def _probf_case(fmethod, arguments):
+    def setup():
+        _, actual = probf(*arguments)
+        if actual != fmethod:
+            raise AssertionError('{0} reached {1}'.format(arguments, actual))
+        return lambda: probf(*arguments)
+    return setup
+
+
+def _probf_array_case(size):
+    def setup():
+        n = PROBF_ARRAY_SIZES[size]
+        rng = np.random.RandomState(0)
+        df1 = rng.uniform(1, 20, n)
+        df2 = rng.uniform(5, 200, n)
+        noncen = rng.uniform(0, 50, n)
+        return lambda: probf_array(2.5, df1, df2, noncen)
+    return setup
+
+
+def _unirep_estimated_sigma_case(test, size):
+    def setup():
+        arguments = design(size)
+        confidence_interval = ConfidenceInterval(beta_known=False,
+                                                 lower_tail=0.01,
+                                                 upper_tail=0.01,
+                                                 n_est=arguments['rep_N'],
+                                                 rank_est=arguments['rank_X'])
+
+        def run():
+            power = test(confidence_interval=confidence_interval, **arguments)
+            return power.lower_bound, power.upper_bound
+        return run
+    return setup
+
+
+def _samplesize_case(test, size, target_power=0.9):
+    def setup():
+        arguments = design(size)
+        arguments.pop('rep_N')
+        # the small fixture has a single group, so start where the error degrees of freedom are positive
+        starting = arguments['rank_X'] + 1
+        return lambda: samplesize.samplesize(test=test,
+                                             targetPower=target_power,
+                                             starting_smallest_group_size=starting,
+                                             **arguments)
+    return setup
+
+
+def _samplesize_fixture_case():
+    """ test_samplesize_hlt_multi_group in tests/test_samplesize.py"""
+    def setup():
+        m = np.matrix([[1.16666667, 0.16666667], [0.16666667, 0.66666667]])
+        t = np.matrix([[-5], [3.5]])
+        return lambda: samplesize.samplesize(test=multirep.hlt_two_moment_null_approximator_obrien_shieh,
+                                             rank_C=2,
+                                             alpha=0.01,
+                                             sigma_star=np.matrix([[112.5]]),
+                                             targetPower=0.9,
+                                             rank_X=3,
+                                             delta_es=t.T * np.linalg.inv(m) * t,
+                                             relative_group_sizes=[6, 1, 2])
+    return setup
+
+
+def _davies_case(size):
+    """ the distribution in tests/test_davies.py, with more terms for the larger sizes"""
+    def setup():
+        fixture = [(7, 1, 10), (-3, 2, 2), (5, 1, 1)]
+        terms = [ChiSquareTerm(*fixture[i % 3]) for i in range(DAVIES_TERMS[size])]
+        scale = DAVIES_TERMS[size] / 3
+        quantiles = [q * scale for q in range(10, 101, 10)]
+
+        def run():
+            distribution = WeightedSumOfNoncentralChiSquaresDistribution(terms, 0.1, 0.001)
+            return [distribution.cdf(q) for q in quantiles]
+        return run
+    return setup
+
+
+def _noncentrality_distribution(size, test=Constants.HLT.value, exact=False):
+    """ the distribution in test_noncentralitydistribution in tests/test_noncentralitydistribution.py"""
+    from pyglimmpse.NonCentralityDistribution import NonCentralityDistribution
+    c_fixed = np.matrix([[1.0, -1.0, 0.0], [1.0, 0.0, -1.0]])
+    c_gaussian = np.matrix([[1.0], [1.0]])
+    beta = np.matrix([[1.0, 0.0], [0.0, 0.0], [0.0, 0.0], [0.9, 0.0]])
+    return NonCentralityDistribution(test=test,
+                                     FEssence=np.matrix(np.identity(3)),
+                                     perGroupN=NONCENTRALITY_PER_GROUP_N[size],
+                                     CFixed=c_fixed,
+                                     CGaussian=c_gaussian,
+                                     thetaDiff=np.concatenate((c_fixed, c_gaussian), axis=1) * beta,
+                                     stddevG=np.matrix([1.0]),
+                                     sigmaStar=np.matrix([[0.19, 0.0], [0.0, 1.0]]),
+                                     exact=exact)
+
+
+def _noncentrality_cdf_case(size, exact):
+    def setup():
+        distribution = _noncentrality_distribution(size, exact=exact)
+        quantiles = np.linspace(distribution.getH0(), distribution.getH1(), 14)
+        return lambda: [distribution.cdf(w) for w in quantiles]
+    return setup
+
+
+def _unconditional_power_case(size):
+    """ the fcrit, df1 and df2 of test_unconditional in tests/test_noncentralitydistribution.py"""
+    def setup():
+        distribution = _noncentrality_distribution(size)
+        return lambda: distribution.unconditional_power_simpson(fcrit=2.15720777985222,
+                                                                df1=7.29946278309409,
+                                                                df2=37.93877551020408)
+    return setup
+
+
+def _import_case(source):
+    def setup():
+        return lambda: subprocess.run([sys.executable, '-c', source], check=True)
+    return setup
+
+
+def cases():
+    """ list of (name, setup) for every benchmark, in the order they are run"""
+    result = [('import/' + name, _import_case(source)) for name, source in IMPORTS.items()]
+    for fmethod, arguments in PROBF_REGIMES.items():
+        result.append(('probf/' + fmethod.name, _probf_case(fmethod, arguments)))
+    for size in SIZES:
+        result.append(('probf_array/' + size, _probf_array_case(size)))
+    for test in MULTIREP_TESTS:
+        for size in SIZES:
+            result.append(('multirep/{0}/{1}'.format(test.__name__, size), _power_case(test, size)))
+    for test in UNIREP_TESTS:
+        for size in SIZES:
+            result.append(('unirep/{0}/{1}'.format(test.__name__, size), _power_case(test, size)))
+        result.append(('unirep/{0}/estimated_sigma'.format(test.__name__), _unirep_estimated_sigma_case(test, 'medium')))
+    result.append(('samplesize/fixture', _samplesize_fixture_case()))
+    for test in [multirep.hlt_two_moment_null_approximator_obrien_shieh, unirep.geisser_greenhouse]:
+        for size in SIZES:
+            result.append(('samplesize/{0}/{1}'.format(test.__name__, size), _samplesize_case(test, size)))
+    for size in DAVIES_TERMS:
+        result.append(('davies/cdf/' + size, _davies_case(size)))
+    for size in NONCENTRALITY_PER_GROUP_N:
+        result.append(('noncentrality/cdf/' + size, _noncentrality_cdf_case(size, exact=False)))
+        result.append(('noncentrality/cdf_exact/' + size, _noncentrality_cdf_case(size, exact=True)))
+        result.append(('noncentrality/unconditional_power_simpson/' + size, _unconditional_power_case(size)))
+    return result
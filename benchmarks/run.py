@@ -0,0 +1,127 @@
+"""
+Run the benchmarks in :mod:`benchmarks.cases` and record, or compare against, a baseline.
+
+    python -m benchmarks --output benchmarks/baseline.json
+    python -m benchmarks --compare benchmarks/baseline.json --threshold 0.25
+
+Each case is timed with :class:`timeit.Timer`, with enough calls per repeat to take at least
+``--min-time`` seconds, and the fastest repeat is reported. The peak memory of one further call is
+measured with :mod:`tracemalloc`, which only sees allocations made through Python's allocators,
+NumPy arrays included.
+
+In comparison mode a case is a regression when its time or peak memory grows by more than the
+threshold, as a fraction of the baseline. The exit status is 1 if any case regressed.
+"""
+import argparse
+import json
+import math
+import platform
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+import scipy
+
+from benchmarks.cases import cases
+
+# peak memory below this many bytes is never flagged, it is mostly interpreter noise
+MEMORY_FLOOR = 64 * 1024
+
+
+def measure(function, repeat=5, min_time=0.2):
+    """ time and peak memory of one call of function"""
+    timer = timeit.Timer(function)
+    number, taken = timer.autorange()
+    number = max(1, math.ceil(number * min_time / taken))
+    seconds = min(timer.repeat(repeat=repeat, number=number)) / number
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return dict(seconds=seconds, peak_bytes=peak, number=number, repeat=repeat)
+
+
+def run(pattern=None, repeat=5, min_time=0.2, verbose=True):
+    """
+    Run every case whose name contains pattern.
+
+    :return: dict of environment details and a result for each case, either the measurements or
+             the reason it was skipped
+    """
+    results = {}
+    for name, setup in cases():
+        if pattern and pattern not in name:
+            continue
+        try:
+            function = setup()
+        except ImportError as e:
+            results[name] = dict(skipped='{0}: {1}'.format(type(e).__name__, e))
+        else:
+            results[name] = measure(function, repeat=repeat, min_time=min_time)
+        if verbose:
+            print(_format_result(name, results[name]), file=sys.stderr)
+    return dict(python=platform.python_version(),
+                numpy=np.__version__,
+                scipy=scipy.__version__,
+                machine=platform.platform(),
+                processor=platform.processor(),
+                results=results)
+
+
+def compare(baseline, current, threshold=0.25):
+    """
+    Compare two runs.
+
+    :return: list of (name, measurement, baseline value, current value, ratio) for each regression
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None or 'skipped' in before or 'skipped' in result:
+            continue
+        for measurement in ['seconds', 'peak_bytes']:
+            old, new = before[measurement], result[measurement]
+            if measurement == 'peak_bytes' and new < MEMORY_FLOOR:
+                continue
+            ratio = new / old if old > 0 else float('inf')
+            if ratio > 1 + threshold:
+                regressions.append((name, measurement, old, new, ratio))
+    return regressions
+
+
+def _format_result(name, result):
+    if 'skipped' in result:
+        return '{0:<70} skipped ({1})'.format(name, result['skipped'])
+    return '{0:<70} {1:>12.3e} s {2:>12,d} B'.format(name, result['seconds'], result['peak_bytes'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare the results with this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='fractional increase in time or peak memory flagged as a regression, default 0.25')
+    parser.add_argument('--filter', metavar='PATTERN', help='only run cases whose name contains PATTERN')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timing repeats, default 5')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='smallest time in seconds for each timing repeat, default 0.2')
+    arguments = parser.parse_args(argv)
+
+    current = run(arguments.filter, arguments.repeat, arguments.min_time)
+    if arguments.output:
+        with open(arguments.output, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+            f.write('\n')
+    if arguments.compare:
+        with open(arguments.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, arguments.threshold)
+        for name, measurement, old, new, ratio in regressions:
+            print('REGRESSION {0} {1}: {2:.4g} -> {3:.4g} ({4:.2f}x)'.format(name, measurement, old, new, ratio))
+        if regressions:
+            return 1
+        print('no regressions beyond {0:.0%}'.format(arguments.threshold))
+    return 0
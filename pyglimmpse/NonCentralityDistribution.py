@@ -2,17 +2,19 @@
 import math
 
 import numpy as np
-from scipy import optimize
-from scipy.integrate.quadrature import tupleset
-from scipy.stats import f
-from scipy import special
-import scipy.integrate as integrate
 
+from pyglimmpse import instrumentation
+from pyglimmpse._arrays import as_array
+from pyglimmpse._lazy import lazy_import
 from pyglimmpse.WeightedSumOfNoncentralChiSquaresDistribution import WeightedSumOfNoncentralChiSquaresDistribution
 from pyglimmpse.constants import Constants
 from pyglimmpse.exceptions.glimmpse_exception import GlimmpseCalculationException, GlimmpseValidationException
 from pyglimmpse.probf import probf
 
+optimize = lazy_import('scipy.optimize')
+special = lazy_import('scipy.special')
+stats = lazy_import('scipy.stats')
+
 """ generated source for module NonCentralityDistribution """
 from pyglimmpse.chisquareterm import ChiSquareTerm
 
@@ -71,6 +73,12 @@ class NonCentralityDistribution(object):
         self.mzSq = None
         self.H0 = 0
         self.sStar = 0
+        FEssence = as_array(FEssence)
+        Cfixed = as_array(Cfixed)
+        CGaussian = as_array(CGaussian)
+        thetaDiff = as_array(thetaDiff)
+        sigmaStar = as_array(sigmaStar)
+        stddevG = float(np.squeeze(stddevG))
         self.N = float(FEssence.shape[0]) * perGroupN
         self.exact = exact
         self.errors = []
@@ -82,8 +90,8 @@ class NonCentralityDistribution(object):
             #  get fixed contrasts
 
             #  build intermediate terms h1, S
-            FtFinverse = np.linalg.inv(FEssence.T * FEssence)
-            PPt = Cfixed * FtFinverse * (1 / perGroupN) * Cfixed.T
+            FtFinverse = np.linalg.inv(FEssence.T @ FEssence)
+            PPt = Cfixed @ FtFinverse @ Cfixed.T * (1 / perGroupN)
             self.T1 = self.forceSymmetric(np.linalg.inv(PPt))
             self.FT1 = np.linalg.cholesky(self.T1)
             #calculate theta difference
@@ -91,7 +99,7 @@ class NonCentralityDistribution(object):
             # C = np.concatenate((np.array(CFixed), np.array(CRand)), axis=1)
             #TODO: specific to HLT or UNIREP
             sigmaStarInverse = self.getSigmaStarInverse(sigmaStar, test)
-            H1matrix = thetaDiff.T * self.T1 * thetaDiff * sigmaStarInverse
+            H1matrix = thetaDiff.T @ self.T1 @ thetaDiff @ sigmaStarInverse
             self.H1 = np.trace(H1matrix)
             if self.H1 > 0:
                 # We could use this to truncate the eigenvectors and eigenvalues
@@ -101,7 +109,7 @@ class NonCentralityDistribution(object):
                 # s = min(a,b)
 
                 # Matrix which represents the non-centrality parameter as a linear combination of chi-squared r.v.'s.
-                self.S = self.FT1.T * thetaDiff * sigmaStarInverse * thetaDiff.T * self.FT1 * (1 / self.H1)
+                self.S = self.FT1.T @ thetaDiff @ sigmaStarInverse @ thetaDiff.T @ self.FT1 * (1 / self.H1)
                 self.S = self.forceSymmetric(self.S)
                 # We use the S matrix to generate the F critical value, numerical df's, and denominator df's
                 # for a central F distribution.  The resulting F distribution is used as an approximation
@@ -109,29 +117,21 @@ class NonCentralityDistribution(object):
                 # See formulas 18-21 and A8,A10 from Glueck & Muller (2003) for details.
 
                 # get the eigenvalues of self.S using a singular value decomposition
-                svecsT, sEigenValuesT, vh = np.linalg.svd(self.S, full_matrices=False, compute_uv=True, hermitian=True)
-                self.sEigenValues = np.matrix(sEigenValuesT).T
+                svecs, sEigenValuesT, vh = np.linalg.svd(self.S, full_matrices=False, compute_uv=True, hermitian=True)
+                self.sEigenValues = sEigenValuesT
 
-                self.H0 = self.H1 * (1 - self.sEigenValues.item(0))
+                self.H0 = self.H1 * (1 - self.sEigenValues[0])
                 if self.H0 <= 0:
                     self.H0 = 0
 
-                for value in self.sEigenValues[0]:
+                for value in self.sEigenValues[:1]:
                     if value > 0:
                         self.sStar += 1
                 # TODO: throw error if sStar is <= 0
                 # TODO: NO: throw error if sStar != sEigenValues.length instead???
                 # create square matrix using these
-                self.mzSq = svecsT * self.FT1.T * CGaussian * (1 / stddevG)
-                i = 0
-                while i < self.mzSq.shape[0]:
-                    j = 0
-                    #while j < self.mzSq.getColumnDimension():
-                    while j <  self.mzSq.shape[1]:
-                        entry = self.mzSq[i, j]
-                        self.mzSq[i, j] = entry * entry
-                        j += 1
-                    i += 1
+                # the columns of svecs are the eigenvectors of S
+                self.mzSq = np.square(svecs.T @ self.FT1.T @ CGaussian * (1 / stddevG))
         except Exception as e:
             raise e
 
@@ -143,6 +143,7 @@ class NonCentralityDistribution(object):
         """ generated source for method setBeta """
         self.initialize(self.test, self.FEssence, self.FtFinverse, self.perGroupN, self.CFixed, self.CRand, self.U, self.thetaNull, beta, self.sigmaError, self.sigmaG, self.exact)
 
+    @instrumentation.timed('noncentrality_cdf')
     def cdf(self, w):
         """ generated source for method cdf """
         if self.H1 <= 0 or w <= self.H0:
@@ -260,9 +261,9 @@ class NonCentralityDistribution(object):
                 if isinstance(lambdaStarNegative, complex):
                     lambdaStarNegative = lambdaStarNegative.real
                 x = (nuStarNegative * lambdaStarNegative) / (nuStarPositive * lambdaStarPositive)
-                return f.cdf(x, nuStarPositive, nuStarNegative)
+                return stats.f.cdf(x, nuStarPositive, nuStarNegative)
         except GlimmpseCalculationException as e:
-            print("exiting cdf abnormally", e)
+            instrumentation.event('noncentrality.cdf_error', w=float(w), message=str(e))
             raise GlimmpseCalculationException(e)
 
     def inverseCDF(self, quantile):
@@ -294,7 +295,7 @@ class NonCentralityDistribution(object):
             b = sigma_star.shape[1]
             # get discrepancy from sphericity for unirep test
             sigmaStarTrace = np.trace(sigma_star)
-            sigmaStarSquaredTrace = np.trace(sigma_star * sigma_star)
+            sigmaStarSquaredTrace = np.trace(sigma_star @ sigma_star)
             epsilon = (sigmaStarTrace * sigmaStarTrace) / (b * sigmaStarSquaredTrace)
             identity = np.identity(b)
             return identity * float(b) * epsilon / sigmaStarTrace
@@ -336,6 +337,7 @@ class NonCentralityDistribution(object):
             t2 = special.ncfdtr(df1+2,df2,t,t2_fcrit)
             return self.cdf(t) * (t1 - t2)
 
+    @instrumentation.timed('unconditional_power_simpson')
     def unconditional_power_simpson(self, fcrit, df1, df2):
         """
         Calculates unconditional power using integration by simpsons rule.
@@ -354,6 +356,7 @@ class NonCentralityDistribution(object):
         end_condition = False
         while not end_condition:
             h = (self.H1 - self.H0) / n
+            instrumentation.count('simpson.nodes', n)
             x = []
             fx = []
             for i in range(n):
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 import numpy as np
 
+from pyglimmpse import instrumentation
 from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException, GlimmpseCalculationException
 
 """ generated source for module WeightedSumOfNoncentralChiSquaresDistribution """
@@ -88,6 +89,7 @@ class Counter(object):
     def increment(self):
         """ generated source for method increment """
         self.count += 1
+        instrumentation.count('davies.steps')
         if self.count > self.maxSteps:
             raise GlimmpseCalculationException("Exceeded max iterations")
 
@@ -182,6 +184,7 @@ class WeightedSumOfNoncentralChiSquaresDistribution(object):
     # 	 * @param quantile point at which the cdf is evaluated: Pr(Q &lt;= quantile)
     # 	 * @return probability Pr(Q &lt;= quantile)
     # 	 
+    @instrumentation.timed('davies_cdf')
     def cdf(self, quantile):
         """ generated source for method cdf """
         prob = 0
@@ -226,9 +229,7 @@ class WeightedSumOfNoncentralChiSquaresDistribution(object):
                 U = self.findTruncationPoint(16 / sd, sigmaSquared, halfAccuracy, counter)
         #  Auxiliary integration loop
 
-        print('sd:' + str(sd))
-        print('mean:' + str(mean))
-        print('U:' + str(U))
+        instrumentation.event('davies.cdf', quantile=float(quantile), sd=float(sd), mean=float(mean), U=float(U))
         numTermsMain = 0
         numTermsAux = 0
         integralSum = 0
@@ -239,7 +240,7 @@ class WeightedSumOfNoncentralChiSquaresDistribution(object):
             #  of the range
             cutoff = self.findCutoffPoint(4.5 / sd, mean, sigmaSquared, halfAccuracy, counter)
             cutoffDiffUpper = cutoff - quantile;
-            print('cutoffdiffupper:' + str(cutoffDiffUpper))
+            instrumentation.event('davies.cutoff', upper=float(cutoffDiffUpper))
 
             if cutoffDiffUpper < 0:
                 return 1
@@ -247,7 +248,7 @@ class WeightedSumOfNoncentralChiSquaresDistribution(object):
             #  get the lower cutoff
             cutoff = self.findCutoffPoint(-4.5 / sd, mean, sigmaSquared, halfAccuracy, counter)
             cutoffDiffLower = quantile - cutoff
-            print('cutoffdifflower:' + str(cutoffDiffLower))
+            instrumentation.event('davies.cutoff', lower=float(cutoffDiffLower))
             if cutoffDiffLower < 0:
                 return 0
             #  pick the larger potential integration interval
@@ -286,6 +287,7 @@ class WeightedSumOfNoncentralChiSquaresDistribution(object):
         """ generated source for method integrate """
         value = 0
         k = numTerms
+        instrumentation.count('davies.integration_terms', numTerms + 1)
         while k >= 0:
             U = (k + 0.5) * integrationInterval
             sum1 = -2 * U * quantile
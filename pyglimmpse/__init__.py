@@ -1 +1,56 @@
+"""
+Power and sample size for the general linear multivariate model.
+
+The names below are imported on first use, so ``import pyglimmpse`` itself does not import NumPy or
+SciPy. The tests are in :mod:`pyglimmpse.multirep` and :mod:`pyglimmpse.unirep`, e.g.
+``pyglimmpse.multirep.hlt_two_moment_null_approximator``, and sample size in
+``pyglimmpse.samplesize.samplesize``.
+"""
+import importlib
+
 name = "pyglimmpse"
+__version__ = "0.0.33"
+
+# public name: module defining it
+_EXPORTS = {'Constants': 'pyglimmpse.constants',
+            'Power': 'pyglimmpse.model.power',
+            'ConfidenceLimits': 'pyglimmpse.model.power',
+            'PowerBatch': 'pyglimmpse.model.power_batch',
+            'GlimmpseCalculationException': 'pyglimmpse.exceptions.glimmpse_exception',
+            'GlimmpseValidationException': 'pyglimmpse.exceptions.glimmpse_exception',
+            'CL': 'pyglimmpse.input',
+            'IP': 'pyglimmpse.input',
+            'Scalar': 'pyglimmpse.input',
+            'CompiledPlan': 'pyglimmpse.plan',
+            'BatchPlan': 'pyglimmpse.plan',
+            'samplesize_batch': 'pyglimmpse.samplesize',
+            'detectable_effect': 'pyglimmpse.samplesize',
+            'optimal_allocation': 'pyglimmpse.allocation',
+            'effect_family_power': 'pyglimmpse.effect_family',
+            'budget_design': 'pyglimmpse.effect_family',
+            'ResultCache': 'pyglimmpse.cache',
+            'open_sink': 'pyglimmpse.sinks',
+            'write_sweep': 'pyglimmpse.sinks',
+            'PowerServer': 'pyglimmpse.server',
+            'route': 'pyglimmpse.router',
+            'upoly': 'pyglimmpse.orpol'}
+
+_SUBMODULES = ['allocation', 'cache', 'cli', 'constants', 'diagnostics', 'effect_family', 'finv', 'input', 'instrumentation', 'multirep',
+               'orpol', 'plan', 'probf', 'router', 'samplesize', 'server', 'sinks', 'unirep']
+
+__all__ = sorted(_EXPORTS) + _SUBMODULES + ['__version__']
+
+
+def __getattr__(attribute):
+    if attribute in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[attribute]), attribute)
+    elif attribute in _SUBMODULES:
+        value = importlib.import_module('pyglimmpse.' + attribute)
+    else:
+        raise AttributeError("module 'pyglimmpse' has no attribute '{0}'".format(attribute))
+    globals()[attribute] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,5 @@
+import sys
+
+from pyglimmpse.cli import main
+
+sys.exit(main())
@@ -0,0 +1,15 @@
+import numpy as np
+
+
+def as_array(matrix):
+    """
+    matrix as a 2-D float ndarray.
+
+    The calculations use plain ndarray, with ``@`` for matrix products and ``*`` only for element-wise
+    ones. Public functions still accept np.matrix, nested lists or scalars and convert them with
+    this on entry. An np.matrix or float ndarray is viewed rather than copied.
+
+    :param matrix: np.matrix, ndarray or anything np.asarray accepts
+    :return: ndarray with at least 2 dimensions
+    """
+    return np.atleast_2d(np.asarray(matrix, dtype=float))
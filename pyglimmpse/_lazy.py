@@ -0,0 +1,25 @@
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """
+    Module name, executed when one of its attributes is first read rather than now.
+
+    Use this for SciPy submodules, which take most of the time needed to import pyglimmpse. The module
+    is registered in sys.modules with :class:`importlib.util.LazyLoader`, so it is the same object any
+    later import of name returns, and once loaded it costs nothing extra to use.
+
+    :param name: absolute module name, e.g. 'scipy.stats'
+    :return: the module
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,187 @@
+import numpy as np
+
+from pyglimmpse._arrays import as_array
+from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException
+from pyglimmpse.plan import BatchPlan
+
+
+def optimal_allocation(test,
+                       c_matrix: np.matrix,
+                       theta: np.matrix,
+                       sigma_star: np.matrix,
+                       alpha: float,
+                       total_N=None,
+                       target_power=None,
+                       min_group_size=1,
+                       tolerance=1e-12):
+    """
+    Find the allocation of subjects to groups which maximizes power for a fixed total N, or which
+    reaches target_power with the smallest total N.
+
+    The design is a cell means design with one row of the essence design matrix per group, so for
+    group sizes n, M = C * diag(1/n) * C` and DELTA = (Theta - Theta_0)` * INV(M) * (Theta - Theta_0).
+    Each candidate allocation only changes DELTA. Candidates are evaluated a batch at a time with
+    :class:`pyglimmpse.plan.BatchPlan`: a pattern search moves subjects between every pair of groups,
+    halving the step when no move helps, and then moves single subjects until no move helps.
+    Ties in power, e.g. when power is 1 to machine precision, are broken by the noncentrality.
+
+    Parameters
+    ----------
+    test
+        The statistical test chosen. This must be one of the tests available in pyglimmpse.multirep or pyglimmpse.unirep
+    c_matrix
+        between subject contrast matrix C, with one column per group
+    theta
+        Theta - Theta_0 = C * B * U - Theta_0
+    sigma_star
+        U` * SIGMA * U
+    alpha
+        Significance level for target GLUM test
+    total_N
+        the total N to allocate. Give either this or target_power.
+    target_power
+        the power to reach with the smallest total N. Give either this or total_N.
+    min_group_size
+        the smallest number of subjects in any group, defaults to 1
+    tolerance
+        value below which a number is considered zero. defaults to 1e-12
+
+    Returns
+    -------
+    group_sizes, power
+        list of the integer number of subjects in each group, and the
+        :class:`pyglimmpse.model.power.Power` for that allocation
+    """
+    if (total_N is None) == (target_power is None):
+        raise GlimmpseValidationException("Give one of total_N and target_power")
+    allocator = _Allocator(test, c_matrix, theta, sigma_star, alpha, min_group_size, tolerance)
+    if total_N is not None:
+        if total_N < allocator.groups * min_group_size:
+            raise GlimmpseValidationException("total_N must allow min_group_size subjects in every group")
+        sizes = allocator.best(total_N)
+    else:
+        sizes = allocator.smallest(target_power)
+    return [int(n) for n in sizes], allocator.power(sizes)
+
+
+class _Allocator:
+    """ Power for batches of allocations of one design"""
+
+    def __init__(self, test, c_matrix, theta, sigma_star, alpha, min_group_size, tolerance):
+        self.test = test
+        self.c_matrix = as_array(c_matrix)
+        self.theta = as_array(theta)
+        self.sigma_star = as_array(sigma_star)
+        self.alpha = alpha
+        self.min_group_size = min_group_size
+        self.tolerance = tolerance
+        self.groups = self.c_matrix.shape[1]
+        self.rank_C = np.linalg.matrix_rank(self.c_matrix)
+        if self.theta.shape[0] != self.c_matrix.shape[0]:
+            raise GlimmpseValidationException("theta must have one row for each row of c_matrix")
+
+    def evaluate(self, sizes):
+        """ power and noncentrality for each row of sizes, rep_N = 1 so the group sizes are the relative group sizes"""
+        sizes = np.atleast_2d(np.asarray(sizes, dtype=float))
+        # M = C * diag(1/n) * C` for every allocation at once
+        m = np.einsum('ig,kg,jg->kij', self.c_matrix, 1 / sizes, self.c_matrix)
+        delta = np.einsum('iu,kij,jv->kuv', self.theta, np.linalg.inv(m), self.theta)
+        plan = BatchPlan(self.test,
+                         rank_C=self.rank_C,
+                         rank_X=self.groups,
+                         relative_group_sizes=[list(s) for s in sizes],
+                         alpha=self.alpha,
+                         sigma_star=self.sigma_star,
+                         delta_es=list(delta),
+                         tolerance=self.tolerance)
+        batch = plan.power(1)
+        return np.nan_to_num(batch.power, nan=-1), np.nan_to_num(batch.noncentrality_parameter, nan=-1)
+
+    def power(self, sizes):
+        """ :class:`pyglimmpse.model.power.Power` for one allocation"""
+        sizes = np.asarray(sizes, dtype=float)
+        m = self.c_matrix @ np.diag(1 / sizes) @ self.c_matrix.T
+        delta = self.theta.T @ np.linalg.inv(m) @ self.theta
+        return self.test(rank_C=self.rank_C,
+                         rank_X=self.groups,
+                         relative_group_sizes=list(sizes),
+                         rep_N=1,
+                         alpha=self.alpha,
+                         sigma_star=self.sigma_star,
+                         delta_es=delta,
+                         tolerance=self.tolerance)
+
+    def best(self, total_N, start=None):
+        """ the integer allocation of total_N with the largest power"""
+        sizes = np.full(self.groups, total_N / self.groups) if start is None else start * total_N / np.sum(start)
+        sizes, _ = self._improve(sizes, total_N / (2 * self.groups), 1)
+        return self._improve(_round_allocation(sizes, total_N, self.min_group_size), 1, 1, integer=True)[0].astype(int)
+
+    def smallest(self, target_power):
+        """ the best allocation of the smallest total N for which it reaches target_power"""
+        failed_N = self.groups * self.min_group_size - 1
+        total_N = max(2 * self.groups, failed_N + 1)
+        sizes = self.best(total_N)
+        while self._score(sizes)[0] < target_power:
+            failed_N = total_N
+            total_N *= 2
+            if total_N > 10 ** 7:
+                raise ValueError('Could not find an allocation which achieves the target power. Please check your design.')
+            sizes = self.best(total_N, sizes)
+        passed_N, passed_sizes = total_N, sizes
+        while passed_N - failed_N > 1:
+            total_N = (passed_N + failed_N) // 2
+            sizes = self.best(total_N, passed_sizes)
+            if self._score(sizes)[0] >= target_power:
+                passed_N, passed_sizes = total_N, sizes
+            else:
+                failed_N = total_N
+        return passed_sizes
+
+    def _score(self, sizes):
+        power, omega = self.evaluate(sizes)
+        return power[0], omega[0]
+
+    def _improve(self, sizes, step, smallest_step, integer=False):
+        """
+        Pattern search: try moving step subjects between every ordered pair of groups, in one batch,
+        and take the best move while it improves power, halving step when none does.
+        """
+        current = self._score(sizes)
+        pairs = [(i, j) for i in range(self.groups) for j in range(self.groups) if i != j]
+        while step >= smallest_step:
+            candidates = []
+            for i, j in pairs:
+                if sizes[j] - step >= self.min_group_size:
+                    candidate = sizes.copy()
+                    candidate[i] += step
+                    candidate[j] -= step
+                    candidates.append(candidate)
+            if candidates:
+                power, omega = self.evaluate(candidates)
+                best = np.lexsort((omega, power))[-1]
+                if (power[best], omega[best]) > current:
+                    sizes, current = candidates[best], (power[best], omega[best])
+                    continue
+            if integer:
+                break
+            step /= 2
+        return sizes, step
+
+
+def _round_allocation(sizes, total_N, min_group_size):
+    """ round group sizes to integers which sum to total_N, keeping the largest remainders"""
+    sizes = np.maximum(sizes, min_group_size)
+    sizes = sizes * total_N / np.sum(sizes)
+    rounded = np.maximum(np.floor(sizes), min_group_size)
+    remainder = int(total_N - np.sum(rounded))
+    order = np.argsort(rounded - sizes)
+    for g in order[:max(remainder, 0)]:
+        rounded[g] += 1
+    for g in order[::-1]:
+        if remainder >= 0:
+            break
+        if rounded[g] > min_group_size:
+            rounded[g] -= 1
+            remainder += 1
+    return rounded
@@ -0,0 +1,276 @@
+"""
+Cache of power and sample size results, keyed on the content of their inputs.
+
+    from pyglimmpse.cache import ResultCache, SQLiteStore
+
+    cache = ResultCache(maxsize=4096, store=SQLiteStore('results.sqlite'))
+    power = cache.power(multirep.hlt_two_moment_null_approximator, rank_C=1, rank_X=2, ...)
+    total_N, power = cache.samplesize(unirep.geisser_greenhouse, rank_C=1, rank_X=2, ..., targetPower=0.9)
+    cache.stats()
+
+The key is a BLAKE2 hash of the function's name, the library version and every argument. Matrices
+are hashed from their buffers, so equal matrices give the same key whether they are np.matrix,
+ndarray or nested lists, and numbers are hashed as floats, so rank_C=1 and rank_C=1.0 agree.
+Arguments which can not be hashed, e.g. open files, bypass the cache.
+
+Results are kept in a bounded least recently used dict in memory and, optionally, in a
+:class:`SQLiteStore` or :class:`DirectoryStore` shared between processes and restarts. The cached
+results are shared by every caller which asks for them, so they must not be modified.
+
+With canonicalize=True SIGMA star and DELTA are both divided by the mean eigenvalue of SIGMA star
+before hashing. Power, noncentrality and sample size do not change when both are multiplied by
+the same constant, so designs which only differ in the units of the responses share a result.
+"""
+import enum
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import pyglimmpse
+from pyglimmpse._arrays import as_array
+
+# value of a miss, as None is a valid result
+_MISSING = object()
+
+
+class ResultCache(object):
+    """
+    Memoize power and sample size calculations.
+
+    :param maxsize: the most results kept in memory, the least recently used is evicted first
+    :param store: optional :class:`SQLiteStore` or :class:`DirectoryStore` behind the memory cache
+    :param canonicalize: if True, designs differing only in the scale of SIGMA star and DELTA share results
+    """
+
+    def __init__(self, maxsize: int = 1024, store=None, canonicalize: bool = False):
+        self.maxsize = maxsize
+        self.store = store
+        self.canonicalize = canonicalize
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.store_hits = 0
+        self.evictions = 0
+        self.uncacheable = 0
+
+    def power(self, test, **kwargs):
+        """ test(**kwargs), the :class:`pyglimmpse.model.power.Power` of one of the multirep or unirep tests"""
+        return self.call(test, **kwargs)
+
+    def samplesize(self, test, **kwargs):
+        """ :func:`pyglimmpse.samplesize.samplesize` (test, **kwargs)"""
+        from pyglimmpse.samplesize import samplesize
+        return self.call(samplesize, test=test, **kwargs)
+
+    def call(self, function, **kwargs):
+        """ function(**kwargs), from the cache if it has been calculated before"""
+        try:
+            key = self.key(function, kwargs)
+        except (TypeError, RecursionError):
+            with self._lock:
+                self.uncacheable += 1
+            return function(**kwargs)
+
+        result = self._get(key)
+        if result is not _MISSING:
+            return result
+        result = function(**kwargs)
+        self._put(key, result)
+        if self.store is not None:
+            self.store.put(key, result)
+        return result
+
+    def key(self, function, kwargs) -> str:
+        """
+        The hex digest identifying function(**kwargs).
+
+        :raises TypeError: if an argument can not be hashed
+        """
+        if self.canonicalize and 'sigma_star' in kwargs and 'delta_es' in kwargs:
+            kwargs = dict(kwargs)
+            kwargs['sigma_star'], kwargs['delta_es'] = _canonical_scale(kwargs['sigma_star'], kwargs['delta_es'])
+        parts = []
+        _encode(pyglimmpse.__version__, parts)
+        _encode(function, parts)
+        _encode(kwargs, parts)
+        # the length of each part, so that the boundaries between them are part of the key
+        parts.append(repr([len(part) for part in parts]).encode())
+        return hashlib.blake2b(b''.join(parts), digest_size=20).hexdigest()
+
+    def _get(self, key):
+        with self._lock:
+            result = self._results.get(key, _MISSING)
+            if result is not _MISSING:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return result
+        if self.store is not None:
+            result = self.store.get(key, _MISSING)
+            if result is not _MISSING:
+                with self._lock:
+                    self.store_hits += 1
+                self._put(key, result)
+                return result
+        with self._lock:
+            self.misses += 1
+        return _MISSING
+
+    def _put(self, key, result):
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """
+        :return: dict of hits and store_hits, the results found in memory and in the store, misses,
+                 evictions from memory, uncacheable calls, and the size and maxsize of the memory cache
+        """
+        with self._lock:
+            return dict(hits=self.hits,
+                        store_hits=self.store_hits,
+                        misses=self.misses,
+                        evictions=self.evictions,
+                        uncacheable=self.uncacheable,
+                        size=len(self._results),
+                        maxsize=self.maxsize)
+
+    def clear(self):
+        """ empty the memory cache and reset the statistics, the store is left as it is"""
+        with self._lock:
+            self._results.clear()
+            self.hits = self.misses = self.store_hits = self.evictions = self.uncacheable = 0
+
+
+class SQLiteStore(object):
+    """
+    Results pickled in an SQLite database, which several processes can share.
+
+    :param path: the database file, created if it does not exist
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB NOT NULL)')
+
+    def _connection(self):
+        # sqlite3 connections may only be used by the thread which opened them
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path, timeout=30)
+        return connection
+
+    def get(self, key, default=None):
+        row = self._connection().execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+        return default if row is None else pickle.loads(row[0])
+
+    def put(self, key, value):
+        with self._connection() as connection:
+            connection.execute('INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)',
+                               (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)))
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def close(self):
+        """ close this thread's connection to the database"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+class DirectoryStore(object):
+    """
+    Results pickled one per file in a directory, named by their key.
+
+    :param path: the directory, created if it does not exist
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, key + '.pickle')
+
+    def get(self, key, default=None):
+        try:
+            with open(self._file(key), 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return default
+
+    def put(self, key, value):
+        # write then rename, so a reader never sees part of a file
+        temporary = '{0}.{1}.{2}.tmp'.format(self._file(key), os.getpid(), threading.get_ident())
+        with open(temporary, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, self._file(key))
+
+    def __len__(self):
+        return sum(1 for name in os.listdir(self.path) if name.endswith('.pickle'))
+
+
+def _canonical_scale(sigma_star, delta_es):
+    """ SIGMA star and DELTA divided by the mean eigenvalue of SIGMA star, rounded to 12 decimals"""
+    sigma_star = as_array(sigma_star)
+    scale = np.trace(sigma_star) / sigma_star.shape[0]
+    if not scale > 0:
+        return sigma_star, delta_es
+    return np.round(sigma_star / scale, 12), np.round(as_array(delta_es) / scale, 12)
+
+
+def _encode(value, parts):
+    """ append bytes identifying value to parts, with a tag for its type so that e.g. '1' and 1 differ"""
+    kind = type(value)
+    if kind is float or kind is int or isinstance(value, np.number):
+        parts.append(b'f' + float(value).hex().encode())
+    elif kind is str or kind is bool or value is None or isinstance(value, np.bool_):
+        parts.append(b'v' + repr(bool(value) if isinstance(value, np.bool_) else value).encode())
+    elif isinstance(value, np.ndarray) or (isinstance(value, (list, tuple)) and _is_numeric(value)):
+        array = np.asarray(value, dtype=float)
+        parts.append(b'a' + repr(array.shape).encode())
+        parts.append(array.tobytes())
+    elif isinstance(value, dict):
+        parts.append(b'd' + str(len(value)).encode())
+        for name in sorted(value):
+            parts.append(b'k' + str(name).encode())
+            _encode(value[name], parts)
+    elif isinstance(value, enum.Enum):
+        parts.append(b'e' + '{0}.{1}'.format(kind.__qualname__, value.name).encode())
+    elif isinstance(value, (list, tuple)):
+        parts.append(b'l' + str(len(value)).encode())
+        for item in value:
+            _encode(item, parts)
+    elif callable(value) and hasattr(value, '__qualname__'):
+        if '<' in value.__qualname__:
+            # lambdas and nested functions are not identified by their names
+            raise TypeError('can not hash {0}'.format(value.__qualname__))
+        parts.append(b'c' + '{0}.{1}'.format(value.__module__, value.__qualname__).encode())
+    elif hasattr(value, '__dict__'):
+        # options such as CL, IP or a confidence interval
+        parts.append(b'o' + '{0}.{1}'.format(kind.__module__, kind.__qualname__).encode())
+        _encode(vars(value), parts)
+    else:
+        raise TypeError('can not hash {0}'.format(kind.__name__))
+
+
+def _is_numeric(values):
+    """ True if values is a possibly nested list of numbers, such as relative_group_sizes or a matrix"""
+    if all(type(v) is float or type(v) is int for v in values):
+        return True
+    try:
+        return np.asarray(values).dtype.kind in 'biuf'
+    except ValueError:
+        return False
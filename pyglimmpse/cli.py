@@ -0,0 +1,240 @@
+"""
+The pyglimmpse command: run the power, sample size and confidence limit jobs in a JSON lines file.
+
+    pyglimmpse jobs.jsonl --workers 8 --output results.jsonl
+
+Each line of the input is one job, an object naming a test in :mod:`pyglimmpse.multirep` or
+:mod:`pyglimmpse.unirep` and giving its arguments, e.g.
+
+    {"id": "a", "type": "power", "test": "hlt_two_moment_null_approximator", "rank_C": 1, "rank_X": 2,
+     "relative_group_sizes": [1, 1], "rep_N": 10, "alpha": 0.05,
+     "sigma_star": [[1, 0.3], [0.3, 1]], "delta_es": [[0.5, 0.1], [0.1, 0.4]]}
+
+type is "power" (the default), "samplesize", which also needs targetPower, or "cl", power with
+confidence limits, which needs a "confidence_interval" object with beta_known, lower_tail,
+upper_tail, n_est and rank_est. Strings naming a member of :class:`pyglimmpse.constants.Constants`,
+e.g. "target": "TARGET_LOWER_BOUND", are replaced by that member. id is optional and copied to
+the result.
+
+Each result is written as one JSON line with the job's index, id, type and test, total_N for a
+sample size, and the fields written by :mod:`pyglimmpse.sinks`, or an error if the job failed.
+Jobs are sent to a pool of worker processes chunk_size at a time, and no more than max_in_flight
+chunks are submitted but not yet written, so a large job file is read as fast as it is run.
+Results are written in the order of the input unless --unordered is given. Throughput is reported
+on stderr at the end, and the exit status is 1 if any job failed.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import types
+from concurrent import futures
+
+from pyglimmpse import router
+from pyglimmpse.constants import Constants
+from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException
+from pyglimmpse.sinks import RESULT_COLUMNS
+
+JOB_TYPES = ('power', 'samplesize', 'cl')
+
+# the tests a job may name
+TESTS = {test.__name__: test for test in router.MULTIREP_TESTS | router.UNIREP_TESTS}
+
+
+def run_job(job: dict) -> dict:
+    """
+    Run one job, as read from a line of the input.
+
+    :return: the result, without its index
+    """
+    job = dict(job)
+    result = {'id': job.pop('id', None), 'type': job.pop('type', 'power'), 'test': job.pop('test', None)}
+    if result['type'] not in JOB_TYPES:
+        raise GlimmpseValidationException('type must be one of {0}.'.format(', '.join(JOB_TYPES)))
+    if result['test'] not in TESTS:
+        raise GlimmpseValidationException('test must name one of the tests in pyglimmpse.multirep or pyglimmpse.unirep.')
+    test = TESTS[result['test']]
+    arguments = {name: _argument(value) for name, value in job.items()}
+    if 'confidence_interval' in arguments:
+        arguments['confidence_interval'] = types.SimpleNamespace(**arguments['confidence_interval'])
+    elif result['type'] == 'cl':
+        raise GlimmpseValidationException('A cl job needs a confidence_interval.')
+
+    if result['type'] == 'samplesize':
+        from pyglimmpse.samplesize import samplesize
+        total_N, power = samplesize(test, **arguments)
+        result['total_N'] = json_value(total_N)
+    else:
+        power = test(**arguments)
+    result.update(power_record(power))
+    return result
+
+
+def run_lines(lines):
+    """ the results of the jobs in lines, a list of (index, JSON line), run in this process"""
+    results = []
+    for index, line in lines:
+        try:
+            result = run_job(json.loads(line))
+        except Exception as e:
+            result = {'error': '{0}: {1}'.format(type(e).__name__, e)}
+            try:
+                result['id'] = json.loads(line).get('id')
+            except (ValueError, AttributeError):
+                pass
+        results.append(dict(index=index, **result))
+    return results
+
+
+def run(lines, write, workers=None, chunk_size=16, max_in_flight=None, ordered=True) -> dict:
+    """
+    Run the jobs in lines and write each result.
+
+    :param lines: iterable of JSON lines, one job each. Blank lines are skipped
+    :param write: function called with each result
+    :param workers: number of worker processes, defaults to the number of CPUs. 0 runs the jobs in this
+        process, which is also the default on a single CPU
+    :param chunk_size: the number of jobs sent to a worker at once
+    :param max_in_flight: the most chunks submitted but not yet written, defaults to twice the number of workers
+    :param ordered: True to write the results in the order of the jobs, False to write them as they finish
+    :return: dict of statistics: jobs, errors, seconds and jobs_per_second
+    """
+    if chunk_size < 1:
+        raise GlimmpseValidationException('chunk_size must be at least 1.')
+    if workers is None:
+        # with one CPU a pool only adds the cost of sending jobs to it
+        workers = os.cpu_count() or 1
+        workers = 0 if workers == 1 else workers
+    max_in_flight = max_in_flight or 2 * max(workers, 1)
+    stats = {'jobs': 0, 'errors': 0}
+    start = time.perf_counter()
+
+    def emit(results):
+        for result in results:
+            stats['jobs'] += 1
+            stats['errors'] += 'error' in result
+            write(result)
+
+    chunks = _chunks(lines, chunk_size)
+    if workers == 0:
+        for chunk in chunks:
+            emit(run_lines(chunk))
+    else:
+        with futures.ProcessPoolExecutor(workers) as pool:
+            pending = {}
+            finished = {}
+            state = {'next': 0}
+
+            def collect(block):
+                done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED if block else futures.ALL_COMPLETED,
+                                       timeout=None if block else 0)
+                for future in done:
+                    first = pending.pop(future)
+                    if ordered:
+                        finished[first] = future.result()
+                    else:
+                        emit(future.result())
+                # write the chunks which are next in order
+                while state['next'] in finished:
+                    results = finished.pop(state['next'])
+                    state['next'] += len(results)
+                    emit(results)
+
+            for chunk in chunks:
+                while len(pending) + len(finished) >= max_in_flight:
+                    collect(block=True)
+                pending[pool.submit(run_lines, chunk)] = chunk[0][0]
+                collect(block=False)
+            while pending:
+                collect(block=True)
+
+    stats['seconds'] = time.perf_counter() - start
+    stats['jobs_per_second'] = stats['jobs'] / stats['seconds'] if stats['seconds'] else float('inf')
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='pyglimmpse', description=__doc__.strip().splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', nargs='?', default='-', help='JSON lines file of jobs, - or omitted for stdin')
+    parser.add_argument('-o', '--output', default='-', help='file to write the results to, - for stdout')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='worker processes, defaults to the number of CPUs, 0 to run in this process')
+    parser.add_argument('--chunk-size', type=int, default=16, help='jobs sent to a worker at once')
+    parser.add_argument('--max-in-flight', type=int, default=None,
+                        help='chunks submitted but not yet written, defaults to twice the number of workers')
+    parser.add_argument('--unordered', action='store_true', help='write results as they finish, not in input order')
+    parser.add_argument('-q', '--quiet', action='store_true', help='do not report throughput on stderr')
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    target = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        stats = run(source,
+                    lambda result: target.write(json.dumps(result, allow_nan=False) + '\n'),
+                    workers=args.workers,
+                    chunk_size=args.chunk_size,
+                    max_in_flight=args.max_in_flight,
+                    ordered=not args.unordered)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+        else:
+            target.flush()
+    if not args.quiet:
+        print('{jobs} jobs, {errors} failed, in {seconds:.3f} s: {jobs_per_second:.1f} jobs/s'.format(**stats),
+              file=sys.stderr)
+    return 1 if stats['errors'] else 0
+
+
+def _chunks(lines, chunk_size):
+    """ lists of up to chunk_size (index, line), numbering the lines which are not blank"""
+    chunk = []
+    index = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        chunk.append((index, line))
+        index += 1
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _argument(value):
+    """ a job argument, with the names of Constants members replaced by the members"""
+    if isinstance(value, str) and value in Constants.__members__:
+        return Constants[value]
+    if isinstance(value, dict):
+        return {name: _argument(v) for name, v in value.items()}
+    return value
+
+
+def power_record(power) -> dict:
+    """ the RESULT_COLUMNS of :mod:`pyglimmpse.sinks` for one Power, with NaN as None"""
+    record = {'power': power.power,
+              'noncentrality_parameter': power.noncentrality_parameter,
+              'fmethod': power.fmethod}
+    for prefix, bound in (('lower_', power.lower_bound), ('upper_', power.upper_bound)):
+        record[prefix + 'power'] = bound.power if bound else None
+        record[prefix + 'noncentrality'] = bound.noncentrality_parameter if bound else None
+        record[prefix + 'fmethod'] = bound.fmethod if bound else None
+    record['error_message'] = power.error_message
+    record['diagnostics'] = ';'.join(code.name for code in power.diagnostics)
+    return {name: json_value(record[name]) for name in RESULT_COLUMNS}
+
+
+def json_value(value):
+    """ value as written to JSON: Constants as their values, numbers as floats and NaN as None"""
+    if isinstance(value, Constants):
+        return value.value
+    if value is None or isinstance(value, str):
+        return value
+    value = float(value)
+    return None if math.isnan(value) else value
@@ -57,8 +57,32 @@ class Constants(Enum):
     SIGMA_ESTIMATED = 'sigma estimated'
     INTERNAL_PILOT = 'internal pilot'
 
+    # calculation path chosen by pyglimmpse.router
+    ROUTE_EXACT_F = 'closed form exact F'
+    ROUTE_GENERAL = 'general'
+
+    # quantity targeted by samplesize
+    TARGET_POWER = 'power point estimate'
+    TARGET_LOWER_BOUND = 'lower confidence limit of power'
+
+    # search used by samplesize
+    SEARCH_BISECTION = 'bisection'
+    SEARCH_NEWTON = 'safeguarded Newton'
+    SEARCH_PARALLEL = 'parallel k-ary'
+
     INVALID_DISTRIBUTION_NONCENTRALITY_PARAMETER = 'INVALID_DISTRIBUTION_NONCENTRALITY_PARAMETER'
 
+    # diagnostics recorded by the power calculations, see pyglimmpse.diagnostics
+    WARN_NONCENTRALITY_UNDEFINED = 'Power is missing because the noncentrality could not be computed.'
+    WARN_PBT_UNDEFINED = 'Power is missing because min(rank_C, rank_U) - v <= 0.'
+    WARN_HDLSS = 'Power is missing, because Uncorrected, Geisser-Greenhouse and Box tests are poorly behaved ' \
+                 '(super low power and test size) when B > N-R, i.e., HDLSS.'
+    WARN_EPSILON_TRUNCATED_UP = 'PowerWarn17: The approximate expected value of estimated epsilon was truncated up to 1/B.'
+    WARN_EPSILON_TRUNCATED_DOWN = 'PowerWarn18: The approximate expected value of estimated epsilon was truncated down to 1.'
+    WARN_CL_MISSING = 'Powerwarn16: Confidence limits are missing because power is missing.'
+    WARN_LOWER_CL_CONSERVATIVE = 'The lower confidence limit on power is conservative.'
+    WARN_UPPER_CL_CONSERVATIVE = 'The upper confidence limit on power is conservative.'
+
 
     ERR_NOT_POSITIVE_DEFINITE = 'Sigma star is not positive definite.'
     ERR_ERROR_DEG_FREEDOM = 'Error degrees of freedom must be positive. To achieve this increase smallest group size'
@@ -0,0 +1,112 @@
+"""
+Diagnostics recorded by the power calculations instead of Python warnings.
+
+When a calculation truncates an estimate or returns missing power it records a code, one of the
+Constants.WARN_* members, e.g. Constants.WARN_EPSILON_TRUNCATED_UP for PowerWarn17. The tests in
+:mod:`pyglimmpse.multirep` and :mod:`pyglimmpse.unirep` return the codes recorded while they ran
+in :attr:`pyglimmpse.model.power.Power.diagnostics`:
+
+    power = unirep.hyuhn_feldt(...)
+    if Constants.WARN_EPSILON_TRUNCATED_DOWN in power.diagnostics:
+        ...
+
+For a sample size search, sweep or batch, :func:`capture` counts every code recorded by any of the
+power calculations inside it:
+
+    with diagnostics.capture() as recorded:
+        samplesize(...)
+    recorded[Constants.WARN_HDLSS]
+
+No warning is raised unless :func:`emit_warnings` is switched on, after which every code recorded
+is also raised as a :class:`DiagnosticWarning`, a UserWarning, with the code's message.
+"""
+import contextlib
+import contextvars
+import functools
+import warnings
+from collections import Counter
+
+_RECORDED = contextvars.ContextVar('pyglimmpse_diagnostics', default=None)
+_emit_warnings = False
+
+
+class DiagnosticWarning(UserWarning):
+    """ a diagnostic raised as a warning, see :func:`emit_warnings`"""
+    pass
+
+
+def emit_warnings(enabled: bool = True) -> bool:
+    """
+    Also raise each diagnostic as a :class:`DiagnosticWarning` when it is recorded, or stop doing so.
+
+    :param enabled: True to raise warnings, False for the default of only recording the codes
+    :return: the previous setting
+    """
+    global _emit_warnings
+    previous = _emit_warnings
+    _emit_warnings = enabled
+    return previous
+
+
+def record(code):
+    """ record the diagnostic code, a Constants.WARN_* member, in the active capture"""
+    recorded = _RECORDED.get()
+    if recorded is not None:
+        recorded[code] = recorded.get(code, 0) + 1
+    if _emit_warnings:
+        warnings.warn(code.value, DiagnosticWarning, stacklevel=2)
+
+
+@contextlib.contextmanager
+def capture():
+    """
+    Count the diagnostics recorded until the block exits. Captures nest, and the codes recorded
+    in an inner capture are added to the one around it when it exits.
+
+    :return: :class:`collections.Counter` of the codes, in the order they were first recorded
+    """
+    recorded = Counter()
+    token = _RECORDED.set(recorded)
+    try:
+        yield recorded
+    finally:
+        _end_capture(token, recorded)
+
+
+def _end_capture(token, recorded):
+    """ restore the capture around this one and add the codes recorded in this one to it"""
+    _RECORDED.reset(token)
+    outer = _RECORDED.get()
+    if outer is not None:
+        for code, n in recorded.items():
+            outer[code] = outer.get(code, 0) + n
+
+
+def merge(codes, recorded):
+    """ the tuple codes followed by the codes in recorded which are not already in it"""
+    return codes + tuple(code for code in recorded if code not in codes)
+
+
+def attach(function):
+    """
+    decorator adding the codes recorded while function runs to the diagnostics of the
+    :class:`pyglimmpse.model.power.Power`, list of them or
+    :class:`pyglimmpse.model.power_batch.PowerBatch` it returns
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        # capture() inlined, as this runs for every power calculation
+        recorded = {}
+        token = _RECORDED.set(recorded)
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            _end_capture(token, recorded)
+        if recorded and hasattr(result, 'add_diagnostics'):
+            # a pyglimmpse.model.power_batch.PowerBatch
+            result.add_diagnostics(recorded)
+        elif recorded:
+            for power in (result if isinstance(result, list) else [result]):
+                power.diagnostics = merge(power.diagnostics, recorded)
+        return result
+    return wrapper
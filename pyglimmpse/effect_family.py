@@ -0,0 +1,271 @@
+import numpy as np
+
+from pyglimmpse._arrays import as_array
+from pyglimmpse.constants import Constants
+from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException
+from pyglimmpse.model.kronecker_operator import KroneckerOperator
+from pyglimmpse.orpol import upoly
+from pyglimmpse.plan import CompiledPlan
+
+
+def effect_family_power(test,
+                        u_family,
+                        sigma,
+                        c_beta: np.matrix,
+                        m_matrix: np.matrix,
+                        rank_C: float,
+                        rank_X: float,
+                        relative_group_sizes,
+                        rep_N: float,
+                        alpha: float,
+                        theta_zero=None,
+                        **kwargs):
+    """
+    Calculate power for every within subject effect returned by :func:`pyglimmpse.orpol.upoly`
+    for one between subject design.
+
+    SIGMA is decomposed once, SIGMA = L * L` with L = V * sqrt(LAMBDA) from its eigendecomposition,
+    and each SIGMA star is formed as (L` * U)` * (L` * U). If SIGMA is a :class:`.KroneckerOperator`
+    each factor is decomposed once and the products are taken factor by factor.
+
+    Parameters
+    ----------
+    test
+        The statistical test chosen. This must be one of the tests available in pyglimmpse.multirep or pyglimmpse.unirep
+    u_family
+        dictionary of U matrices as returned by upoly, keyed by effect order and then by effect name
+    sigma
+        covariance matrix of the responses, dense or a :class:`.KroneckerOperator`
+    c_beta
+        C * B, the between subject contrast applied to the parameter matrix, before U is applied
+    m_matrix
+        M = C * inv(X`X) * C` for the essence design matrix
+    rank_C
+        rank of C matrix
+    rank_X
+        rank of X matrix
+    relative_group_sizes
+        a list of ratios of size of the groups in your design.
+    rep_N
+        number of times each row of the essence design matrix is repeated
+    alpha
+        Significance level for target GLUM test
+    theta_zero
+        dictionary of null hypothesis matrices keyed like u_family. Defaults to zero for every effect.
+
+    Returns
+    -------
+    table
+        list of rows, one per effect, with keys 'order', 'effect', 'rank_U' and 'power'
+    """
+    c_beta = as_array(c_beta)
+    m_inverse = np.linalg.inv(as_array(m_matrix))
+    root = _sigma_root(sigma)
+
+    table = []
+    for order, effects in u_family.items():
+        for effect, u_matrix in effects.items():
+            sigma_star = _sigma_star(root, u_matrix)
+            theta = _transpose_dot(u_matrix, c_beta.T).T
+            if theta_zero is not None and order in theta_zero and effect in theta_zero[order]:
+                theta = theta - as_array(theta_zero[order][effect])
+            delta_es = theta.T @ m_inverse @ theta
+            power = test(rank_C=rank_C,
+                         rank_X=rank_X,
+                         relative_group_sizes=relative_group_sizes,
+                         rep_N=rep_N,
+                         alpha=alpha,
+                         sigma_star=sigma_star,
+                         delta_es=delta_es,
+                         **kwargs)
+            table.append({'order': order,
+                          'effect': effect,
+                          'rank_U': np.shape(sigma_star)[0],
+                          'power': power})
+    return table
+
+
+def budget_design(test,
+                  times,
+                  sigma,
+                  c_beta: np.matrix,
+                  m_matrix: np.matrix,
+                  rank_C: float,
+                  rank_X: float,
+                  relative_group_sizes,
+                  alpha: float,
+                  target_power: float,
+                  cost,
+                  candidates=None,
+                  **kwargs):
+    """
+    Find the cheapest design, choosing both the time points measured and the number of subjects,
+    which reaches target_power for the polynomial trend in time.
+
+    Each candidate measures a subset of times, and U is the orthogonal polynomial trend contrast
+    from :func:`pyglimmpse.orpol.upoly` for that subset. SIGMA over all times is decomposed once,
+    SIGMA = L * L`, and the rows of L for the subset give SIGMA star for every candidate. Candidates
+    are only built when they might be cheaper than the best design found so far: since cost and power
+    both increase with N, a candidate is skipped if it costs more at the smallest realizable N,
+    and the search in N for a candidate stops once the cost reaches the best so far.
+
+    Parameters
+    ----------
+    test
+        The statistical test chosen. This must be one of the tests available in pyglimmpse.multirep or pyglimmpse.unirep
+    times
+        all the time points which could be measured
+    sigma
+        covariance matrix of the responses at all the time points
+    c_beta
+        C * B at all the time points, with one column per time point
+    m_matrix
+        M = C * inv(X`X) * C` for the essence design matrix
+    rank_C
+        rank of C matrix
+    rank_X
+        rank of X matrix
+    relative_group_sizes
+        a list of ratios of size of the groups in your design.
+    alpha
+        Significance level for target GLUM test
+    target_power
+        the power the design must reach
+    cost
+        function of the number of time points and the total N giving the cost of a design, which
+        increases with the total N, e.g. ``lambda n_times, total_N: total_N * (100 + 10 * n_times)``
+    candidates
+        list of lists of indices into times to consider. Defaults to 2, 3, ... evenly spaced time points
+        including the first and last.
+    kwargs
+        any other optional arguments accepted by the test
+
+    Returns
+    -------
+    design
+        dictionary with keys 'times', 'total_N', 'power' and 'cost' for the cheapest design, or None
+        if no candidate reaches target_power
+    """
+    times = np.asarray(times, dtype=float)
+    c_beta = as_array(c_beta)
+    if c_beta.shape[1] != len(times):
+        raise GlimmpseValidationException("c_beta must have one column for each time point")
+    if candidates is None:
+        candidates = [sorted(set(np.round(np.linspace(0, len(times) - 1, k)).astype(int))) for k in range(2, len(times) + 1)]
+    m_inverse = np.linalg.inv(as_array(m_matrix))
+    root = as_array(_sigma_root(sigma))
+    group_total = sum(relative_group_sizes)
+    # the smallest rep_N with error degrees of freedom
+    smallest_n = int(rank_X // group_total) + 1
+
+    best = None
+    for indices in candidates:
+        n_times = len(indices)
+        if best is not None and cost(n_times, smallest_n * group_total) >= best['cost']:
+            continue
+        u_matrix = upoly([times[indices]], lazy=True)['u_maineffect']['f0']
+        sigma_star = _sigma_star(root[indices, :], u_matrix)
+        theta = _transpose_dot(u_matrix, c_beta[:, indices].T).T
+        plan = CompiledPlan(test,
+                            rank_C=rank_C,
+                            rank_X=rank_X,
+                            relative_group_sizes=relative_group_sizes,
+                            alpha=alpha,
+                            sigma_star=sigma_star,
+                            delta_es=theta.T @ m_inverse @ theta,
+                            **kwargs)
+        limit = None if best is None else best['cost']
+        found = _cheapest_rep_N(plan, target_power, lambda rep_N: cost(n_times, rep_N * group_total), limit, smallest_n)
+        if found is not None:
+            rep_N, power = found
+            best = {'times': list(times[indices]),
+                    'total_N': rep_N * group_total,
+                    'power': power,
+                    'cost': cost(n_times, rep_N * group_total)}
+    return best
+
+
+def _cheapest_rep_N(plan, target_power, cost, limit, smallest_n):
+    """
+    The smallest rep_N from smallest_n, and its power, for which the plan reaches target_power, by
+    doubling and then bisection. None if that would cost limit or more.
+    """
+    failed_n, n = smallest_n - 1, smallest_n
+    while True:
+        if n > Constants.MAX_SAMPLE_SIZE.value:
+            return None
+        if limit is not None and cost(n) >= limit:
+            # only an affordable n can improve on the best design so far
+            n = _largest_affordable(cost, failed_n, n, limit)
+            if n is None:
+                return None
+            power = _power_or_none(plan, n)
+            if power is None or not power.power >= target_power:
+                return None
+            break
+        power = _power_or_none(plan, n)
+        if power is not None and power.power >= target_power:
+            break
+        failed_n = n
+        n *= 2
+    while n - failed_n > 1:
+        middle = (n + failed_n) // 2
+        middle_power = _power_or_none(plan, middle)
+        if middle_power is not None and middle_power.power >= target_power:
+            n, power = middle, middle_power
+        else:
+            failed_n = middle
+    return n, power
+
+
+def _power_or_none(plan, rep_N):
+    """ power for the plan, None if the design is too small for it to be calculated"""
+    try:
+        return plan.power(rep_N)
+    except (ArithmeticError, np.linalg.LinAlgError, GlimmpseValidationException):
+        return None
+
+
+def _largest_affordable(cost, lower_n, upper_n, limit):
+    """ the largest n with lower_n < n < upper_n which costs less than limit, None if there is none"""
+    n = lower_n
+    while upper_n - n > 1:
+        middle = (upper_n + n) // 2
+        if cost(middle) < limit:
+            n = middle
+        else:
+            upper_n = middle
+    return n if n > lower_n else None
+
+
+def _sigma_root(sigma):
+    """ Factor SIGMA = L * L` from one eigendecomposition, per factor if SIGMA is Kronecker separable"""
+    if isinstance(sigma, KroneckerOperator):
+        return KroneckerOperator([_symmetric_root(s) for s in sigma.factors])
+    return _symmetric_root(sigma)
+
+
+def _symmetric_root(sigma):
+    """ L = V * sqrt(LAMBDA) for a symmetric non-negative definite SIGMA"""
+    sigma = as_array(sigma)
+    if sigma.shape[0] != sigma.shape[1]:
+        raise GlimmpseValidationException("SIGMA must be square")
+    eigenvalues, eigenvectors = np.linalg.eigh((sigma + sigma.T) / 2)
+    return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+
+def _sigma_star(root, u_matrix):
+    """ SIGMA star = (L` * U)` * (L` * U)"""
+    if isinstance(root, KroneckerOperator) and isinstance(u_matrix, KroneckerOperator):
+        return KroneckerOperator([(r.T @ u).T @ (r.T @ u) for r, u in zip(root.factors, u_matrix.factors)]).materialize()
+    if isinstance(root, KroneckerOperator):
+        root = root.materialize()
+    w = _transpose_dot(u_matrix, root)
+    return w @ w.T
+
+
+def _transpose_dot(u_matrix, x):
+    """ U` * X, without materializing U if it is a :class:`.KroneckerOperator`"""
+    if isinstance(u_matrix, KroneckerOperator):
+        return u_matrix.T.dot(x)
+    return as_array(u_matrix).T @ as_array(x)
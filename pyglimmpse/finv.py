@@ -1,6 +1,12 @@
 import numpy as np
-from scipy import stats
 
+from pyglimmpse import instrumentation
+from pyglimmpse._lazy import lazy_import
+
+special = lazy_import('scipy.special')
+
+
+@instrumentation.timed('finv')
 def finv(alpha, df1, df2):
     """
     This function returns the critical value from a central F(DF1, DF2) where df is degree of freedom
@@ -19,8 +25,33 @@ def finv(alpha, df1, df2):
         fcrit = np.NaN
     else:
         if df2 <= 10**9.4:
-            fcrit = stats.f.ppf(alpha, df1, df2)
+            fcrit = special.fdtri(df1, df2, alpha)
         else:
-            fcrit = stats.chi2.ppf(alpha, df1)
+            fcrit = _chi2_ppf(alpha, df1)
+
+    return fcrit
+
+
+@instrumentation.timed('finv_array')
+def finv_array(alpha, df1, df2):
+    """
+    Vectorized :func:`finv`. The arguments are broadcast against each other.
+
+    :param alpha:
+    :param df1:
+    :param df2:
+    :return: fcrit, array of critical values, NaN where :func:`finv` would return a missing value
+    """
+    alpha, df1, df2 = np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in (alpha, df1, df2)])
+    fcrit = np.full(alpha.shape, np.nan)
+    valid = (df1 <= 10**7.6) & (df1 >= 0) & (df2 >= 0)
+    f = valid & (df2 <= 10**9.4)
+    chi = valid & (df2 > 10**9.4)
+    fcrit[f] = special.fdtri(df1[f], df2[f], alpha[f])
+    fcrit[chi] = _chi2_ppf(alpha[chi], df1[chi])
+    return fcrit
+
 
-    return fcrit
\ No newline at end of file
+def _chi2_ppf(alpha, df):
+    """ scipy.stats.chi2.ppf without importing scipy.stats"""
+    return 2 * special.gammaincinv(df / 2, alpha)
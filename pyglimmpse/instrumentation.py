@@ -0,0 +1,120 @@
+"""
+Opt in timers and counters for the power calculations.
+
+    from pyglimmpse import instrumentation
+
+    with instrumentation.collect() as collector:
+        power = multirep.hlt_two_moment_null_approximator(...)
+    metrics = collector.as_dict()
+
+Inside :func:`collect` the instrumented functions record
+
+* the total time spent in, and the number of calls to, each stage, e.g. calc_properties, calc_eval, finv, probf
+* counters, e.g. the steps and integration terms used by the Davies algorithm and the nodes used by Simpson's rule
+* histograms, e.g. the probf method used for each probability
+* events, e.g. the quantities the Davies algorithm used to print
+
+Outside :func:`collect` each hook costs one context variable lookup. The collector lives in a
+:class:`contextvars.ContextVar`, so threads and asyncio tasks only see the collector they opened.
+"""
+import contextlib
+import contextvars
+import functools
+import time
+from collections import Counter, defaultdict
+
+_COLLECTOR = contextvars.ContextVar('pyglimmpse_instrumentation', default=None)
+
+
+class Collector(object):
+    """
+    Measurements recorded while the collector is active.
+
+    :param max_events: the most events kept, later events are only counted in dropped_events
+    """
+
+    def __init__(self, max_events: int = 10000):
+        self.timers = defaultdict(float)
+        self.calls = Counter()
+        self.counters = Counter()
+        self.histograms = defaultdict(Counter)
+        self.events = []
+        self.max_events = max_events
+        self.dropped_events = 0
+
+    def as_dict(self) -> dict:
+        """
+        The measurements as plain dicts, lists, strings and numbers, ready for json.dumps.
+
+        :return: dict with keys stages, counters, histograms, events and dropped_events. stages maps each
+                 stage to its calls and total seconds, which include the time spent in nested stages.
+                 Histogram values which are Enum members, such as fmethod, are keyed by their name.
+        """
+        return dict(stages={stage: dict(calls=self.calls[stage], seconds=self.timers[stage]) for stage in self.calls},
+                    counters=dict(self.counters),
+                    histograms={name: {getattr(value, 'name', str(value)): n for value, n in histogram.items()}
+                                for name, histogram in self.histograms.items()},
+                    events=[dict(event) for event in self.events],
+                    dropped_events=self.dropped_events)
+
+
+@contextlib.contextmanager
+def collect(collector: Collector = None):
+    """
+    Record measurements in collector, or a new :class:`Collector`, until the block exits.
+
+    :return: the collector
+    """
+    collector = Collector() if collector is None else collector
+    token = _COLLECTOR.set(collector)
+    try:
+        yield collector
+    finally:
+        _COLLECTOR.reset(token)
+
+
+def active():
+    """ the collector recording in this context, None if there is none"""
+    return _COLLECTOR.get()
+
+
+def timed(stage: str):
+    """ decorator recording the time spent in, and the calls to, the decorated function as stage"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            collector = _COLLECTOR.get()
+            if collector is None:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                collector.timers[stage] += time.perf_counter() - start
+                collector.calls[stage] += 1
+        return wrapper
+    return decorator
+
+
+def count(name: str, n=1):
+    """ add n to the counter name"""
+    collector = _COLLECTOR.get()
+    if collector is not None:
+        collector.counters[name] += n
+
+
+def observe(name: str, value, n=1):
+    """ add n observations of value to the histogram name"""
+    collector = _COLLECTOR.get()
+    if collector is not None:
+        collector.histograms[name][value] += n
+
+
+def event(name: str, **fields):
+    """ record an event name with the given fields"""
+    collector = _COLLECTOR.get()
+    if collector is not None:
+        if len(collector.events) < collector.max_events:
+            collector.events.append(dict(fields, event=name))
+        else:
+            collector.dropped_events += 1
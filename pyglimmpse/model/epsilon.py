@@ -1,5 +1,6 @@
 import numpy as np
 
+from pyglimmpse._arrays import as_array
 from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException
 
 
@@ -30,6 +31,7 @@ class Epsilon:
         slam2, sum of squared eigenvalues
         slam3, sum of eigenvalues
         """
+        sigma_star = as_array(sigma_star)
         if rank_U != np.shape(sigma_star)[0]:
             raise GlimmpseValidationException("rank of U should equal to nrows of sigma_star")
 
@@ -45,12 +47,13 @@ class Epsilon:
         self.slam3 = np.sum(seigval)
         self.eps = self.slam1 / (rank_U * self.slam2)
         self.d = len(deigval_array)
-        self.deigval = np.matrix(deigval_array).T
-        self.mtp = np.matrix(mtp_array).T
+        # d x 1 columns
+        self.deigval = deigval_array.reshape(-1, 1)
+        self.mtp = mtp_array.reshape(-1, 1)
 
     def esigEvals(self):
         # get the eigenvalues of self.esig using a singular value decomposition
-        # seval is an array of dimension 1 x b
-        seval = np.matrix(np.linalg.svd(self.esig, full_matrices=False, compute_uv=False, hermitian=True)).T
-        esigEvals = np.sum(seval * seval.T)
+        # seval is a b x 1 column
+        seval = np.linalg.svd(self.esig, full_matrices=False, compute_uv=False, hermitian=True).reshape(-1, 1)
+        esigEvals = np.sum(seval @ seval.T)
         return esigEvals
@@ -1,5 +1,7 @@
 import numpy as np
 
+from pyglimmpse._arrays import as_array
+
 class HypothesisError:
     """
         Come up with a decent docstring describing exactly what these are
@@ -13,9 +15,11 @@ class HypothesisError:
         :param sigma_star:
         :param rank_U:
         """
+        sigma_star = as_array(sigma_star)
+        hypo_sum_square = as_array(hypo_sum_square)
         self.q1 = np.trace(sigma_star)
         self.q2 = np.trace(hypo_sum_square)
         self.q3 = self.q1 ** 2
         self.q4 = np.sum(np.power(sigma_star, 2))
-        self.q5 = np.trace(sigma_star * hypo_sum_square)
+        self.q5 = np.trace(sigma_star @ hypo_sum_square)
         self.lambar = self.q1 / rank_u
\ No newline at end of file
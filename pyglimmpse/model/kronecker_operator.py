@@ -0,0 +1,119 @@
+from functools import reduce
+
+import numpy as np
+
+from pyglimmpse._arrays import as_array
+from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException
+
+
+class KroneckerOperator:
+    """
+    A lazy Kronecker product A_1 (x) A_2 (x) ... (x) A_k.
+
+    Only the factors are stored. The dense product is built on demand by
+    :meth:`materialize`, while :meth:`sandwich` and :meth:`dot` work on the
+    factors directly, so a U matrix for a large factorial repeated measures
+    layout never has to be formed to compute U' * SIGMA * U.
+
+    Parameters
+    ----------
+    factors
+        list of 2-D matrices, the Kronecker factors in order
+    """
+
+    def __init__(self, factors):
+        if len(factors) == 0:
+            raise GlimmpseValidationException("A Kronecker operator needs at least one factor")
+        self.factors = [as_array(f) for f in factors]
+
+    @property
+    def factor_shapes(self):
+        """list of the (rows, columns) of each factor"""
+        return [f.shape for f in self.factors]
+
+    @property
+    def shape(self):
+        """(rows, columns) of the materialized product"""
+        return (int(np.prod([s[0] for s in self.factor_shapes])),
+                int(np.prod([s[1] for s in self.factor_shapes])))
+
+    @property
+    def T(self):
+        """The transpose, which is the Kronecker product of the transposed factors"""
+        return KroneckerOperator([f.T for f in self.factors])
+
+    def materialize(self) -> np.ndarray:
+        """Build the dense Kronecker product."""
+        return reduce((lambda x, y: np.kron(x, y)), self.factors)
+
+    def sandwich(self, sigma):
+        """
+        Calculate U' * SIGMA * U where U is this operator.
+
+        If SIGMA is itself a :class:`KroneckerOperator` with factors conformable
+        to the factors of U, the result is the Kronecker operator of the
+        factor-wise products U_i' * SIGMA_i * U_i and nothing is materialized.
+        Otherwise SIGMA is treated as a dense matrix and U is applied to it one
+        factor at a time.
+
+        Parameters
+        ----------
+        sigma
+            covariance matrix, dense or a :class:`KroneckerOperator`
+
+        Returns
+        -------
+        sigma_star
+            U' * SIGMA * U, a :class:`KroneckerOperator` if SIGMA is separable, otherwise a 2-D ndarray
+        """
+        if isinstance(sigma, KroneckerOperator):
+            if [s[0] for s in sigma.factor_shapes] != [s[0] for s in self.factor_shapes] \
+                    or [s[1] for s in sigma.factor_shapes] != [s[0] for s in self.factor_shapes]:
+                raise GlimmpseValidationException("Kronecker factors of SIGMA are not conformable with U")
+            return KroneckerOperator([u.T @ s @ u for u, s in zip(self.factors, sigma.factors)])
+
+        sigma = np.asarray(sigma)
+        n_rows, n_cols = self.shape
+        if sigma.shape != (n_rows, n_rows):
+            raise GlimmpseValidationException("SIGMA must be square with as many rows as U")
+        rows = [s[0] for s in self.factor_shapes]
+        k = len(self.factors)
+        tensor = sigma.reshape(rows + rows)
+        for i, factor in enumerate(self.factors):
+            tensor = np.moveaxis(np.tensordot(factor.T, tensor, axes=([1], [i])), 0, i)
+            tensor = np.moveaxis(np.tensordot(tensor, factor, axes=([k + i], [0])), -1, k + i)
+        return tensor.reshape(n_cols, n_cols)
+
+    def dot(self, x) -> np.ndarray:
+        """
+        Calculate U * X without materializing U.
+
+        Parameters
+        ----------
+        x
+            matrix with as many rows as U has columns
+
+        Returns
+        -------
+        U * X as a 2-D ndarray
+        """
+        x = np.asarray(x)
+        n_rows, n_cols = self.shape
+        if x.ndim == 1:
+            x = x.reshape(-1, 1)
+        if x.shape[0] != n_cols:
+            raise GlimmpseValidationException("X must have as many rows as U has columns")
+        n_x = x.shape[1]
+        tensor = x.reshape([s[1] for s in self.factor_shapes] + [n_x])
+        for i, factor in enumerate(self.factors):
+            tensor = np.moveaxis(np.tensordot(factor, tensor, axes=([1], [i])), 0, i)
+        return tensor.reshape(n_rows, n_x)
+
+    def __matmul__(self, other):
+        return self.dot(other)
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.materialize(), dtype=dtype)
+
+    def __repr__(self):
+        return 'KroneckerOperator(shape={}, factor_shapes={})'.format(self.shape, self.factor_shapes)
@@ -1,11 +1,13 @@
-import warnings
 import numpy as np
-from scipy import special
-from scipy.stats import chi2
 
+from pyglimmpse import diagnostics, instrumentation
+from pyglimmpse._lazy import lazy_import
 from pyglimmpse.constants import Constants
-from pyglimmpse.finv import finv
-from pyglimmpse.probf import probf
+from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException
+from pyglimmpse.finv import finv, finv_array, _chi2_ppf
+from pyglimmpse.probf import probf, probf_array
+
+special = lazy_import('scipy.special')
 
 
 def subtrtact_target_power(a, b):
@@ -27,6 +29,8 @@ class Power:
         the power value chosen as the lower bound for this power calculation. This is itself a Power object
     upper_bound
         the power value chosen as the upper bound for this power calculation. This is itself a Power object
+    diagnostics
+        tuple of the Constants.WARN_* codes recorded while calculating this power, see :mod:`pyglimmpse.diagnostics`
 
 
     Methods
@@ -58,9 +62,34 @@ class Power:
         self.power = power
         self.noncentrality_parameter = noncentrality_parameter
         self.fmethod = fmethod
-        self.lower_bound = None
-        self.upper_bound = None
+        self._lower_bound = None
+        self._upper_bound = None
+        self._confidence_limit_args = None
+        self._confidence_limits_pending = False
         self.error_message = error_message
+        self.diagnostics = ()
+
+    @property
+    def lower_bound(self):
+        """the lower confidence limit on power, calculated the first time it is read"""
+        self._evaluate_confidence_limits()
+        return self._lower_bound
+
+    @lower_bound.setter
+    def lower_bound(self, value):
+        self._evaluate_confidence_limits()
+        self._lower_bound = value
+
+    @property
+    def upper_bound(self):
+        """the upper confidence limit on power, calculated the first time it is read"""
+        self._evaluate_confidence_limits()
+        return self._upper_bound
+
+    @upper_bound.setter
+    def upper_bound(self, value):
+        self._evaluate_confidence_limits()
+        self._upper_bound = value
 
     def glmmpcl(self,
                 is_multirep,
@@ -121,54 +150,117 @@ class Power:
         :param omega:
             noncentrality parameter
 
+        The bounds are not calculated here but the first time lower_bound or upper_bound is read.
         """
         df1_unirep = None
         if 'df1_unirep' in kwargs.keys():
             df1_unirep = kwargs['df1_unirep']
+        self._confidence_limit_args = None
+        self._confidence_limits_pending = False
+        self._lower_bound = None
+        self._upper_bound = None
         if cl_type == Constants.CLTYPE_DESIRED_KNOWN or cl_type == Constants.CLTYPE_DESIRED_ESTIMATE:
             if np.isnan(self.power):
-                warnings.warn('Powerwarn16: Confidence limits are missing because power is missing.')
+                self._diagnose(Constants.WARN_CL_MISSING)
             else:
-                dfe1 = n_est - rank_est
-                self.lower_bound = self._calc_lower_bound(is_multirep=is_multirep,
-                                                          alphatest=alphatest,
-                                                          alpha_cl=alpha_cl,
-                                                          cl_type=cl_type,
-                                                          dfe1=dfe1,
-                                                          dfe2=dfe2,
-                                                          dfh=dfh,
-                                                          fcrit=fcrit,
-                                                          omega=omega,
-                                                          tolerance=tolerance,
-                                                          df1_unirep=df1_unirep)
-                self.upper_bound = self._calc_upper_bound(is_multirep=is_multirep,
-                                                          alphatest=alphatest,
-                                                          alpha_cu=alpha_cu,
-                                                          cl_type=cl_type,
-                                                          dfe1=dfe1,
-                                                          dfe2=dfe2,
-                                                          dfh=dfh,
-                                                          fcrit=fcrit,
-                                                          noncen_e=omega,
-                                                          tolerance=tolerance,
-                                                          df1_unirep=df1_unirep)
-                self._warn_conservative_ci(alpha_cl, cl_type, n2, n_est)
-        else:
-            self.lower_bound = None
-            self.upper_bound = None
+                self._confidence_limit_args = dict(is_multirep=is_multirep,
+                                                   alphatest=alphatest,
+                                                   alpha_cl=alpha_cl,
+                                                   alpha_cu=alpha_cu,
+                                                   cl_type=cl_type,
+                                                   dfe1=n_est - rank_est,
+                                                   rank_est=rank_est,
+                                                   dfe2=dfe2,
+                                                   dfh=dfh,
+                                                   fcrit=fcrit,
+                                                   omega=omega,
+                                                   tolerance=tolerance,
+                                                   df1_unirep=df1_unirep,
+                                                   n2=n2,
+                                                   n_est=n_est)
+                self._confidence_limits_pending = True
+
+    def _evaluate_confidence_limits(self):
+        """Calculate the bounds requested by glmmpcl, if they have not been calculated yet"""
+        if not self._confidence_limits_pending:
+            return
+        args = self._confidence_limit_args
+        self._confidence_limits_pending = False
+        self._lower_bound = self._calc_lower_bound(is_multirep=args['is_multirep'],
+                                                   alphatest=args['alphatest'],
+                                                   alpha_cl=args['alpha_cl'],
+                                                   cl_type=args['cl_type'],
+                                                   dfe1=args['dfe1'],
+                                                   dfe2=args['dfe2'],
+                                                   dfh=args['dfh'],
+                                                   fcrit=args['fcrit'],
+                                                   omega=args['omega'],
+                                                   tolerance=args['tolerance'],
+                                                   df1_unirep=args['df1_unirep'])
+        self._upper_bound = self._calc_upper_bound(is_multirep=args['is_multirep'],
+                                                   alphatest=args['alphatest'],
+                                                   alpha_cu=args['alpha_cu'],
+                                                   cl_type=args['cl_type'],
+                                                   dfe1=args['dfe1'],
+                                                   dfe2=args['dfe2'],
+                                                   dfh=args['dfh'],
+                                                   fcrit=args['fcrit'],
+                                                   noncen_e=args['omega'],
+                                                   tolerance=args['tolerance'],
+                                                   df1_unirep=args['df1_unirep'])
+        self._warn_conservative_ci(args['alpha_cl'], args['cl_type'], args['n2'], args['n_est'])
+
+    def confidence_limit_sweep(self, n_est) -> 'ConfidenceLimits':
+        """
+        Confidence limits on this power for each of several sizes of the study which yielded the
+        SIGMA estimate, for choosing the size of that study.
+
+        The noncentrality, critical value and degrees of freedom of the target test are those of
+        this power, and only the error degrees of freedom of the estimate, dfe1 = n_est - rank_est,
+        change. For unirep tests the confidence limit degrees of freedom are proportional to dfe1
+        and are scaled from the value for the n_est given to :meth:`glmmpcl`, keeping the
+        epsilon multipliers at their values for that n_est.
+
+        :param n_est: list of # of observations in the analysis which yields the SIGMA estimate
+        :return: :class:`ConfidenceLimits` with one element for each element of n_est
+        """
+        if self._confidence_limit_args is None:
+            raise GlimmpseValidationException('Confidence limits were not requested for this power.')
+        args = self._confidence_limit_args
+        n_est = np.asarray(n_est, dtype=float)
+        dfe1 = n_est - args['rank_est']
+        if np.any(dfe1 <= 0):
+            raise GlimmpseValidationException('N_EST must be greater than RANK_EST.')
+        dfh = args['dfh']
+        if not args['is_multirep']:
+            dfh = dfh * dfe1 / args['dfe1']
+        return confidence_limits(is_multirep=args['is_multirep'],
+                                 alphatest=args['alphatest'],
+                                 dfh=dfh,
+                                 dfe2=args['dfe2'],
+                                 cl_type=args['cl_type'],
+                                 n_est=n_est,
+                                 rank_est=args['rank_est'],
+                                 alpha_cl=args['alpha_cl'],
+                                 alpha_cu=args['alpha_cu'],
+                                 fcrit=args['fcrit'],
+                                 omega=args['omega'],
+                                 tolerance=args['tolerance'],
+                                 df1_unirep=args['df1_unirep'])
 
-    @staticmethod
-    def subtrtact_target_power(a, b):
-        return a.power - b
+    def _diagnose(self, code):
+        """record the diagnostic code on this power"""
+        self.diagnostics = diagnostics.merge(self.diagnostics, [code])
+        diagnostics.record(code)
 
     def _warn_conservative_ci(self, alpha_cl, cl_type, n2, n_est):
         """warning for conservative confidence interval"""
         if (cl_type == Constants.CLTYPE_DESIRED_KNOWN or
                     cl_type == Constants.CLTYPE_DESIRED_ESTIMATE) and n2 != n_est:
             if self.lower_bound and self.lower_bound.noncentrality_parameter and alpha_cl > 0 and self.lower_bound.noncentrality_parameter == 0:
-                warnings.warn('The lower confidence limit on power is conservative.')
+                self._diagnose(Constants.WARN_LOWER_CL_CONSERVATIVE)
             if self.upper_bound and self.upper_bound.noncentrality_parameter and alpha_cl == 0 and self.upper_bound.noncentrality_parameter == 0:
-                warnings.warn('The upper confidence limit on power is conservative.')
+                self._diagnose(Constants.WARN_UPPER_CL_CONSERVATIVE)
 
     def _calc_upper_bound(self, is_multirep, alphatest, alpha_cu, cl_type, dfe1, dfe2, dfh, fcrit, noncen_e, tolerance, **kwargs):
         """Calculate upper bound for noncentrality"""
@@ -224,6 +316,7 @@ class Power:
                                  df1_unirep=df1_unirep)
         return power
 
+    @instrumentation.timed('confidence_bound')
     def _calc_bound(self, is_multirep, alphatest, alpha, lower_tail_prob, upper_tail_prob, prob, noncentrality, cl_type, dfe1, dfe2, dfh, fcrit, omega, tolerance, **kwargs):
         """Calculate power bounds """
         df1_unirep = None
@@ -233,10 +326,10 @@ class Power:
         if alpha > tolerance:
             if cl_type == Constants.CLTYPE_DESIRED_KNOWN:
                 if is_multirep:
-                    chi = chi2.ppf(lower_tail_prob, dfe1)
+                    chi = _chi2_ppf(lower_tail_prob, dfe1)
                     noncentrality = (chi / dfe1) * omega
                 else:
-                    chi = chi2.ppf(lower_tail_prob, dfh)
+                    chi = _chi2_ppf(lower_tail_prob, dfh)
                     noncentrality = (chi / dfh) * omega
             elif cl_type == Constants.CLTYPE_DESIRED_ESTIMATE:
                 f_a = omega / dfh
@@ -258,4 +351,139 @@ class Power:
         power.power = power_bound
         power.fmethod = fmethod
         power.noncentrality_parameter = noncentrality
-        return power
\ No newline at end of file
+        return power
+
+
+class ConfidenceLimits:
+    """
+    Confidence limits on power and noncentrality for arrays of power calculations, as returned by
+    :func:`confidence_limits`. Each attribute is an array with the broadcast shape of the inputs.
+
+    Parameters
+    ----------
+    lower_power
+        lower confidence limits on power
+    lower_noncentrality
+        lower confidence limits on noncentrality
+    lower_fmethod
+        Method used to calculate probability from F CDF for each lower limit
+    upper_power
+        upper confidence limits on power
+    upper_noncentrality
+        upper confidence limits on noncentrality
+    upper_fmethod
+        Method used to calculate probability from F CDF for each upper limit
+    """
+    def __init__(self, lower_power, lower_noncentrality, lower_fmethod, upper_power, upper_noncentrality, upper_fmethod):
+        self.lower_power = lower_power
+        self.lower_noncentrality = lower_noncentrality
+        self.lower_fmethod = lower_fmethod
+        self.upper_power = upper_power
+        self.upper_noncentrality = upper_noncentrality
+        self.upper_fmethod = upper_fmethod
+
+    @property
+    def width(self):
+        """upper_power - lower_power"""
+        return self.upper_power - self.lower_power
+
+
+@instrumentation.timed('confidence_limits')
+def confidence_limits(is_multirep,
+                      alphatest,
+                      dfh,
+                      dfe2,
+                      cl_type,
+                      n_est,
+                      rank_est,
+                      alpha_cl,
+                      alpha_cu,
+                      fcrit,
+                      omega,
+                      tolerance=1e-12,
+                      df1_unirep=None) -> ConfidenceLimits:
+    """
+    Vectorized confidence limits on power, as calculated one at a time by :meth:`Power.glmmpcl`.
+    Every numeric argument may be an array, and the arguments are broadcast against each other,
+    so the limits for a whole power curve are found in one pass.
+
+    :param is_multirep: True for multirep tests, False for unirep tests
+    :param alphatest: Significance level for target GLUM test
+    :param dfh: degrees of freedom for target GLH
+    :param dfe2: Error df for target hypothesis
+    :param cl_type: Constants.CLTYPE_DESIRED_KNOWN or Constants.CLTYPE_DESIRED_ESTIMATE
+    :param n_est: # of observations in analysis which yielded BETA and SIGMA estimates
+    :param rank_est: design matrix rank in analysis which yielded BETA and SIGMA estimates
+    :param alpha_cl: Lower tail probability for confidence interval
+    :param alpha_cu: Upper tail probability for confidence interval
+    :param fcrit: critical values for prob F.
+    :param omega: noncentrality parameters
+    :param tolerance: value below which numbers are declared zero
+    :param df1_unirep: hypothesis degrees of freedom of the unirep test, required if is_multirep is False
+    :return: :class:`ConfidenceLimits`
+    """
+    if cl_type != Constants.CLTYPE_DESIRED_KNOWN and cl_type != Constants.CLTYPE_DESIRED_ESTIMATE:
+        raise GlimmpseValidationException('Confidence limits can only be calculated when they are desired.')
+    if not is_multirep and df1_unirep is None:
+        raise GlimmpseValidationException('df1_unirep is required for the confidence limits of a unirep test.')
+    df1_power = dfh if is_multirep else df1_unirep
+    arrays = np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in
+                                   (alphatest, dfh, dfe2, n_est, rank_est, alpha_cl, alpha_cu, fcrit, omega, df1_power)])
+    alphatest, dfh, dfe2, n_est, rank_est, alpha_cl, alpha_cu, fcrit, omega, df1_power = arrays
+    dfe1 = n_est - rank_est
+
+    lower_power, lower_noncentrality, lower_fmethod = _bound_arrays(is_multirep=is_multirep,
+                                                                    alphatest=alphatest,
+                                                                    alpha=alpha_cl,
+                                                                    lower_tail_prob=alpha_cl,
+                                                                    upper_tail_prob=1 - alpha_cl,
+                                                                    prob=1 - alphatest,
+                                                                    noncentrality=0.0,
+                                                                    cl_type=cl_type,
+                                                                    dfe1=dfe1,
+                                                                    dfe2=dfe2,
+                                                                    dfh=dfh,
+                                                                    df1_power=df1_power,
+                                                                    fcrit=fcrit,
+                                                                    omega=omega,
+                                                                    tolerance=tolerance)
+    upper_power, upper_noncentrality, upper_fmethod = _bound_arrays(is_multirep=is_multirep,
+                                                                    alphatest=alphatest,
+                                                                    alpha=alpha_cu,
+                                                                    lower_tail_prob=1 - alpha_cu,
+                                                                    upper_tail_prob=alpha_cu,
+                                                                    prob=0.0,
+                                                                    noncentrality=float('Inf'),
+                                                                    cl_type=cl_type,
+                                                                    dfe1=dfe1,
+                                                                    dfe2=dfe2,
+                                                                    dfh=dfh,
+                                                                    df1_power=df1_power,
+                                                                    fcrit=fcrit,
+                                                                    omega=omega,
+                                                                    tolerance=tolerance)
+    return ConfidenceLimits(lower_power, lower_noncentrality, lower_fmethod,
+                            upper_power, upper_noncentrality, upper_fmethod)
+
+
+def _bound_arrays(is_multirep, alphatest, alpha, lower_tail_prob, upper_tail_prob, prob, noncentrality, cl_type,
+                  dfe1, dfe2, dfh, df1_power, fcrit, omega, tolerance):
+    """Vectorized :meth:`Power._calc_bound`. prob and noncentrality are the values used where alpha <= tolerance"""
+    active = alpha > tolerance
+    noncentrality = np.where(active, np.nan, noncentrality)
+    prob = np.where(active, np.nan, prob)
+    fmethod = np.full(alpha.shape, Constants.FMETHOD_MISSING, dtype=object)
+
+    if cl_type == Constants.CLTYPE_DESIRED_KNOWN:
+        df = dfe1 if is_multirep else dfh
+        noncentrality[active] = _chi2_ppf(lower_tail_prob[active], df[active]) / df[active] * omega[active]
+    else:
+        f_a = omega / dfh
+        bound = finv_array(upper_tail_prob, dfh, dfe1)
+        above = active & (f_a > bound)
+        noncentrality[active & ~above] = 0
+        noncentrality[above] = special.ncfdtrinc(dfh[above], dfe1[above], upper_tail_prob[above], f_a[above])
+
+    prob[active], fmethod[active] = probf_array(fcrit[active], df1_power[active], dfe2[active], noncentrality[active])
+    power = np.where((fmethod == Constants.FMETHOD_NORMAL_LR) & (prob == 1), alphatest, 1 - prob)
+    return power, noncentrality, fmethod
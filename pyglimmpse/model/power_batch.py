@@ -0,0 +1,229 @@
+import numpy as np
+
+from pyglimmpse.constants import Constants
+from pyglimmpse.model.power import Power
+
+# fmethod is stored as its position in Constants, -1 for anything else, e.g. the "DEFAULT" of Power()
+_FMETHODS = list(Constants)
+_FMETHOD_CODES = {member: code for code, member in enumerate(_FMETHODS)}
+# lookup from code to fmethod, with None last so that code -1 gives None
+_FMETHOD_LOOKUP = np.array(_FMETHODS + [None], dtype=object)
+
+# diagnostics are stored as a bit mask, bit i set if _WARNINGS[i] was recorded
+_WARNINGS = [member for member in Constants if member.name.startswith('WARN_')]
+_WARNING_BITS = {member: 1 << bit for bit, member in enumerate(_WARNINGS)}
+
+POWER_DTYPE = np.dtype([('power', np.float64),
+                        ('noncentrality_parameter', np.float64),
+                        ('lower_power', np.float64),
+                        ('lower_noncentrality', np.float64),
+                        ('upper_power', np.float64),
+                        ('upper_noncentrality', np.float64),
+                        ('fmethod', np.int16),
+                        ('lower_fmethod', np.int16),
+                        ('upper_fmethod', np.int16),
+                        ('diagnostics', np.uint16)])
+
+
+class PowerBatch:
+    """
+    Many power calculations, stored as one structured array rather than a :class:`Power` object each.
+
+    Each element is a row of :attr:`data`, with dtype :data:`POWER_DTYPE`: power and noncentrality, the
+    confidence limits on them, NaN where the limits were not calculated, the fmethod of each as a code,
+    and a bit mask of the diagnostic codes. Indexing with an integer gives a :class:`Power` built from
+    its row, with the bounds as Power objects as usual, while slices and index arrays give a PowerBatch
+    of those rows. The columns are read without copying from the attributes below, or exported to
+    pandas or Arrow with :meth:`to_pandas` and :meth:`to_arrow`.
+
+    Parameters
+    ----------
+    data
+        1-D structured array with dtype POWER_DTYPE
+
+    Attributes
+    ----------
+    power
+        array of power values
+    noncentrality_parameter
+        array of noncentrality parameters
+    fmethod
+        object array of the Constants used to calculate each power, None where there was none
+    lower_power, lower_noncentrality, lower_fmethod
+        the lower confidence limits, as arrays
+    upper_power, upper_noncentrality, upper_fmethod
+        the upper confidence limits, as arrays
+    """
+    def __init__(self, data):
+        self.data = data
+
+    @classmethod
+    def empty(cls, size: int) -> 'PowerBatch':
+        """ a batch of size missing powers"""
+        data = np.zeros(size, dtype=POWER_DTYPE)
+        for name in ('power', 'noncentrality_parameter', 'lower_power', 'lower_noncentrality', 'upper_power',
+                     'upper_noncentrality'):
+            data[name] = np.nan
+        for name in ('fmethod', 'lower_fmethod', 'upper_fmethod'):
+            data[name] = -1
+        return cls(data)
+
+    @classmethod
+    def from_arrays(cls, power, noncentrality_parameter, fmethod, limits=None) -> 'PowerBatch':
+        """
+        :param power: array of power
+        :param noncentrality_parameter: array of noncentrality parameters
+        :param fmethod: a Constants member, or array of them, for every power
+        :param limits: optional :class:`pyglimmpse.model.power.ConfidenceLimits` on these powers
+        """
+        power = np.ravel(power)
+        batch = cls.empty(power.size)
+        batch.data['power'] = power
+        batch.data['noncentrality_parameter'] = np.ravel(noncentrality_parameter)
+        batch.data['fmethod'] = fmethod_codes(fmethod)
+        if limits is not None:
+            batch.data['lower_power'] = np.ravel(limits.lower_power)
+            batch.data['lower_noncentrality'] = np.ravel(limits.lower_noncentrality)
+            batch.data['lower_fmethod'] = fmethod_codes(limits.lower_fmethod)
+            batch.data['upper_power'] = np.ravel(limits.upper_power)
+            batch.data['upper_noncentrality'] = np.ravel(limits.upper_noncentrality)
+            batch.data['upper_fmethod'] = fmethod_codes(limits.upper_fmethod)
+        return batch
+
+    @classmethod
+    def from_powers(cls, powers) -> 'PowerBatch':
+        """ a batch of the :class:`Power` objects in powers. Their error_message is not kept"""
+        batch = cls.empty(len(powers))
+        for row, power in zip(batch.data, powers):
+            row['power'] = power.power
+            row['noncentrality_parameter'] = power.noncentrality_parameter
+            row['fmethod'] = _FMETHOD_CODES.get(power.fmethod, -1)
+            # reading the bounds may record diagnostics, so they are stored first
+            for prefix, bound in (('lower_', power.lower_bound), ('upper_', power.upper_bound)):
+                if bound is not None:
+                    row[prefix + 'power'] = bound.power
+                    row[prefix + 'noncentrality'] = bound.noncentrality_parameter
+                    row[prefix + 'fmethod'] = _FMETHOD_CODES.get(bound.fmethod, -1)
+            row['diagnostics'] = _diagnostic_mask(power.diagnostics)
+        return batch
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self.data)))
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self._power(self.data[index])
+        return PowerBatch(np.atleast_1d(self.data[index]))
+
+    def __repr__(self):
+        return 'PowerBatch({0} powers)'.format(len(self.data))
+
+    def _power(self, row):
+        """ the Power for one row of data"""
+        power = Power(float(row['power']), float(row['noncentrality_parameter']), _FMETHOD_LOOKUP[row['fmethod']])
+        for prefix in ('lower_', 'upper_'):
+            if row[prefix + 'fmethod'] >= 0:
+                bound = Power(float(row[prefix + 'power']), float(row[prefix + 'noncentrality']),
+                              _FMETHOD_LOOKUP[row[prefix + 'fmethod']])
+                setattr(power, '_' + prefix + 'bound', bound)
+        power.diagnostics = diagnostic_codes(row['diagnostics'])
+        return power
+
+    @property
+    def power(self):
+        return self.data['power']
+
+    @property
+    def noncentrality_parameter(self):
+        return self.data['noncentrality_parameter']
+
+    @property
+    def fmethod(self):
+        return _FMETHOD_LOOKUP[self.data['fmethod']]
+
+    @property
+    def lower_power(self):
+        return self.data['lower_power']
+
+    @property
+    def lower_noncentrality(self):
+        return self.data['lower_noncentrality']
+
+    @property
+    def lower_fmethod(self):
+        return _FMETHOD_LOOKUP[self.data['lower_fmethod']]
+
+    @property
+    def upper_power(self):
+        return self.data['upper_power']
+
+    @property
+    def upper_noncentrality(self):
+        return self.data['upper_noncentrality']
+
+    @property
+    def upper_fmethod(self):
+        return _FMETHOD_LOOKUP[self.data['upper_fmethod']]
+
+    def has_diagnostic(self, code) -> np.ndarray:
+        """ boolean array, True for the powers which recorded the diagnostic code, a Constants.WARN_* member"""
+        return (self.data['diagnostics'] & _WARNING_BITS[code]) != 0
+
+    def add_diagnostics(self, codes):
+        """ add the diagnostic codes to every power, as :func:`pyglimmpse.diagnostics.attach` does for a list"""
+        self.data['diagnostics'] |= _diagnostic_mask(codes)
+
+    def to_pandas(self):
+        """
+        pandas.DataFrame with a column for each field of :attr:`data`. The numeric columns are views of
+        data, not copies. The fmethod columns are categoricals of the Constants values, sharing the codes,
+        and diagnostics is the bit mask, decoded by :meth:`has_diagnostic` or :func:`diagnostic_codes`.
+        """
+        import pandas as pd
+        columns = {}
+        for name in POWER_DTYPE.names:
+            if name.endswith('fmethod'):
+                columns[name] = pd.Categorical.from_codes(self.data[name], categories=[c.value for c in _FMETHODS])
+            else:
+                columns[name] = self.data[name]
+        return pd.DataFrame(columns, copy=False)
+
+    def to_arrow(self):
+        """
+        pyarrow.Table with the columns of :meth:`to_pandas`, the fmethods as dictionary arrays.
+        Arrow columns are contiguous and the fields of a structured array are not, so each column
+        is copied once.
+        """
+        import pyarrow as pa
+        dictionary = pa.array([c.value for c in _FMETHODS])
+        columns = {}
+        for name in POWER_DTYPE.names:
+            column = np.ascontiguousarray(self.data[name])
+            if name.endswith('fmethod'):
+                columns[name] = pa.DictionaryArray.from_arrays(pa.array(column, mask=column < 0), dictionary)
+            else:
+                columns[name] = pa.array(column)
+        return pa.table(columns)
+
+
+def fmethod_codes(fmethod):
+    """ the codes stored in :attr:`PowerBatch.data` for a Constants member or an array of them"""
+    if isinstance(fmethod, Constants):
+        return _FMETHOD_CODES[fmethod]
+    return np.array([_FMETHOD_CODES.get(f, -1) for f in np.ravel(fmethod)], dtype=np.int16)
+
+
+def diagnostic_codes(mask) -> tuple:
+    """ the tuple of Constants.WARN_* codes in a diagnostics bit mask of :attr:`PowerBatch.data`"""
+    mask = int(mask)
+    return tuple(code for code in _WARNINGS if mask & _WARNING_BITS[code])
+
+
+def _diagnostic_mask(codes):
+    mask = 0
+    for code in codes:
+        mask |= _WARNING_BITS[code]
+    return mask
@@ -1,14 +1,18 @@
-import warnings
-
 import numpy as np
-from scipy import linalg
 
+from pyglimmpse import diagnostics, instrumentation
+from pyglimmpse._arrays import as_array
+from pyglimmpse._lazy import lazy_import
 from pyglimmpse.constants import Constants
-from pyglimmpse.finv import finv
+from pyglimmpse.finv import finv, finv_array
 from pyglimmpse.model.power import Power
-from pyglimmpse.probf import probf
+from pyglimmpse.probf import probf, probf_array
+
+# not special, which is the name of a test below
+scipy_special = lazy_import('scipy.special')
 
 
+@diagnostics.attach
 def hlt_one_moment_null_approximator(rank_C: float,
                                      rank_X: float,
                                      relative_group_sizes,
@@ -62,10 +66,11 @@ def hlt_one_moment_null_approximator(rank_C: float,
     eval_HINVE = _calc_eval(min_rank_C_U, error_sum_square, hypothesis_sum_square)
     if _valid_df2_eigenvalues(eval_HINVE, df2, tolerance):
         omega = _calc_hlt_omega(min_rank_C_U, eval_HINVE, rank_X, total_N, df2)
-        return _multi_power(alpha, df1, df2, omega, total_N)
+        return _multi_power(alpha, df1, df2, omega, total_N, **kwargs)
     return _undefined_power()
 
 
+@diagnostics.attach
 def hlt_two_moment_null_approximator(rank_C: float,
                                      rank_X: float,
                                      relative_group_sizes,
@@ -119,11 +124,12 @@ def hlt_two_moment_null_approximator(rank_C: float,
     eval_HINVE = _calc_eval(min_rank_C_U, error_sum_square, hypothesis_sum_square)
     if _valid_df2_eigenvalues(eval_HINVE, df2, tolerance):
         omega = _calc_hlt_omega(min_rank_C_U, eval_HINVE, rank_X, total_N, df2)
-        return _multi_power(alpha, df1, df2, omega, total_N)
+        return _multi_power(alpha, df1, df2, omega, total_N, **kwargs)
     else:
         return _undefined_power()
 
 
+@diagnostics.attach
 def hlt_one_moment_null_approximator_obrien_shieh(rank_C: float,
                                                   rank_X: float,
                                                   relative_group_sizes,
@@ -179,11 +185,12 @@ def hlt_one_moment_null_approximator_obrien_shieh(rank_C: float,
     # df2 need to > 0 and eigenvalues not missing
     if _valid_df2_eigenvalues(eval_HINVE, df2, tolerance):
         omega = _calc_omega(min_rank_C_U, eval_HINVE, rank_X, total_N)
-        return _multi_power(alpha, df1, df2, omega, total_N)
+        return _multi_power(alpha, df1, df2, omega, total_N, **kwargs)
     else:
         return _undefined_power()
 
 
+@diagnostics.attach
 def hlt_two_moment_null_approximator_obrien_shieh(rank_C: float,
                                                   rank_X: float,
                                                   relative_group_sizes,
@@ -244,6 +251,7 @@ def hlt_two_moment_null_approximator_obrien_shieh(rank_C: float,
         return _undefined_power()
 
 
+@diagnostics.attach
 def pbt_one_moment_null_approx(rank_C: float,
                                rank_X: float,
                                relative_group_sizes,
@@ -296,18 +304,18 @@ def pbt_one_moment_null_approx(rank_C: float,
         evalt = _pbt_uncorrected_evalt(eval_HINVE, rank_C, rank_U, rank_X, total_N)
         v = _pbt_population_value(evalt, min_rank_C_U)
         if (min_rank_C_U - v) <= tolerance:
-            warnings.warn('Power is missing because because the min_rank_C_U - v  <= 0.')
+            diagnostics.record(Constants.WARN_PBT_UNDEFINED)
         else:
             if min(rank_U, rank_C) == 1:
                 omega = total_N * min_rank_C_U * v / (min_rank_C_U - v)
             else:
                 omega = df2 * v / (min_rank_C_U - v)
-            power = _multi_power(alpha, df1, df2, omega, total_N)
+            power = _multi_power(alpha, df1, df2, omega, total_N, **kwargs)
             return power
-    else:
-        return _undefined_power()
+    return _undefined_power()
 
 
+@diagnostics.attach
 def pbt_two_moment_null_approx(rank_C: float,
                                rank_X: float,
                                relative_group_sizes,
@@ -359,19 +367,20 @@ def pbt_two_moment_null_approx(rank_C: float,
         evalt = _pbt_uncorrected_evalt(eval_HINVE, rank_C, rank_U, rank_X, total_N)
         v = _pbt_population_value(evalt, min_rank_C_U)
         if (min_rank_C_U - v) <= tolerance:
-            warnings.warn('Power is missing because because the min_rank_C_U - v  <= 0.')
+            diagnostics.record(Constants.WARN_PBT_UNDEFINED)
         else:
             if min(rank_U, rank_C) == 1:
                 omega = total_N * min_rank_C_U * v / (min_rank_C_U - v)
             else:
                 omega = df2 * v / (min_rank_C_U - v)
 
-            power = _multi_power(alpha, df1, df2, omega, total_N)
+            power = _multi_power(alpha, df1, df2, omega, total_N, **kwargs)
             return power
 
     return _undefined_power()
 
 
+@diagnostics.attach
 def pbt_one_moment_null_approx_obrien_shieh(rank_C: float,
                                             rank_X: float,
                                             relative_group_sizes,
@@ -425,14 +434,15 @@ def pbt_one_moment_null_approx_obrien_shieh(rank_C: float,
         v = _pbt_population_value(evalt, min_rank_C_U)
 
         if (min_rank_C_U - v) <= tolerance:
-            warnings.warn('Power is missing because because the min_rank_C_U - v  <= 0.')
+            diagnostics.record(Constants.WARN_PBT_UNDEFINED)
         else:
             omega = total_N * min_rank_C_U * v / (min_rank_C_U - v)
-            power = _multi_power(alpha, df1, df2, omega, total_N)
+            power = _multi_power(alpha, df1, df2, omega, total_N, **kwargs)
             return power
     return _undefined_power()
 
 
+@diagnostics.attach
 def pbt_two_moment_null_approx_obrien_shieh(rank_C: float,
                                             rank_X: float,
                                             relative_group_sizes,
@@ -484,19 +494,18 @@ def pbt_two_moment_null_approx_obrien_shieh(rank_C: float,
         evalt = _trace(eval_HINVE, rank_X, total_N)
         v = _pbt_population_value(evalt, min_rank_C_U)
         if (min_rank_C_U - v) <= tolerance:
-            warning_message_min_rank_C_U = 'Power is missing because because the min_rank_C_U - v  <= 0.'
-            warnings.warn(warning_message_min_rank_C_U)
-            return _undefined_power(warning_message_min_rank_C_U)
+            diagnostics.record(Constants.WARN_PBT_UNDEFINED)
+            return _undefined_power(Constants.WARN_PBT_UNDEFINED.value)
         else:
             omega = total_N * min_rank_C_U * v / (min_rank_C_U - v)
-            power = _multi_power(alpha, df1, df2, omega, total_N)
+            power = _multi_power(alpha, df1, df2, omega, total_N, **kwargs)
             return power
-    warning_message_df2_eval_HINVE = 'Power is missing because df2 or eval_HINVE is not valid.'
-    warnings.warn(warning_message_df2_eval_HINVE)
-    return _undefined_power(warning_message_df2_eval_HINVE)
+    # _valid_df2_eigenvalues has recorded Constants.WARN_NONCENTRALITY_UNDEFINED
+    return _undefined_power('Power is missing because df2 or eval_HINVE is not valid.')
 
 
 
+@diagnostics.attach
 def wlk_two_moment_null_approx(rank_C: float,
                                rank_X: float,
                                relative_group_sizes,
@@ -545,13 +554,13 @@ def wlk_two_moment_null_approx(rank_C: float,
         omega = total_N * rs * (1 - tempw) / tempw
 
     if df2 <= tolerance or np.isnan(w) or np.isnan(omega):
-        warning_message = 'Power is missing because because the noncentrality could not be computed.'
-        warnings.warn(warning_message)
-        return _undefined_power(warning_message)
+        diagnostics.record(Constants.WARN_NONCENTRALITY_UNDEFINED)
+        return _undefined_power(Constants.WARN_NONCENTRALITY_UNDEFINED.value)
     else:
-        return _multi_power(alpha, df1, df2, omega, total_N)
+        return _multi_power(alpha, df1, df2, omega, total_N, **kwargs)
 
 
+@diagnostics.attach
 def wlk_two_moment_null_approx_obrien_shieh(rank_C: float,
                                             rank_X: float,
                                             relative_group_sizes,
@@ -627,12 +636,13 @@ def wlk_two_moment_null_approx_obrien_shieh(rank_C: float,
         omega = (total_N * rs) * (1 - tempw) / tempw
 
     if df2 <= tolerance or np.isnan(w) or np.isnan(omega):
-        warnings.warn('Power is missing because because the noncentrality could not be computed.')
+        diagnostics.record(Constants.WARN_NONCENTRALITY_UNDEFINED)
     else:
-        return _multi_power(alpha, df1, df2, omega, total_N)
+        return _multi_power(alpha, df1, df2, omega, total_N, **kwargs)
     return _undefined_power()
 
 
+@diagnostics.attach
 def special(rank_C: float,
             rank_X: float,
             relative_group_sizes,
@@ -697,24 +707,18 @@ def _df1_rank_c_u(rank_C: float, rank_U: float) -> float:
     return df1
 
 
+@instrumentation.timed('multi_power')
 def _multi_power(alpha: float,
                  df1: float,
                  df2: float,
                  omega: float,
                  total_N: float,
+                 noncentrality_distribution=None,
+                 quantile=None,
+                 confidence_interval=None,
                  **kwargs) -> Power:
     """ The common part for these four multirep methods computing power"""
-    noncentrality_dist = None
-    quantile = None
-    confidence_interval = None
-    for key, value in kwargs.items():
-        if key == 'noncentrality_distribution':
-            noncentrality_dist = value
-        if key == 'quantile':
-            quantile = value
-        if key == 'confidence_interval':
-            confidence_interval = value
-
+    noncentrality_dist = noncentrality_distribution
     fcrit = finv(1 - alpha, df1, df2)
     if noncentrality_dist and quantile:
         omega = __calc_quantile_omega(noncentrality_dist, quantile)
@@ -802,7 +806,7 @@ def _valid_df2_eigenvalues(eval_HINVE: [], df2=1, tolerance=1e-12) -> bool:
     """check that df2 is positive and thath the eigenvalues have been calculated"""
     # df2 need to be > 0 and eigenvalues not missing
     if df2 <= tolerance or np.isnan(df2) or np.isnan(eval_HINVE[0]):
-        warnings.warn('Power is missing because because the noncentrality could not be computed.')
+        diagnostics.record(Constants.WARN_NONCENTRALITY_UNDEFINED)
         return False
     else:
         return True
@@ -810,14 +814,14 @@ def _valid_df2_eigenvalues(eval_HINVE: [], df2=1, tolerance=1e-12) -> bool:
 
 def _pbt_one_moment_df2(rank_C, rank_U, rank_X, total_N):
     """Calculate df2 for a pbt which is using an approximator which matches one moment"""
-    min_rank_C_U = min(rank_C, rank_U)
+    min_rank_C_U = np.minimum(rank_C, rank_U)
     df2 = min_rank_C_U * (total_N - rank_X + min_rank_C_U - rank_U)
     return df2
 
 
 def _pbt_two_moment_df1_df2(rank_C, rank_U, rank_X, total_N):
     """ calculate the degrees of freedom df1, df2 for a pbt which is using an approximator which matches two moments"""
-    min_rank_C_U = min(rank_C, rank_U)
+    min_rank_C_U = np.minimum(rank_C, rank_U)
     mu1 = rank_C * rank_U / (total_N - rank_X + rank_C)
     factor1 = (total_N - rank_X + rank_C - rank_U) / (total_N - rank_X + rank_C - 1)
     factor2 = (total_N - rank_X) / (total_N - rank_X + rank_C + 2)
@@ -846,11 +850,208 @@ def _pbt_uncorrected_evalt(eval_HINVE, rank_C, rank_U, rank_X, total_N):
     return evalt
 
 
+@instrumentation.timed('multirep_power_array')
+def multirep_power_array(test,
+                         rank_C,
+                         rank_U,
+                         rank_X,
+                         total_N,
+                         rep_N,
+                         alpha,
+                         spectrum,
+                         tolerance=1e-12,
+                         derivative=False):
+    """
+    Vectorized power for one of the multirep tests, for a batch of designs and sample sizes.
+
+    Each design is described by the eigenvalues of INV(SIGMA star) * DELTA, which do not depend on
+    the sample size. The eigenvalues of H*INV(E) are those eigenvalues times rep_N / (total_N - rank_X),
+    so power for every design is found without a Cholesky factorization or SVD.
+
+    Parameters
+    ----------
+    test
+        one of the multirep tests, e.g. :func:`hlt_two_moment_null_approximator`
+    rank_C
+        rank of C matrix, for each design
+    rank_U
+        rank of U matrix, for each design
+    rank_X
+        rank of X matrix, for each design
+    total_N
+        total N, for each design
+    rep_N
+        number of times each row of the essence design matrix is repeated, for each design
+    alpha
+        Significance level for target GLUM test, for each design
+    spectrum
+        2 dimensional array with one row per design of the eigenvalues of INV(SIGMA star) * DELTA
+        in descending order, padded with zeros for designs with smaller rank_U
+    tolerance
+        value below which a number is considered zero. defaults to 1e-12
+    derivative
+        if True, also return the derivative of power with respect to total_N
+
+    Returns
+    -------
+    power, omega, fmethod
+        arrays of power, noncentrality and the Constants.FMETHOD_* used. Power is NaN, and fmethod
+        Constants.FMETHOD_MISSING, where the scalar test would return missing power.
+        If derivative is True, a fourth array dPower/dN is returned.
+    """
+    rank_C, rank_U, rank_X, total_N, rep_N, alpha = [np.atleast_1d(a) for a in np.broadcast_arrays(
+        *[np.asarray(a, dtype=float) for a in (rank_C, rank_U, rank_X, total_N, rep_N, alpha)])]
+    spectrum = np.atleast_2d(np.asarray(spectrum, dtype=float))
+    df1, df2, omega, valid = _multirep_df_omega(test, rank_C, rank_U, rank_X, total_N, rep_N, spectrum, tolerance)
+    power, omega, fmethod = _multi_power_array(alpha, df1, df2, omega, valid)
+    if not derivative:
+        return power, omega, fmethod
+    return power, omega, fmethod, _multi_power_derivative(test, rank_C, rank_U, rank_X, total_N, rep_N, alpha,
+                                                         spectrum, tolerance, df1, df2, omega)
+
+
+def _multirep_df_omega(test, rank_C, rank_U, rank_X, total_N, rep_N, spectrum, tolerance):
+    """ df1, df2, noncentrality and whether power is defined, for each design"""
+    min_rank_C_U = np.minimum(rank_C, rank_U)
+    nu_e = total_N - rank_X
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # the scalar tests can not factor E when nu_e <= 0
+        scale = np.where(nu_e > 0, rep_N / nu_e, np.nan)
+        keep = np.arange(spectrum.shape[1]) < min_rank_C_U[:, None]
+        eval_HINVE = np.where(keep, spectrum * scale[:, None], 0)
+        df1, df2, omega = _MULTIREP_ARRAYS[test](rank_C, rank_U, rank_X, total_N, min_rank_C_U, eval_HINVE, tolerance)
+    df1 = np.broadcast_to(df1, total_N.shape)
+    valid = (df2 > tolerance) & ~np.isnan(eval_HINVE[:, 0]) & ~np.isnan(omega)
+    return df1, df2, omega, valid
+
+
+def _multi_power_derivative(test, rank_C, rank_U, rank_X, total_N, rep_N, alpha, spectrum, tolerance, df1, df2, omega):
+    """
+    dPower/dN, treating total_N and rep_N as continuous.
+
+    Power = 1 - F(fcrit; df1, df2, omega) depends on N through omega, and through df1, df2 and
+    fcrit = finv(1 - alpha, df1, df2). The derivative of the noncentral F CDF with respect to the
+    noncentrality is a difference of noncentral F CDFs (Johnson, Kotz and Balakrishnan, 1995, ch. 30),
+
+        dF(x; df1, df2, omega)/domega = (F(x * df1 / (df1 + 2); df1 + 2, df2, omega) - F(x; df1, df2, omega)) / 2
+
+    The degrees of freedom have no such form, so that part is a central difference in N with omega
+    held fixed. The derivatives of df1, df2 and omega themselves are central differences of their
+    closed forms, which are cheap.
+    """
+    step = 1e-6 * total_N
+    df1_up, df2_up, omega_up, _ = _multirep_df_omega(test, rank_C, rank_U, rank_X, total_N + step,
+                                                     rep_N * (total_N + step) / total_N, spectrum, tolerance)
+    df1_down, df2_down, omega_down, _ = _multirep_df_omega(test, rank_C, rank_U, rank_X, total_N - step,
+                                                           rep_N * (total_N - step) / total_N, spectrum, tolerance)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fcrit = finv_array(1 - alpha, df1, df2)
+        dpower_domega = (scipy_special.ncfdtr(df1, df2, omega, fcrit)
+                         - scipy_special.ncfdtr(df1 + 2, df2, omega, fcrit * df1 / (df1 + 2))) / 2
+        domega_dn = (omega_up - omega_down) / (2 * step)
+
+        power_df_up = 1 - scipy_special.ncfdtr(df1_up, df2_up, omega, finv_array(1 - alpha, df1_up, df2_up))
+        power_df_down = 1 - scipy_special.ncfdtr(df1_down, df2_down, omega, finv_array(1 - alpha, df1_down, df2_down))
+        dpower_ddf = (power_df_up - power_df_down) / (2 * step)
+    return dpower_domega * domega_dn + dpower_ddf
+
+
+def _multi_power_array(alpha, df1, df2, omega, valid):
+    """ Vectorized _multi_power for the elements marked valid, missing power elsewhere"""
+    power = np.full(valid.shape, np.nan)
+    fmethod = np.full(valid.shape, Constants.FMETHOD_MISSING, dtype=object)
+    omega = np.where(valid, omega, np.nan)
+    if valid.any():
+        fcrit = finv_array(1 - alpha[valid], df1[valid], df2[valid])
+        prob, fmethod[valid] = probf_array(fcrit, df1[valid], df2[valid], omega[valid])
+        power[valid] = np.where((fmethod[valid] == Constants.FMETHOD_NORMAL_LR) & (prob == 1), alpha[valid], 1 - prob)
+    return power, omega, fmethod
+
+
+def _hlt_one_moment_array(rank_C, rank_U, rank_X, total_N, min_rank_C_U, eval_HINVE, tolerance):
+    df2 = _hlt_one_moment_df2(min_rank_C_U, rank_U, rank_X, total_N)
+    return rank_C * rank_U, df2, _hlt_omega_array(min_rank_C_U, eval_HINVE, rank_X, total_N, df2)
+
+
+def _hlt_two_moment_array(rank_C, rank_U, rank_X, total_N, min_rank_C_U, eval_HINVE, tolerance):
+    df2 = _hlt_two_moment_df2(rank_C, rank_U, rank_X, total_N)
+    return rank_C * rank_U, df2, _hlt_omega_array(min_rank_C_U, eval_HINVE, rank_X, total_N, df2)
+
+
+def _hlt_one_moment_obrien_shieh_array(rank_C, rank_U, rank_X, total_N, min_rank_C_U, eval_HINVE, tolerance):
+    df2 = _hlt_one_moment_df2(min_rank_C_U, rank_U, rank_X, total_N)
+    return rank_C * rank_U, df2, (total_N - rank_X) * np.sum(eval_HINVE, axis=1)
+
+
+def _hlt_two_moment_obrien_shieh_array(rank_C, rank_U, rank_X, total_N, min_rank_C_U, eval_HINVE, tolerance):
+    df2 = _hlt_two_moment_df2(rank_C, rank_U, rank_X, total_N)
+    return rank_C * rank_U, df2, (total_N - rank_X) * np.sum(eval_HINVE, axis=1)
+
+
+def _hlt_omega_array(min_rank_C_U, eval_HINVE, rank_X, total_N, df2):
+    """ Vectorized _calc_hlt_omega"""
+    hlt = np.sum(eval_HINVE, axis=1)
+    return np.where(min_rank_C_U == 1, (total_N - rank_X) * hlt, df2 * hlt / min_rank_C_U)
+
+
+def _pbt_one_moment_array(rank_C, rank_U, rank_X, total_N, min_rank_C_U, eval_HINVE, tolerance):
+    df2 = _pbt_one_moment_df2(rank_C, rank_U, rank_X, total_N)
+    return rank_C * rank_U, df2, _pbt_uncorrected_omega_array(min_rank_C_U, eval_HINVE, rank_X, total_N, df2, tolerance)
+
+
+def _pbt_two_moment_array(rank_C, rank_U, rank_X, total_N, min_rank_C_U, eval_HINVE, tolerance):
+    df1, df2 = _pbt_two_moment_df1_df2(rank_C, rank_U, rank_X, total_N)
+    return df1, df2, _pbt_uncorrected_omega_array(min_rank_C_U, eval_HINVE, rank_X, total_N, df2, tolerance)
+
+
+def _pbt_one_moment_obrien_shieh_array(rank_C, rank_U, rank_X, total_N, min_rank_C_U, eval_HINVE, tolerance):
+    df2 = _pbt_one_moment_df2(rank_C, rank_U, rank_X, total_N)
+    return rank_C * rank_U, df2, _pbt_obrien_shieh_omega_array(min_rank_C_U, eval_HINVE, rank_X, total_N, tolerance)
+
+
+def _pbt_two_moment_obrien_shieh_array(rank_C, rank_U, rank_X, total_N, min_rank_C_U, eval_HINVE, tolerance):
+    df1, df2 = _pbt_two_moment_df1_df2(rank_C, rank_U, rank_X, total_N)
+    return df1, df2, _pbt_obrien_shieh_omega_array(min_rank_C_U, eval_HINVE, rank_X, total_N, tolerance)
+
+
+def _pbt_uncorrected_omega_array(min_rank_C_U, eval_HINVE, rank_X, total_N, df2, tolerance):
+    """ Vectorized noncentrality for the pbt approximations without the O'Brien and Shieh multiplier"""
+    rank_one = min_rank_C_U == 1
+    evalt = np.where(rank_one[:, None], _trace(eval_HINVE, rank_X[:, None], total_N[:, None]), eval_HINVE)
+    v = np.sum(evalt / (1 + evalt), axis=1)
+    omega = np.where(rank_one, total_N * min_rank_C_U, df2) * v / (min_rank_C_U - v)
+    return np.where(min_rank_C_U - v <= tolerance, np.nan, omega)
+
+
+def _pbt_obrien_shieh_omega_array(min_rank_C_U, eval_HINVE, rank_X, total_N, tolerance):
+    """ Vectorized noncentrality for the pbt approximations with the O'Brien and Shieh multiplier"""
+    evalt = _trace(eval_HINVE, rank_X[:, None], total_N[:, None])
+    v = np.sum(evalt / (1 + evalt), axis=1)
+    omega = total_N * min_rank_C_U * v / (min_rank_C_U - v)
+    return np.where(min_rank_C_U - v <= tolerance, np.nan, omega)
+
+
+def _wlk_two_moment_array(rank_C, rank_U, rank_X, total_N, min_rank_C_U, eval_HINVE, tolerance):
+    w = np.exp(-np.sum(np.log(1 + _trace(eval_HINVE, rank_X[:, None], total_N[:, None])), axis=1))
+    rank_one = min_rank_C_U == 1
+    rm = total_N - rank_X - (rank_U - rank_C + 1) / 2
+    rs = np.where(rank_one, 1, np.sqrt((rank_C * rank_C * rank_U * rank_U - 4) / (rank_C * rank_C + rank_U * rank_U - 5)))
+    r1 = (rank_U * rank_C - 2) / 4
+    df2 = np.where(rank_one, total_N - rank_X - rank_U + 1, (rm * rs) - 2 * r1)
+    tempw = np.power(w, 1 / rs)
+    return rank_C * rank_U, df2, total_N * rs * (1 - tempw) / tempw
+
+
+def _special_array(rank_C, rank_U, rank_X, total_N, min_rank_C_U, eval_HINVE, tolerance):
+    return rank_C * rank_U, total_N - rank_X - rank_U + 1, eval_HINVE[:, 0] * (total_N - rank_X)
+
+
 def _undefined_power(error_message=None):
     """ Returns a Power object with NaN power and noncentralith and missing fmethod"""
     return Power(float('nan'), float('nan'), Constants.FMETHOD_MISSING, error_message)
 
 
+@instrumentation.timed('calc_properties')
 def calc_properties(delta_es, rank_X, relative_group_sizes, rep_N, sigma_star):
     """
     Calculate properties of this design for a given samplesize.
@@ -862,16 +1063,18 @@ def calc_properties(delta_es, rank_X, relative_group_sizes, rep_N, sigma_star):
     :param sigma_star:
     :return:
     """
+    sigma_star = as_array(sigma_star)
     rank_U = np.shape(sigma_star)[0]
     total_N = rep_N * sum(relative_group_sizes) * 1.0
     error_sum_square = calc_error_sum_square(total_n=total_N,
                                              rank_x=rank_X,
                                              sigma_star=sigma_star)
     hypothesis_sum_square = calc_hypothesis_sum_square(repeated_rows_in_design_matrix=rep_N,
-                                                       delta=delta_es)
+                                                       delta=as_array(delta_es))
     return error_sum_square, hypothesis_sum_square, rank_U, total_N
 
 
+@instrumentation.timed('calc_eval')
 def _calc_eval(min_rank_C_U, error_sum_square, hypothesis_sum_square):
     """ Calculate eigenvalues for H*INV(E) for Multi-rep"""
     # inverse_error_sum = np.linalg.inv(np.linalg.cholesky(error_sum_square))
@@ -883,8 +1086,8 @@ def _calc_eval(min_rank_C_U, error_sum_square, hypothesis_sum_square):
     # # symmetric non-negative definite matrix.
     # eval = np.linalg.svd(hei_orth, full_matrices=True, compute_uv=False)
 
-    inverse_error_sum = np.linalg.inv(np.linalg.cholesky(error_sum_square))
-    hei_orth = inverse_error_sum * hypothesis_sum_square * inverse_error_sum.T
+    inverse_error_sum = np.linalg.inv(np.linalg.cholesky(as_array(error_sum_square)))
+    hei_orth = inverse_error_sum @ as_array(hypothesis_sum_square) @ inverse_error_sum.T
     hei_orth_symm = (hei_orth + hei_orth.T) / 2
     # get the eigenvalues of hei_orth_symm using a singular value decomposition
     # eigenvalues is an array of dimension 1 x b
@@ -892,6 +1095,23 @@ def _calc_eval(min_rank_C_U, error_sum_square, hypothesis_sum_square):
     eval = eigenvalues[0:min_rank_C_U]
     return eval
 
+def calc_spectrum(sigma_star, delta_es):
+    """
+    Eigenvalues of INV(SIGMA star) * DELTA in descending order. The eigenvalues of H*INV(E) for any
+    rep_N are these times rep_N / (total_N - rank_X).
+
+    :param sigma_star: sigma star
+    :param delta_es: (Theta - Theta_0)'M^-1(Theta-Theta_0)
+    :return: array of eigenvalues, NaN if sigma star is not positive definite
+    """
+    sigma_star = as_array(sigma_star)
+    try:
+        inverse_root = np.linalg.inv(np.linalg.cholesky(sigma_star))
+    except np.linalg.LinAlgError:
+        return np.full(np.shape(sigma_star)[0], np.nan)
+    hei_orth = inverse_root @ as_array(delta_es) @ inverse_root.T
+    return np.linalg.svd((hei_orth + hei_orth.T) / 2, full_matrices=False, compute_uv=False, hermitian=True)
+
 def calc_error_sum_square(total_n, rank_x, sigma_star):
     """
     Calculate error sum of squares matrix = nu_e * sigma star
@@ -906,3 +1126,19 @@ def calc_error_sum_square(total_n, rank_x, sigma_star):
 
 def calc_hypothesis_sum_square(repeated_rows_in_design_matrix, delta):
     return float(repeated_rows_in_design_matrix) * delta
+
+
+# vectorized df1, df2 and noncentrality for each test, see multirep_power_array
+_MULTIREP_ARRAYS = {
+    hlt_one_moment_null_approximator: _hlt_one_moment_array,
+    hlt_two_moment_null_approximator: _hlt_two_moment_array,
+    hlt_one_moment_null_approximator_obrien_shieh: _hlt_one_moment_obrien_shieh_array,
+    hlt_two_moment_null_approximator_obrien_shieh: _hlt_two_moment_obrien_shieh_array,
+    pbt_one_moment_null_approx: _pbt_one_moment_array,
+    pbt_two_moment_null_approx: _pbt_two_moment_array,
+    pbt_one_moment_null_approx_obrien_shieh: _pbt_one_moment_obrien_shieh_array,
+    pbt_two_moment_null_approx_obrien_shieh: _pbt_two_moment_obrien_shieh_array,
+    wlk_two_moment_null_approx: _wlk_two_moment_array,
+    wlk_two_moment_null_approx_obrien_shieh: _wlk_two_moment_array,
+    special: _special_array,
+}
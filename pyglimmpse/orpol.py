@@ -1,62 +1,62 @@
 import numpy as np
-from functools import reduce
-import copy
 import itertools
 
+from pyglimmpse.model.kronecker_operator import KroneckerOperator
 
-def upoly(factor_list):
+
+def upoly(factor_list, max_order=None, lazy=False):
     """
     This module creates a U contrast matrix with orthogonal polynomial coding for within subject factors.
 
+    By default each U matrix is the dense Kronecker product as an np.matrix, as it always has been.
+    With lazy=True each is returned as a :class:`.KroneckerOperator` instead. Use ``materialize()``
+    to get the dense matrix as a 2-D ndarray, or ``sandwich(sigma)`` to calculate U' * SIGMA * U
+    without forming U.
+
     Parameters
     ----------
     factor_list
         list of levels of factors
+    max_order
+        highest order of interaction to generate. Defaults to the number of factors.
+    lazy
+        True to return each U matrix as a :class:`.KroneckerOperator` rather than a dense matrix
     Returns
     -------
     U
-        contrast matrix
+        dictionary of contrast matrices keyed by effect order: 'u_maineffect', 'u_twoways', 'u_threeways',
+        and 'u_4ways', 'u_5ways', ... for higher order interactions
     """
 
     return_list = dict()
 
     n_factor = len(factor_list)
-    center_factor_list = list(map((lambda x: np.matrix(orpol((x-np.mean(x))/(np.sqrt(np.dot(x-np.mean(x), x-np.mean(x))))))), factor_list))
-    zerotrend_list = list(map((lambda x: x[:, 0]), center_factor_list))
+    if max_order is None:
+        max_order = n_factor
+    center_factor_list = list(map((lambda x: orpol((x-np.mean(x))/(np.sqrt(np.dot(x-np.mean(x), x-np.mean(x)))))), factor_list))
+    zerotrend_list = list(map((lambda x: x[:, :1]), center_factor_list))
     highertrend_list = list(map((lambda x: x[:, 1:]), center_factor_list))
 
-    u_grandmean = reduce((lambda x, y: np.kron(x, y)), zerotrend_list)
-    #return_list['u_grandmean'] = u_grandmean
-
-    u_maineffect = dict()
-    for i in range(0, n_factor):
-        temp_trend_list = copy.deepcopy(zerotrend_list)
-        temp_trend_list[i] = highertrend_list[i]
-        u_maineffect['f'+str(i)] = reduce((lambda x, y: np.kron(x, y)), temp_trend_list)
-    return_list['u_maineffect'] = u_maineffect
-
-    if n_factor >= 2:
-        u_twoways = dict()
-        for k in itertools.combinations(range(0, n_factor), 2):
-            temp_trend_list = copy.deepcopy(zerotrend_list)
-            temp_trend_list[k[0]] = highertrend_list[k[0]]
-            temp_trend_list[k[1]] = highertrend_list[k[1]]
-            u_twoways['f'+str(k)] = reduce((lambda x, y: np.kron(x, y)), temp_trend_list)
-        return_list['u_twoways'] = u_twoways
-
-    if n_factor >= 3:
-        u_threeways = dict()
-        for k in itertools.combinations(range(0, n_factor), 3):
-            temp_trend_list = copy.deepcopy(zerotrend_list)
-            temp_trend_list[k[0]] = highertrend_list[k[0]]
-            temp_trend_list[k[1]] = highertrend_list[k[1]]
-            temp_trend_list[k[2]] = highertrend_list[k[2]]
-            u_threeways['f'+str(k)] = reduce((lambda x, y: np.kron(x, y)), temp_trend_list)
-        return_list['u_threeways'] = u_threeways
+    for order in range(1, min(max_order, n_factor) + 1):
+        u_effects = dict()
+        for k in itertools.combinations(range(0, n_factor), order):
+            temp_trend_list = list(zerotrend_list)
+            for i in k:
+                temp_trend_list[i] = highertrend_list[i]
+            name = 'f' + str(k[0]) if order == 1 else 'f' + str(k)
+            u_matrix = KroneckerOperator(temp_trend_list)
+            u_effects[name] = u_matrix if lazy else np.matrix(u_matrix.materialize())
+        return_list[_effect_key(order)] = u_effects
 
     return return_list
 
 
+def _effect_key(order):
+    """ name of the dictionary holding the U matrices for effects of the given order"""
+    names = {1: 'u_maineffect', 2: 'u_twoways', 3: 'u_threeways'}
+    return names.get(order, 'u_' + str(order) + 'ways')
+
+
 def orpol(x, maxdegree=None, weights=None):
     """
     The orpol function generates orthogonal polynomials on a discrete set of points.
@@ -0,0 +1,367 @@
+import numpy as np
+
+from pyglimmpse import multirep, router, unirep, validators
+from pyglimmpse._arrays import as_array
+from pyglimmpse.constants import Constants
+from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException
+from pyglimmpse.model.power import Power
+from pyglimmpse.model.power_batch import PowerBatch
+
+# unirep_method, CalcMethod approximation attribute and CalcMethod epsilon attribute for each unirep test
+_UNIREP_TESTS = {
+    unirep.uncorrected: (Constants.UN, 'UnirepUncorrected', None),
+    unirep.chi_muller: (Constants.CM, 'UnirepHuynhFeldtChiMuller', 'EpsilonAppHuynhFeldtChiMuller'),
+    unirep.geisser_greenhouse: (Constants.GG, 'UnirepGeisserGreenhouse', 'EpsilonAppGeisserGreenhouse'),
+    unirep.hyuhn_feldt: (Constants.HF, 'UnirepHuynhFeldt', 'EpsilonAppHuynhFeldt'),
+    unirep.box: (Constants.BOX, 'UnirepBox', None),
+}
+
+
+class CompiledPlan:
+    """
+    A power calculation for one test and one design, prepared once so that power can be
+    evaluated for many values of rep_N.
+
+    The inputs are validated when the plan is built, and for the unirep tests the epsilon
+    estimator and the approximation to the CDF are chosen up front from the
+    :class:`pyglimmpse.input.CalcMethod`. Calling :meth:`power` then does no validation,
+    signature inspection or option parsing. If the test reduces to an exact F test for this
+    design (see :func:`pyglimmpse.router.route`) the noncentrality per unit of rep_N is found
+    once and the closed form kernel is used.
+
+    Parameters
+    ----------
+    test
+        The statistical test chosen. This must be one of the tests available in pyglimmpse.multirep or pyglimmpse.unirep
+    rank_C
+        rank of C matrix
+    rank_X
+        rank of X matrix
+    relative_group_sizes
+        a list of ratios of size of the groups in your design.
+    alpha
+        Significance level for target GLUM test
+    sigma_star
+        U` * SIGMA * U
+    delta_es
+        (Theta - Theta_0)`M^-1(Theta-Theta_0)
+    calc_method
+        :class:`pyglimmpse.input.CalcMethod`, optional
+    option
+        :class:`pyglimmpse.input.Option`, optional
+    scalar
+        :class:`pyglimmpse.input.Scalar`, optional
+    cl
+        :class:`pyglimmpse.input.CL`, optional
+    ip
+        :class:`pyglimmpse.input.IP`, optional. If ip_plan is set, unirep tests calculate internal pilot power
+    kwargs
+        any other optional arguments accepted by the test, passed on every call
+    """
+
+    def __init__(self,
+                 test,
+                 rank_C: float,
+                 rank_X: float,
+                 relative_group_sizes,
+                 alpha: float,
+                 sigma_star: np.matrix,
+                 delta_es: np.matrix,
+                 calc_method=None,
+                 option=None,
+                 scalar=None,
+                 cl=None,
+                 ip=None,
+                 **kwargs):
+        validators.validate(CL=cl, Option=option, Scalar=scalar, CalcMethod=calc_method, IP=ip)
+        sigma_star = as_array(sigma_star)
+        delta_es = as_array(delta_es)
+        if sigma_star.shape[0] != sigma_star.shape[1]:
+            raise GlimmpseValidationException("sigma_star must be square")
+        if delta_es.shape != sigma_star.shape:
+            raise GlimmpseValidationException("delta_es must have the same dimensions as sigma_star")
+        if alpha <= 0 or alpha >= 1:
+            raise GlimmpseValidationException('ERROR 13: All ALPHA values must be > TOLERANCE > 0 and < 1.')
+
+        if ip is not None and ip.ip_plan and test in _UNIREP_TESTS:
+            kwargs.setdefault('internal_pilot', ip)
+
+        self.test = test
+        self.rank_C = rank_C
+        self.rank_X = rank_X
+        self.relative_group_sizes = relative_group_sizes
+        self.alpha = alpha
+        self.sigma_star = sigma_star
+        self.delta_es = delta_es
+        self.kwargs = kwargs
+        self._general_power = self._compile(calc_method)
+        self._unit_omega = None
+        self._spectrum = None
+        if router.exact_f_applies(test, rank_C, sigma_star.shape[0], **kwargs):
+            self._unit_omega = router.exact_f_unit_noncentrality(sigma_star, delta_es)
+
+    def _compile(self, calc_method):
+        """ Bind everything which does not depend on rep_N and return the function of rep_N"""
+        arguments = dict(rank_C=self.rank_C,
+                         rank_X=self.rank_X,
+                         relative_group_sizes=self.relative_group_sizes,
+                         alpha=self.alpha,
+                         sigma_star=self.sigma_star,
+                         delta_es=self.delta_es)
+
+        if self.test not in _UNIREP_TESTS:
+            arguments.update(self.kwargs)
+            return lambda rep_N: self.test(rep_N=rep_N, **arguments)
+
+        unirep_method, approximation_attribute, epsilon_attribute = _UNIREP_TESTS[self.test]
+        kwargs = dict(self.kwargs)
+        epsilon_estimator = kwargs.pop('epsilon_estimator', None)
+        if epsilon_estimator is None and calc_method and epsilon_attribute:
+            epsilon_estimator = getattr(calc_method, epsilon_attribute)
+        if 'approximation_method' not in kwargs and calc_method:
+            kwargs['approximation_method'] = getattr(calc_method, approximation_attribute)
+        estimator = unirep._resolve_epsilon_estimator(unirep_method, epsilon_estimator)
+        arguments.update(kwargs)
+        arguments.update(epsilon_estimator=unirep._bind_epsilon_estimator(estimator),
+                         unirep_method=unirep_method)
+        return lambda rep_N: unirep._unirep_power(rep_N=rep_N, **arguments)
+
+    def route(self, rep_N: float):
+        """
+        Calculate power for this plan and report which calculation was used.
+
+        Parameters
+        ----------
+        rep_N
+            number of times each row of the essence design matrix is repeated
+
+        Returns
+        -------
+        path, power
+            Constants.ROUTE_EXACT_F or Constants.ROUTE_GENERAL, and the :class:`pyglimmpse.model.power.Power`
+        """
+        if self._unit_omega is not None:
+            power = router.exact_f_power(self.test,
+                                         self.rank_C,
+                                         self.sigma_star.shape[0],
+                                         self.rank_X,
+                                         self.relative_group_sizes,
+                                         rep_N,
+                                         self.alpha,
+                                         self._unit_omega,
+                                         **self.kwargs)
+            if power is not None:
+                return Constants.ROUTE_EXACT_F, power
+        return Constants.ROUTE_GENERAL, self._general_power(rep_N)
+
+    def power(self, rep_N: float) -> Power:
+        """
+        Calculate power for this plan.
+
+        Parameters
+        ----------
+        rep_N
+            number of times each row of the essence design matrix is repeated
+
+        Returns
+        -------
+        power
+            :class:`pyglimmpse.model.power.Power`
+        """
+        return self.route(rep_N)[1]
+
+    def __call__(self, rep_N: float) -> Power:
+        return self.power(rep_N)
+
+    def power_derivative(self, rep_N: float):
+        """
+        Calculate power for this plan and its derivative with respect to rep_N.
+
+        The derivative is available for the multirep tests, and for the unirep tests when they are
+        exact F tests, from :func:`pyglimmpse.multirep.multirep_power_array`. It is not available when
+        power is averaged over a noncentrality distribution, or for the general unirep calculation.
+
+        Parameters
+        ----------
+        rep_N
+            number of times each row of the essence design matrix is repeated
+
+        Returns
+        -------
+        power, derivative
+            :class:`pyglimmpse.model.power.Power` and dPower/drep_N, or None if it is not available
+        """
+        total_N = rep_N * sum(self.relative_group_sizes)
+        rank_U = self.sigma_star.shape[0]
+        if self.test in router.MULTIREP_TESTS:
+            test, fmethod = self.test, None
+            available = not self.kwargs.get('noncentrality_distribution')
+        else:
+            test, fmethod = multirep.special, Constants.SIGMA_KNOWN
+            available = self._unit_omega is not None and total_N - self.rank_X >= 4
+        if not available:
+            return self.power(rep_N), None
+
+        if self._spectrum is None:
+            self._spectrum = multirep.calc_spectrum(self.sigma_star, self.delta_es)
+        power, omega, method, derivative = multirep.multirep_power_array(test, self.rank_C, rank_U, self.rank_X,
+                                                                         total_N, rep_N, self.alpha, self._spectrum,
+                                                                         self.kwargs.get('tolerance', 1e-12),
+                                                                         derivative=True)
+        if self.kwargs.get('confidence_interval') or np.isnan(power[0]):
+            result = self.power(rep_N)
+        else:
+            result = Power(float(power[0]), float(omega[0]), fmethod or method[0])
+        return result, float(derivative[0] * sum(self.relative_group_sizes))
+
+
+class BatchPlan:
+    """
+    Power calculations for one test and a batch of designs, prepared once so that power can be
+    evaluated for all of them, at a different rep_N for each design, in one vectorized call.
+
+    Each design is reduced to the eigenvalues of INV(SIGMA star) * DELTA (see
+    :func:`pyglimmpse.multirep.calc_spectrum`), stacked into one array padded with zeros, so
+    designs with different rank_U can share a batch. The multirep tests, and the unirep tests when
+    rank_U == 1, are then evaluated by :func:`pyglimmpse.multirep.multirep_power_array`. Unirep
+    designs which need the general calculation are evaluated one at a time with a :class:`CompiledPlan`.
+
+    Parameters
+    ----------
+    test
+        The statistical test chosen. This must be one of the tests available in pyglimmpse.multirep or pyglimmpse.unirep
+    rank_C
+        rank of C matrix, for all designs or for each design
+    rank_X
+        rank of X matrix, for all designs or for each design
+    relative_group_sizes
+        a list of ratios of size of the groups in your design, or a list of these for each design
+    alpha
+        Significance level for target GLUM test, for all designs or for each design
+    sigma_star
+        U` * SIGMA * U, or a list of these for each design
+    delta_es
+        (Theta - Theta_0)`M^-1(Theta-Theta_0), or a list of these for each design
+    tolerance
+        value below which a number is considered zero. defaults to 1e-12
+    """
+
+    def __init__(self,
+                 test,
+                 rank_C,
+                 rank_X,
+                 relative_group_sizes,
+                 alpha,
+                 sigma_star,
+                 delta_es,
+                 tolerance=1e-12):
+        if test not in router.MULTIREP_TESTS and test not in router.UNIREP_TESTS:
+            raise GlimmpseValidationException("test must be one of the tests in pyglimmpse.multirep or pyglimmpse.unirep")
+        sigma_star = _design_list(sigma_star)
+        delta_es = _design_list(delta_es)
+        if np.ndim(relative_group_sizes) == 1:
+            relative_group_sizes = [relative_group_sizes]
+        size = max(len(sigma_star), len(delta_es), len(relative_group_sizes), np.size(rank_C), np.size(rank_X), np.size(alpha))
+        sigma_star = _broadcast_list(sigma_star, size, 'sigma_star')
+        delta_es = _broadcast_list(delta_es, size, 'delta_es')
+        self.relative_group_sizes = _broadcast_list(relative_group_sizes, size, 'relative_group_sizes')
+        self.rank_C, self.rank_X, self.alpha = [np.broadcast_to(np.asarray(a, dtype=float), (size,)).copy()
+                                                for a in (rank_C, rank_X, alpha)]
+        if np.any(self.alpha <= 0) or np.any(self.alpha >= 1):
+            raise GlimmpseValidationException('ERROR 13: All ALPHA values must be > TOLERANCE > 0 and < 1.')
+        for sigma, delta in zip(sigma_star, delta_es):
+            if sigma.shape[0] != sigma.shape[1]:
+                raise GlimmpseValidationException("sigma_star must be square")
+            if delta.shape != sigma.shape:
+                raise GlimmpseValidationException("delta_es must have the same dimensions as sigma_star")
+
+        self.test = test
+        self.size = size
+        self.sigma_star = sigma_star
+        self.delta_es = delta_es
+        self.tolerance = tolerance
+        self.group_total = np.array([sum(g) for g in self.relative_group_sizes], dtype=float)
+        self.rank_U = np.array([sigma.shape[0] for sigma in sigma_star], dtype=float)
+        self.spectrum = np.zeros((size, int(self.rank_U.max())))
+        for i, (sigma, delta) in enumerate(zip(sigma_star, delta_es)):
+            self.spectrum[i, :sigma.shape[0]] = multirep.calc_spectrum(sigma, delta)
+        self._plans = {}
+
+    def power(self, rep_N, index=None):
+        """
+        Calculate power for the designs in index, each at its own rep_N.
+
+        Parameters
+        ----------
+        rep_N
+            number of times each row of the essence design matrix is repeated, for each design in index
+        index
+            the designs to calculate power for, defaults to all of them
+
+        Returns
+        -------
+        :class:`pyglimmpse.model.power_batch.PowerBatch`
+            power, noncentrality and the Constants.FMETHOD_* used, for each design in index
+        """
+        index = np.arange(self.size) if index is None else np.asarray(index)
+        rep_N = np.broadcast_to(np.asarray(rep_N, dtype=float), index.shape)
+        total_N = rep_N * self.group_total[index]
+        if self.test in router.MULTIREP_TESTS:
+            return PowerBatch.from_arrays(*multirep.multirep_power_array(self.test, self.rank_C[index], self.rank_U[index],
+                                                                         self.rank_X[index], total_N, rep_N,
+                                                                         self.alpha[index], self.spectrum[index],
+                                                                         self.tolerance))
+
+        # unirep tests reduce to the exact F test when rank_U == 1, as long as the epsilon estimators are defined
+        exact = (self.rank_U[index] == 1) & (total_N - self.rank_X[index] >= 4)
+        batch = PowerBatch.empty(index.size)
+        if exact.any():
+            i = index[exact]
+            power, omega, _ = multirep.multirep_power_array(multirep.special, self.rank_C[i], 1, self.rank_X[i],
+                                                            total_N[exact], rep_N[exact], self.alpha[i],
+                                                            self.spectrum[i], self.tolerance)
+            batch.data[exact] = PowerBatch.from_arrays(power, omega, Constants.SIGMA_KNOWN).data
+        general = np.flatnonzero(~exact)
+        if general.size:
+            batch.data[general] = PowerBatch.from_powers([self._general_power(index[position], rep_N[position])
+                                                          for position in general]).data
+        return batch
+
+    def _general_power(self, i, rep_N):
+        """
+        Power for design i from its scalar plan, missing if rep_N leaves too few error degrees of
+        freedom, so that one such design does not stop the calculation for the others.
+        """
+        try:
+            return self._plan(i).power(rep_N)
+        except GlimmpseValidationException as e:
+            return Power(np.nan, np.nan, Constants.FMETHOD_MISSING, error_message=str(e))
+
+    def _plan(self, i):
+        """ The scalar plan for design i, for the designs which need the general unirep calculation"""
+        if i not in self._plans:
+            self._plans[i] = CompiledPlan(self.test,
+                                          rank_C=self.rank_C[i],
+                                          rank_X=self.rank_X[i],
+                                          relative_group_sizes=self.relative_group_sizes[i],
+                                          alpha=self.alpha[i],
+                                          sigma_star=self.sigma_star[i],
+                                          delta_es=self.delta_es[i],
+                                          tolerance=self.tolerance)
+        return self._plans[i]
+
+
+def _design_list(matrices):
+    """ a list of matrices from one matrix or a sequence of them"""
+    if isinstance(matrices, (list, tuple)) and len(matrices) and np.ndim(matrices[0]) == 2:
+        return [as_array(m) for m in matrices]
+    return [as_array(matrices)]
+
+
+def _broadcast_list(values, size, name):
+    """ repeat a list of one value for each design"""
+    if len(values) == size:
+        return list(values)
+    if len(values) == 1:
+        return list(values) * size
+    raise GlimmpseValidationException("{0} must have one value or one for each design".format(name))
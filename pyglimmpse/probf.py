@@ -1,10 +1,16 @@
-from scipy import special
-from scipy.stats import norm, poisson, beta, ncx2
+import numpy as np
 import math
+from collections import Counter
 
+from pyglimmpse import instrumentation
+from pyglimmpse._lazy import lazy_import
 from pyglimmpse.constants import Constants
 
+special = lazy_import('scipy.special')
+stats = lazy_import('scipy.stats')
 
+
+@instrumentation.timed('probf')
 def probf(fcrit, df1, df2, noncen):
     """PROBF calculates Pr(FCRIT < F(df1,df2,noncen)) using one of four
        methods. The first, most common method uses the cumulative
@@ -45,12 +51,13 @@ def probf(fcrit, df1, df2, noncen):
     else:
         zscore = _get_zscore(df1, df2, fcrit, noncen)
         prob, fmethod = _normal_approximation(zscore)
+    instrumentation.observe('probf.fmethod', fmethod)
     return prob, fmethod
 def _normal_approximation(zscore):
     """Normal approximation, value dependent on zscore"""
     if math.fabs(zscore) < 6:
         fmethod = Constants.FMETHOD_NORMAL_SM
-        prob = norm.cdf(zscore)
+        prob = stats.norm.cdf(zscore)
     else:
         fmethod = Constants.FMETHOD_NORMAL_LR
         if zscore < -6:
@@ -83,7 +90,7 @@ def _tiku_approximation(df1, df2, fcrit, noncen):
     fmethod = Constants.FMETHOD_TIKU
     return prob, fmethod
 def _chi2_approximation(df1, fcrit, noncen):
-    prob = ncx2.cdf(x=fcrit, df=df1, nc=noncen)
+    prob = stats.ncx2.cdf(x=fcrit, df=df1, nc=noncen)
     fmethod = Constants.FMETHOD_CHI2
     return prob, fmethod
 def _nonadjusted(df1, df2, fcrit, noncen):
@@ -91,3 +98,57 @@ def _nonadjusted(df1, df2, fcrit, noncen):
     prob = special.ncfdtr(df1, df2, noncen, fcrit)
     fmethod = Constants.FMETHOD_NOAPPROXIMATION
     return prob, fmethod
+
+
+@instrumentation.timed('probf_array')
+def probf_array(fcrit, df1, df2, noncen):
+    """
+    Vectorized :func:`probf`. The arguments are broadcast against each other and each element
+    uses the same choice of method as :func:`probf` would for those values.
+
+    :param fcrit: Critical values of F distribution under null hypothesis
+    :param df1: Numerator (hypothesis) degrees of freedom
+    :param df2: Denominator (error) degrees of freedom
+    :param noncen: Noncentrality parameters
+    :return: returns a tuple (prob, fmethod) of arrays with the broadcast shape. fmethod is an
+             object array of Constants.FMETHOD_* values.
+    """
+    fcrit, df1, df2, noncen = np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in (fcrit, df1, df2, noncen)])
+    prob = np.full(fcrit.shape, np.nan)
+    fmethod = np.full(fcrit.shape, Constants.FMETHOD_MISSING, dtype=object)
+
+    nonadjusted = (((df1 < 10**4.4) & (df2 < 10**5.4) & (noncen < 10**6.4))
+                   | ((df1 < 10**6) & (df2 < 10) & (noncen < 10**6)))
+    tiku = ~nonadjusted & (1 <= df1) & (df1 < 10**9.2) & (10**0.6 <= df2) & (df2 < 10**9.2) & (noncen < 10**6.4)
+    chi = ~nonadjusted & ~tiku & (df2 > 10**9.4)
+    normal = ~nonadjusted & ~tiku & ~chi
+
+    if nonadjusted.any():
+        prob[nonadjusted] = special.ncfdtr(df1[nonadjusted], df2[nonadjusted], noncen[nonadjusted], fcrit[nonadjusted])
+        fmethod[nonadjusted] = Constants.FMETHOD_NOAPPROXIMATION
+    if tiku.any():
+        prob[tiku] = _tiku_approximation_array(df1[tiku], df2[tiku], fcrit[tiku], noncen[tiku])
+        fmethod[tiku] = Constants.FMETHOD_TIKU
+    if chi.any():
+        prob[chi] = stats.ncx2.cdf(x=fcrit[chi], df=df1[chi], nc=noncen[chi])
+        fmethod[chi] = Constants.FMETHOD_CHI2
+    if normal.any():
+        zscore = _get_zscore(df1[normal], df2[normal], fcrit[normal], noncen[normal])
+        small = np.abs(zscore) < 6
+        prob[normal] = np.where(small, stats.norm.cdf(zscore), np.where(zscore < 0, 0.0, 1.0))
+        fmethod[normal] = np.where(small, Constants.FMETHOD_NORMAL_SM, Constants.FMETHOD_NORMAL_LR)
+    if instrumentation.active() is not None:
+        for method, n in Counter(fmethod.ravel().tolist()).items():
+            instrumentation.observe('probf.fmethod', method, n)
+    return prob, fmethod
+
+
+def _tiku_approximation_array(df1, df2, fcrit, noncen):
+    """Vectorized Tiku approximation"""
+    h_tiku = 2 * (df1 + noncen)**3 + 3 * (df1 + noncen) * (df1 + 2 * noncen) * (df2 - 2) + (df1 + 3 * noncen) * (df2 - 2)**2
+    k_tiku = (df1 + noncen)**2 + (df2 - 2) * (df1 + 2 * noncen)
+    df1_tiku = np.floor(0.5 * (df2 - 2) * ((h_tiku**2 / (h_tiku**2 - 4 * k_tiku**3))**0.5 - 1))
+    c_tiku = (df1_tiku / df1) / (2 * df1_tiku + df2 - 2) * (h_tiku / k_tiku)
+    b_tiku = - df2 / (df2 - 2) * (c_tiku - 1 - noncen / df1)
+    fcrit_tiku = (fcrit - b_tiku) / c_tiku
+    return special.ncfdtr(df1_tiku, df2, 0, fcrit_tiku)
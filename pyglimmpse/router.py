@@ -0,0 +1,154 @@
+import numpy as np
+
+from pyglimmpse import multirep, unirep
+from pyglimmpse._arrays import as_array
+from pyglimmpse.constants import Constants
+from pyglimmpse.finv import finv
+from pyglimmpse.model.power import Power
+from pyglimmpse.probf import probf
+
+MULTIREP_TESTS = frozenset([multirep.hlt_one_moment_null_approximator,
+                            multirep.hlt_two_moment_null_approximator,
+                            multirep.hlt_one_moment_null_approximator_obrien_shieh,
+                            multirep.hlt_two_moment_null_approximator_obrien_shieh,
+                            multirep.pbt_one_moment_null_approx,
+                            multirep.pbt_two_moment_null_approx,
+                            multirep.pbt_one_moment_null_approx_obrien_shieh,
+                            multirep.pbt_two_moment_null_approx_obrien_shieh,
+                            multirep.wlk_two_moment_null_approx,
+                            multirep.wlk_two_moment_null_approx_obrien_shieh,
+                            multirep.special])
+
+UNIREP_TESTS = frozenset([unirep.uncorrected,
+                          unirep.chi_muller,
+                          unirep.geisser_greenhouse,
+                          unirep.hyuhn_feldt,
+                          unirep.box])
+
+# optional arguments which need the general unirep calculation
+_UNIREP_GENERAL_ARGUMENTS = ('confidence_interval', 'noncentrality_distribution', 'internal_pilot')
+
+
+def route(test,
+          rank_C: float,
+          rank_X: float,
+          relative_group_sizes,
+          rep_N: float,
+          alpha: float,
+          sigma_star: np.matrix,
+          delta_es: np.matrix,
+          **kwargs):
+    """
+    Calculate power with the closed form exact F kernel when the chosen test reduces to an exact F test,
+    otherwise with the test itself.
+
+    When min(rank_C, rank_U) == 1 the Hotelling-Lawley, Pillai-Bartlett and Wilks statistics are all
+    exact F tests, and when rank_U == 1 so are the univariate approach to repeated measures tests.
+    In those cases power only needs the single nonzero eigenvalue of H*INV(E), which is found without
+    a Cholesky factorization or SVD when rank_U == 1.
+
+    Parameters
+    ----------
+    test
+        The statistical test chosen. This must be one of the tests available in pyglimmpse.multirep or pyglimmpse.unirep
+    rank_C
+        rank of C matrix
+    rank_X
+        rank of X matrix
+    relative_group_sizes
+        a list of ratios of size of the groups in your design.
+    rep_N
+        number of times each row of the essence design matrix is repeated
+    alpha
+        Significance level for target GLUM test
+    sigma_star
+        U` * SIGMA * U
+    delta_es
+        (Theta - Theta_0)`M^-1(Theta-Theta_0)
+
+    Returns
+    -------
+    path, power
+        Constants.ROUTE_EXACT_F or Constants.ROUTE_GENERAL, and the :class:`pyglimmpse.model.power.Power`
+    """
+    rank_U = np.shape(sigma_star)[0]
+    if exact_f_applies(test, rank_C, rank_U, **kwargs):
+        unit_omega = exact_f_unit_noncentrality(sigma_star, delta_es)
+        if unit_omega is not None:
+            power = exact_f_power(test, rank_C, rank_U, rank_X, relative_group_sizes, rep_N, alpha, unit_omega, **kwargs)
+            if power is not None:
+                return Constants.ROUTE_EXACT_F, power
+    return Constants.ROUTE_GENERAL, test(rank_C=rank_C,
+                                         rank_X=rank_X,
+                                         relative_group_sizes=relative_group_sizes,
+                                         rep_N=rep_N,
+                                         alpha=alpha,
+                                         sigma_star=sigma_star,
+                                         delta_es=delta_es,
+                                         **kwargs)
+
+
+def exact_f_applies(test, rank_C: float, rank_U: float, **kwargs) -> bool:
+    """ True if the test is an exact F test for this design and the closed form kernel can be used"""
+    if test in MULTIREP_TESTS:
+        return min(rank_C, rank_U) == 1
+    if test in UNIREP_TESTS:
+        return rank_U == 1 and not any(kwargs.get(key) for key in _UNIREP_GENERAL_ARGUMENTS)
+    return False
+
+
+def exact_f_unit_noncentrality(sigma_star: np.matrix, delta_es: np.matrix):
+    """
+    The nonzero eigenvalue of INV(SIGMA star) * DELTA. The noncentrality of the exact F test is this value
+    times rep_N, so it only needs to be found once per design.
+
+    Returns None if SIGMA star is not positive definite.
+    """
+    if np.shape(sigma_star)[0] == 1:
+        sigma = float(np.squeeze(np.asarray(sigma_star)))
+        if sigma <= 0:
+            return None
+        return float(np.squeeze(np.asarray(delta_es))) / sigma
+    try:
+        inverse_root = np.linalg.inv(np.linalg.cholesky(as_array(sigma_star)))
+    except np.linalg.LinAlgError:
+        return None
+    whitened = inverse_root @ as_array(delta_es) @ inverse_root.T
+    return float(np.linalg.eigvalsh((whitened + whitened.T) / 2)[-1])
+
+
+def exact_f_power(test,
+                  rank_C: float,
+                  rank_U: float,
+                  rank_X: float,
+                  relative_group_sizes,
+                  rep_N: float,
+                  alpha: float,
+                  unit_omega: float,
+                  tolerance=1e-12,
+                  **kwargs):
+    """
+    Power of the exact F test with df1 = rank_C * rank_U, df2 = N - rank_X - rank_U + 1 and
+    noncentrality rep_N * unit_omega.
+
+    Returns None if the design is too small for the exact F test, in which case the test itself
+    should be used so that its own handling of the degenerate case applies.
+    """
+    total_N = rep_N * sum(relative_group_sizes) * 1.0
+    df1 = rank_C * rank_U
+    df2 = total_N - rank_X - rank_U + 1
+    omega = rep_N * unit_omega
+    if test in UNIREP_TESTS:
+        # the epsilon estimators are not defined for fewer than 4 error degrees of freedom
+        if total_N - rank_X < 4:
+            return None
+        fcrit = finv(1 - alpha, df1, df2)
+        prob, fmethod = probf(fcrit, df1, df2, omega)
+        if fmethod == Constants.FMETHOD_NORMAL_LR and prob == 1:
+            power = alpha
+        else:
+            power = 1 - prob
+        return Power(power, omega, Constants.SIGMA_KNOWN)
+    if df2 <= tolerance:
+        return None
+    return multirep._multi_power(alpha, df1, df2, omega, total_N, **kwargs)
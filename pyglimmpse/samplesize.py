@@ -1,12 +1,16 @@
 import math
+from concurrent import futures
 
 import numpy as np
 import inspect
+import os
 import sys
 
+from pyglimmpse import instrumentation, multirep, router
 from pyglimmpse.constants import Constants
-from pyglimmpse.model.power import Power, subtrtact_target_power
-from scipy import optimize
+from pyglimmpse.model.power import Power
+from pyglimmpse.model.power_batch import PowerBatch
+from pyglimmpse.plan import BatchPlan, CompiledPlan
 from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException
 
 
@@ -19,6 +23,9 @@ def samplesize(test,
                delta_es: np.matrix,
                targetPower,
                starting_smallest_group_size=Constants.STARTING_SAMPLE_SIZE.value,
+               target=Constants.TARGET_POWER,
+               search=Constants.SEARCH_BISECTION,
+               workers=None,
                **kwargs):
     """
     Get the smallest realizable samplesize for the requested target power.
@@ -27,17 +34,413 @@ def samplesize(test,
     :param rank_U: Rank of the between contrast matrix for your study design.
     :param alpha: Type one error rate
     :param sigma_star: Sigma star
-    :param targetPower: The power you wish to achieve
+    :param targetPower: The power you wish to achieve, or a list of powers. For a list the targets are
+        solved together, sharing every power calculation, and an array of total_N and a
+        :class:`pyglimmpse.model.power_batch.PowerBatch` are returned, in the same order.
     :param rank_X: the rank of Es(X). Where X is your design matrix.
     :param delta: (Theta - Theta_0)'M^-1(Theta-Theta_0)
     :param relative_group_sizes: a list of ratios of size of the groups in your design.
     :param starting_smallest_group_size: The starting point for our integration. If this is less than the minimum realizeable smallest group size for your design, this function will return an error.
-    :param optional_args:
+    :param target: Constants.TARGET_POWER to reach targetPower with the power point estimate, or
+        Constants.TARGET_LOWER_BOUND to reach it with the lower confidence limit on power. The
+        latter needs a confidence_interval in kwargs.
+    :param search: Constants.SEARCH_BISECTION to double the smallest group size and then bisect, or
+        Constants.SEARCH_NEWTON for a safeguarded Newton search using dPower/dN, which usually needs
+        a handful of power calculations. Where the derivative is not available (see
+        :meth:`pyglimmpse.plan.CompiledPlan.power_derivative`) the Newton search uses secant steps.
+        Constants.SEARCH_PARALLEL tries several smallest group sizes at once in a pool of worker
+        processes, which is faster when each power calculation is slow, e.g. with a
+        noncentrality_distribution or the exact Davies CDF.
+    :param workers: number of worker processes for Constants.SEARCH_PARALLEL, defaults to the number of CPUs
+    :param kwargs: optional arguments for the test, see :class:`pyglimmpse.plan.CompiledPlan`
     :return:
     """
+    if target == Constants.TARGET_LOWER_BOUND and not kwargs.get('confidence_interval'):
+        raise GlimmpseValidationException('A confidence_interval is needed to target the lower confidence limit of power.')
+
+    arguments = dict(rank_C=rank_C,
+                     rank_X=rank_X,
+                     relative_group_sizes=relative_group_sizes,
+                     alpha=alpha,
+                     sigma_star=sigma_star,
+                     delta_es=delta_es,
+                     **kwargs)
+    plan = CompiledPlan(test, **arguments)
 
     # calculate max valid per group N
     max_n = min(sys.maxsize/rank_X, Constants.MAX_SAMPLE_SIZE.value)
+    if search == Constants.SEARCH_PARALLEL:
+        probes = _ParallelProbes(plan, test, arguments, workers)
+    else:
+        probes = _PowerProbes(plan)
+    try:
+        if np.ndim(targetPower) == 0:
+            return _samplesize_for_target(probes, relative_group_sizes, targetPower, starting_smallest_group_size, max_n, target, search)
+
+        # solve the hardest target first so that its search covers the doubling phase of all the others
+        results = {}
+        for t in sorted(set(targetPower), reverse=True):
+            results[t] = _samplesize_for_target(probes, relative_group_sizes, t, starting_smallest_group_size, max_n, target, search)
+        return (np.array([results[t][0] for t in targetPower], dtype=float),
+                PowerBatch.from_powers([results[t][1] for t in targetPower]))
+    finally:
+        probes.close()
+
+
+def samplesize_batch(test,
+                     rank_C,
+                     rank_X,
+                     relative_group_sizes,
+                     alpha,
+                     sigma_star,
+                     delta_es,
+                     targetPower,
+                     starting_smallest_group_size=Constants.STARTING_SAMPLE_SIZE.value,
+                     tolerance=1e-12):
+    """
+    Get the smallest realizable samplesize for a batch of designs at once.
+
+    This is :func:`samplesize` for many designs, e.g. a list of candidate designs or one design with
+    a list of effect sizes delta_es. The search is the same, but each step calculates power for every
+    design still searching in one vectorized call (see :class:`pyglimmpse.plan.BatchPlan`), and a design
+    drops out as soon as its smallest group size is found.
+
+    :param test: The statistical test chosen. This must be one of the tests available in pyglimmpse.multirep or pyglimmpse.unirep
+    :param rank_C: Rank of the within contrast matrix, for all designs or for each design.
+    :param rank_X: the rank of Es(X), for all designs or for each design.
+    :param relative_group_sizes: a list of ratios of size of the groups in your design, or a list of these for each design.
+    :param alpha: Type one error rate, for all designs or for each design
+    :param sigma_star: Sigma star, or a list of these for each design
+    :param delta_es: (Theta - Theta_0)'M^-1(Theta-Theta_0), or a list of these for each design
+    :param targetPower: The power you wish to achieve, for all designs or for each design
+    :param starting_smallest_group_size: The starting point for the search.
+    :param tolerance: value below which a number is considered zero.
+    :return: total_N, power. An array of total_N and a :class:`pyglimmpse.model.power_batch.PowerBatch`
+        of the power at that total_N, with one element per design, NaN for designs where no samplesize
+        up to the maximum achieves the target power.
+    """
+    plan = BatchPlan(test,
+                     rank_C=rank_C,
+                     rank_X=rank_X,
+                     relative_group_sizes=relative_group_sizes,
+                     alpha=alpha,
+                     sigma_star=sigma_star,
+                     delta_es=delta_es,
+                     tolerance=tolerance)
+    target = np.broadcast_to(np.asarray(targetPower, dtype=float), (plan.size,))
+    max_n = np.minimum(sys.maxsize / plan.rank_X, Constants.MAX_SAMPLE_SIZE.value)
+
+    # lower_n is the largest per group n known to fall short of the target, 0 if none has been found,
+    # and upper_n the smallest known to reach it.
+    lower_n = np.zeros(plan.size)
+    upper_n = np.full(plan.size, np.nan)
+    upper_power = PowerBatch.empty(plan.size)
+
+    # double the per group n until the target is reached
+    n = np.full(plan.size, float(starting_smallest_group_size))
+    active = np.arange(plan.size)
+    while active.size:
+        batch = plan.power(n[active], active)
+        passed = batch.power >= target[active]
+        failed = batch.power < target[active]
+        upper_n[active[passed]] = n[active[passed]]
+        upper_power.data[active[passed]] = batch.data[passed]
+        lower_n[active[failed]] = n[active[failed]]
+        n[active] *= 2
+        active = active[~passed & (n[active] * plan.group_total[active] < max_n[active])]
+
+    # if the first realizable design reached the target it is the answer, as in samplesize
+    lower_n = np.where(lower_n == 0, upper_n - 1, lower_n)
+
+    # bisection on the integer per group n
+    active = np.flatnonzero(upper_n - lower_n > 1)
+    while active.size:
+        n = (lower_n[active] + upper_n[active]) // 2
+        batch = plan.power(n, active)
+        passed = batch.power >= target[active]
+        upper_n[active[passed]] = n[passed]
+        upper_power.data[active[passed]] = batch.data[passed]
+        lower_n[active[~passed]] = n[~passed]
+        active = active[upper_n[active] - lower_n[active] > 1]
+
+    return upper_n * plan.group_total, upper_power
+
+
+def detectable_effect(test,
+                      rank_C: float,
+                      rank_X: float,
+                      relative_group_sizes,
+                      rep_N,
+                      alpha: float,
+                      sigma_star: np.matrix,
+                      delta_es: np.matrix,
+                      targetPower: float,
+                      relative_tolerance=1e-10,
+                      **kwargs):
+    """
+    Get the smallest beta_scalar, the multiplier on Theta - Theta_0, for which a design of the given
+    size reaches the target power. This is the inverse of :func:`samplesize`.
+
+    DELTA scales as beta_scalar ** 2, and so do the eigenvalues of INV(SIGMA star) * DELTA, so the
+    eigenvalues are found once and the search only rescales them. For a list of rep_N the searches run
+    together, each step calculating power for every rep_N still searching in one vectorized call of
+    :func:`pyglimmpse.multirep.multirep_power_array`. The general unirep calculation, and power
+    averaged over a noncentrality distribution, have no vectorized form and are calculated one
+    rep_N at a time.
+
+    :param test: The statistical test chosen. This must be one of the tests available in pyglimmpse.multirep or pyglimmpse.unirep
+    :param rank_C: Rank of the within contrast matrix for your study design.
+    :param rank_X: the rank of Es(X). Where X is your design matrix.
+    :param relative_group_sizes: a list of ratios of size of the groups in your design.
+    :param rep_N: number of times each row of the essence design matrix is repeated, or a list of these.
+    :param alpha: Type one error rate
+    :param sigma_star: Sigma star
+    :param delta_es: (Theta - Theta_0)'M^-1(Theta-Theta_0) for beta_scalar = 1
+    :param targetPower: The power you wish to achieve
+    :param relative_tolerance: the search stops when beta_scalar is known to this relative precision
+    :param kwargs: optional arguments for the test, see :class:`pyglimmpse.plan.CompiledPlan`
+    :return: beta_scalar, Power. For a list of rep_N, an array of beta_scalar and a
+        :class:`pyglimmpse.model.power_batch.PowerBatch`, in the same order.
+    """
+    plan = CompiledPlan(test,
+                        rank_C=rank_C,
+                        rank_X=rank_X,
+                        relative_group_sizes=relative_group_sizes,
+                        alpha=alpha,
+                        sigma_star=sigma_star,
+                        delta_es=delta_es,
+                        **kwargs)
+    rep_N_array = np.atleast_1d(np.asarray(rep_N, dtype=float))
+    total_N = rep_N_array * sum(relative_group_sizes)
+    rank_U = plan.sigma_star.shape[0]
+    tolerance = kwargs.get('tolerance', 1e-12)
+    spectrum = multirep.calc_spectrum(plan.sigma_star, plan.delta_es)
+    if test in router.MULTIREP_TESTS and not kwargs.get('noncentrality_distribution'):
+        kernel = test
+        vectorized = np.full(rep_N_array.shape, True)
+    else:
+        # unirep tests are exact F tests when rank_U == 1, as long as the epsilon estimators are defined
+        kernel = multirep.special
+        vectorized = (total_N - rank_X >= 4) & router.exact_f_applies(test, rank_C, rank_U, **kwargs)
+
+    def scaled_power(beta_scalar, n):
+        return test(rank_C=rank_C,
+                    rank_X=rank_X,
+                    relative_group_sizes=relative_group_sizes,
+                    rep_N=n,
+                    alpha=alpha,
+                    sigma_star=plan.sigma_star,
+                    delta_es=plan.delta_es * beta_scalar ** 2,
+                    **kwargs)
+
+    def power(beta_scalar, index):
+        result = np.full(index.shape, np.nan)
+        fast = vectorized[index]
+        if fast.any():
+            i = index[fast]
+            result[fast] = multirep.multirep_power_array(kernel, rank_C, rank_U, rank_X, total_N[i], rep_N_array[i], alpha,
+                                                         spectrum[None, :] * beta_scalar[fast, None] ** 2, tolerance)[0]
+        for position in np.flatnonzero(~fast):
+            result[position] = scaled_power(beta_scalar[position], rep_N_array[index[position]]).power
+        return result
+
+    # double beta_scalar until the target is reached, then bisect
+    lower = np.zeros(rep_N_array.shape)
+    upper = np.ones(rep_N_array.shape)
+    active = np.arange(rep_N_array.size)
+    while active.size:
+        reached = power(upper[active], active) >= targetPower
+        missed = active[~reached]
+        lower[missed] = upper[missed]
+        upper[missed] *= 2
+        active = missed
+        if np.any(upper[active] > 2 ** 64):
+            raise ValueError('Could not find an effect which achieves the target power with rep_N = {0}. '
+                             'Please check your design.'.format(rep_N_array[active][upper[active] > 2 ** 64]))
+    active = np.flatnonzero(upper - lower > relative_tolerance * upper)
+    while active.size:
+        middle = (lower[active] + upper[active]) / 2
+        reached = power(middle, active) >= targetPower
+        upper[active[reached]] = middle[reached]
+        lower[active[~reached]] = middle[~reached]
+        active = active[upper[active] - lower[active] > relative_tolerance * upper[active]]
+
+    if np.ndim(rep_N) == 0:
+        return float(upper[0]), scaled_power(upper[0], rep_N_array[0])
+    return upper, PowerBatch.from_powers([scaled_power(beta_scalar, n) for beta_scalar, n in zip(upper, rep_N_array)])
+
+
+def _samplesize_for_target(probes, relative_group_sizes, targetPower, starting_smallest_group_size, max_n, target, search):
+    """ total N and power for one target"""
+    # The confidence limits are only calculated when they are read, so the point estimate search is cheap
+    # even if a confidence_interval was given.
+    if search == Constants.SEARCH_PARALLEL:
+        total_N, power = _parallel_samplesize(probes, relative_group_sizes, targetPower, starting_smallest_group_size, max_n)
+    elif search == Constants.SEARCH_NEWTON:
+        total_N, power = _newton_samplesize(probes, relative_group_sizes, targetPower, starting_smallest_group_size, max_n)
+    else:
+        total_N, power = _point_samplesize(probes, relative_group_sizes, targetPower, starting_smallest_group_size, max_n)
+    if target == Constants.TARGET_LOWER_BOUND:
+        return _lower_bound_samplesize(probes, relative_group_sizes, targetPower, total_N, power, max_n)
+    return total_N, power
+
+
+class _PowerProbes:
+    """
+    Power for a :class:`pyglimmpse.plan.CompiledPlan`, remembered for each per group n which has been
+    calculated so that searches for several targets never calculate the same power twice.
+    """
+    def __init__(self, plan):
+        self.plan = plan
+        self.probes = {}
+        self.derivatives = {}
+
+    def power(self, n) -> Power:
+        if n not in self.probes:
+            instrumentation.count('samplesize.power_evaluations')
+            self.probes[n] = self.plan.power(n)
+        return self.probes[n]
+
+    def power_derivative(self, n):
+        """ power and dPower/dn, see :meth:`pyglimmpse.plan.CompiledPlan.power_derivative`"""
+        if n not in self.derivatives:
+            if n in self.probes and self.probes[n] is not None and np.isnan(self.probes[n].power):
+                self.derivatives[n] = None
+            else:
+                instrumentation.count('samplesize.power_evaluations')
+                self.probes[n], self.derivatives[n] = self.plan.power_derivative(n)
+        return self.probes[n], self.derivatives[n]
+
+    def close(self):
+        pass
+
+    def bracket(self, value, target, lower_n, upper_n):
+        """
+        Narrow lower_n < n <= upper_n using the powers already calculated, assuming value(power) is
+        monotone in n. value is a function of a Power, such as its point estimate, which should reach target.
+        """
+        for n, power in self.probes.items():
+            if lower_n < n < upper_n:
+                if value(power) >= target:
+                    upper_n = n
+                else:
+                    lower_n = n
+        return lower_n, upper_n
+
+    def bisect(self, value, target, lower_n, upper_n):
+        """
+        The smallest integer n with lower_n < n <= upper_n for which value(power) >= target,
+        given that it is below target at lower_n and reaches it at upper_n.
+        """
+        lower_n, upper_n = self.bracket(value, target, lower_n, upper_n)
+        while upper_n - lower_n > 1:
+            n = (lower_n + upper_n) // 2
+            if value(self.power(n)) >= target:
+                upper_n = n
+            else:
+                lower_n = n
+        return upper_n
+
+
+class _ParallelProbes(_PowerProbes):
+    """
+    :class:`_PowerProbes` which can also calculate power for several n at once in a pool of worker
+    processes. Each worker builds its own :class:`pyglimmpse.plan.CompiledPlan` from the arguments
+    once, as a plan can not be sent between processes.
+    """
+    def __init__(self, plan, test, arguments, workers=None):
+        super().__init__(plan)
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = futures.ProcessPoolExecutor(max_workers=self.workers,
+                                                    initializer=_start_worker,
+                                                    initargs=(test, arguments))
+
+    def probe_round(self, candidates, targetPower, failed_n, passed_n):
+        """
+        Calculate power for the candidate n concurrently, narrowing failed_n < n <= passed_n as the
+        results arrive. Candidates which can no longer narrow it are cancelled, and the round ends
+        as soon as passed_n - failed_n <= 1. passed_n is None while no n is known to reach the target.
+
+        :return: failed_n, passed_n
+        """
+        pending = {}
+        for n in candidates:
+            if n in self.probes:
+                failed_n, passed_n = _narrow(self.probes[n], n, targetPower, failed_n, passed_n)
+            else:
+                pending[self.executor.submit(_worker_power, n)] = n
+        while pending:
+            done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                n = pending.pop(future)
+                try:
+                    self.probes[n] = future.result()
+                except (GlimmpseValidationException, np.linalg.LinAlgError, ArithmeticError):
+                    # the design is too small at this n, as in _point_samplesize the power is missing
+                    self.probes[n] = Power(np.nan)
+                failed_n, passed_n = _narrow(self.probes[n], n, targetPower, failed_n, passed_n)
+            for future, n in list(pending.items()):
+                if n <= failed_n or (passed_n is not None and (n >= passed_n or passed_n - failed_n <= 1)):
+                    future.cancel()
+                    del pending[future]
+        return failed_n, passed_n
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _narrow(power, n, targetPower, failed_n, passed_n):
+    """ the bracket failed_n < n <= passed_n after learning power at n. Missing power narrows nothing."""
+    if np.isnan(power.power):
+        return failed_n, passed_n
+    if power.power >= targetPower:
+        return failed_n, n if passed_n is None else min(n, passed_n)
+    return max(n, failed_n), passed_n
+
+
+_worker_plan = None
+
+
+def _start_worker(test, arguments):
+    global _worker_plan
+    _worker_plan = CompiledPlan(test, **arguments)
+
+
+def _worker_power(rep_N):
+    return _worker_plan.power(rep_N)
+
+
+def _parallel_samplesize(probes, relative_group_sizes, targetPower, starting_smallest_group_size, max_n):
+    """
+    The smallest total N, and its power, for which the power point estimate reaches targetPower,
+    found with a k-ary search where k is the number of workers.
+
+    Each round of the doubling phase tries the next k doublings of the smallest group size at once,
+    and each round of the search splits the bracket into k + 1 parts, so a search takes about
+    log(k + 1) times fewer rounds than :func:`_point_samplesize`. The answer is the same.
+    """
+    group_total = sum(relative_group_sizes)
+    failed_n, passed_n = 0, None
+    n = starting_smallest_group_size
+    while passed_n is None:
+        candidates = [n * 2 ** i for i in range(probes.workers) if n * 2 ** i * group_total < max_n]
+        if not candidates:
+            raise ValueError('Could not find a samplesize which achieves the target power. Please check your design.')
+        failed_n, passed_n = probes.probe_round(candidates, targetPower, failed_n, passed_n)
+        n = candidates[-1] * 2
+    # the smallest realizable design is the answer if it already reaches the target
+    if not failed_n:
+        return passed_n * group_total, probes.power(passed_n)
+
+    while passed_n - failed_n > 1:
+        gap = passed_n - failed_n
+        candidates = sorted(set(failed_n + max(1, gap * i // (probes.workers + 1)) for i in range(1, probes.workers + 1)))
+        failed_n, passed_n = probes.probe_round([c for c in candidates if c < passed_n], targetPower, failed_n, passed_n)
+    return sum([passed_n * g for g in relative_group_sizes]), probes.power(passed_n)
+
+
+def _point_samplesize(probes, relative_group_sizes, targetPower, starting_smallest_group_size, max_n):
+    """ The smallest total N, and its power, for which the power point estimate reaches targetPower"""
     # declare variables prior to integration
     upper_power = Power()
     lower_power = Power()
@@ -59,13 +462,7 @@ def samplesize(test,
 
         # call power for this sample size
         try:
-            upper_power = test(rank_C=rank_C,
-                               rank_X=rank_X,
-                               relative_group_sizes=relative_group_sizes,
-                               rep_N=upper_bound_smallest_group_size,
-                               alpha=alpha,
-                               sigma_star=sigma_star,
-                               delta_es=delta_es)
+            upper_power = probes.power(upper_bound_smallest_group_size)
             if type(upper_power.power) is str:
                 raise ValueError('Upper power is not calculable. Check that your design is realisable.'
                                  ' Usually the easies way to do this is to increase sample size')
@@ -88,13 +485,7 @@ def samplesize(test,
     upper_bound_smallest_group_size = upper_bound_smallest_group_size / 2
     # note we are using floor division
     lower_bound_smallest_group_size = upper_bound_smallest_group_size//2
-    lower_power = test(rank_C=rank_C,
-                       rank_X=rank_X,
-                       relative_group_sizes=relative_group_sizes,
-                       rep_N=upper_bound_smallest_group_size//2,
-                       alpha=alpha,
-                       sigma_star=sigma_star,
-                       delta_es=delta_es)
+    lower_power = probes.power(upper_bound_smallest_group_size//2)
 
     #
     # At this point we have valid boundaries for searching.
@@ -109,41 +500,113 @@ def samplesize(test,
         total_N = lower_bound_smallest_group_size * sum(relative_group_sizes)
         power = lower_power
     else:
-        f = lambda n: subtrtact_target_power(test(rank_C=rank_C,
-                                                  rank_X=rank_X,
-                                                  relative_group_sizes=relative_group_sizes,
-                                                  rep_N=n,
-                                                  alpha=alpha,
-                                                  sigma_star=sigma_star,
-                                                  delta_es=delta_es,
-                                                  **kwargs),
-                                             targetPower)
-
-        total_per_group_n = math.floor(optimize.bisect(f, lower_bound_smallest_group_size, upper_bound_smallest_group_size))
-        power = test(rank_C=rank_C,
-                     rank_X=rank_X,
-                     relative_group_sizes=relative_group_sizes,
-                     rep_N=total_per_group_n,
-                     alpha=alpha,
-                     sigma_star=sigma_star,
-                     delta_es=delta_es,
-                     **kwargs)
-
-        if (power.power < targetPower) or np.isnan(power.power):
-            total_per_group_n = total_per_group_n + 1
-            power = test(rank_C=rank_C,
-                         rank_X=rank_X,
-                         relative_group_sizes=relative_group_sizes,
-                         rep_N=total_per_group_n,
-                         alpha=alpha,
-                         sigma_star=sigma_star,
-                         delta_es=delta_es,
-                         **kwargs)
-            if power.power < targetPower:
-                raise ValueError('Samplesize cannot be calculated. Please check your design.')
+        total_per_group_n = probes.bisect(lambda p: p.power, targetPower,
+                                          lower_bound_smallest_group_size,
+                                          upper_bound_smallest_group_size)
+        power = probes.power(total_per_group_n)
         total_N = sum([math.ceil(total_per_group_n) * g for g in relative_group_sizes])
     return total_N, power
 
+
+def _newton_samplesize(probes, relative_group_sizes, targetPower, starting_smallest_group_size, max_n):
+    """
+    The smallest total N, and its power, for which the power point estimate reaches targetPower,
+    found with a safeguarded Newton search on the smallest group size.
+
+    Each step solves power(n) = targetPower with the tangent at the last n tried, or the secant
+    through the last two when the derivative is not available, and rounds up. The smallest n known
+    to reach the target and the largest known to fall short are kept, and a step which does not
+    land strictly between them is replaced by bisection, or by doubling while no n reaches the
+    target. The result is the same as :func:`_point_samplesize`, usually in a handful of steps.
+    """
+    group_total = sum(relative_group_sizes)
+    failed_n = 0
+    passed_n = None
+    previous = None
+    n = starting_smallest_group_size
+    while True:
+        try:
+            power, slope = probes.power_derivative(n)
+        except GlimmpseValidationException:
+            # too few error degrees of freedom, as in _point_samplesize the power is missing
+            power, slope = Power(np.nan), None
+        if np.isnan(power.power):
+            if failed_n or passed_n is not None:
+                raise ValueError('Samplesize cannot be calculated. Please check your design.')
+            # not yet realizable, as in _point_samplesize keep doubling
+            n += n
+            if n * group_total >= max_n:
+                raise ValueError('Could not find a samplesize which achieves the target power. Please check your design.')
+            continue
+        if power.power >= targetPower:
+            # the smallest realizable design is the answer if it already reaches the target
+            if not failed_n:
+                return n * group_total, power
+            passed_n = n
+        else:
+            failed_n = n
+        if passed_n is not None and passed_n - failed_n <= 1:
+            break
+
+        if slope is None and previous is not None and previous[0] != n:
+            slope = (power.power - previous[1]) / (n - previous[0])
+        previous = (n, power.power)
+
+        step = None
+        if slope is not None and slope > 0 and np.isfinite(slope):
+            step = math.ceil(n + (targetPower - power.power) / slope)
+            if step == passed_n:
+                # confirm the answer by checking the n just below
+                step = passed_n - 1
+        if passed_n is None:
+            if step is None or step <= failed_n:
+                step = 2 * n
+            if step * group_total >= max_n:
+                step = math.floor(max_n / group_total)
+                if step <= failed_n:
+                    raise ValueError('Could not find a samplesize which achieves the target power. Please check your design.')
+        elif step is None or not failed_n < step < passed_n:
+            step = (failed_n + passed_n) // 2
+        n = step
+
+    return sum([passed_n * g for g in relative_group_sizes]), probes.power(passed_n)
+
+
+def _lower_bound_samplesize(probes, relative_group_sizes, targetPower, total_N, power, max_n):
+    """
+    The smallest total N, and its power, for which the lower confidence limit on power reaches targetPower.
+
+    The lower limit is never above the point estimate, so the search starts from the point estimate
+    sample size total_N. The step from there is doubled until the lower limit reaches the target, and
+    then the per group n is found by bisection, so confidence limits are only calculated near the solution.
+    """
+    group_total = sum(relative_group_sizes)
+    failed_n = int(round(total_N / group_total))
+    if _lower_bound_power(power) >= targetPower:
+        return total_N, power
+
+    step = 1
+    passed_n = failed_n + step
+    passed_power = probes.power(passed_n)
+    while not _lower_bound_power(passed_power) >= targetPower:
+        if passed_n * group_total >= max_n:
+            raise ValueError('Could not find a samplesize for which the lower confidence limit on power '
+                             'achieves the target power. Please check your design.')
+        failed_n = passed_n
+        step += step
+        passed_n = failed_n + step
+        passed_power = probes.power(passed_n)
+
+    passed_n = probes.bisect(_lower_bound_power, targetPower, failed_n, passed_n)
+    return sum([passed_n * g for g in relative_group_sizes]), probes.power(passed_n)
+
+
+def _lower_bound_power(power):
+    """ The lower confidence limit on power, NaN if it is missing"""
+    if power.lower_bound is None or power.lower_bound.power is None:
+        return np.nan
+    return power.lower_bound.power
+
 def _calc_err_sum_square(total_n, rank_x, sigma_star):
     """
     Calculate error sum of squares matrix = nu_e * sigma star
@@ -0,0 +1,352 @@
+"""
+A local HTTP service for power and sample size, which runs concurrent requests for similar designs
+as one vectorized calculation.
+
+    python -m pyglimmpse.server --port 8080 --batch-window-ms 2
+
+POST /power and POST /samplesize take one job, a JSON object in the format read by the
+:mod:`pyglimmpse.cli` command, and answer with its result in the same format. GET /metrics
+reports counters in the Prometheus text format.
+
+Requests which give only the arguments of a design, rank_C, rank_X, relative_group_sizes, alpha,
+sigma_star, delta_es and rep_N or targetPower, are held for up to batch_window seconds. Those for
+the same test and the same shape of design, i.e. the same rank_U and number of groups, are then
+calculated together, by :meth:`pyglimmpse.plan.BatchPlan.power` or
+:func:`pyglimmpse.samplesize.samplesize_batch`, and the results are sent back to each request. A
+batch is also calculated as soon as it has max_batch_size requests. Any other request, e.g. one
+with a confidence_interval, is calculated on its own. The calculations run on a pool of threads,
+so the event loop keeps accepting requests while they run.
+
+At most max_concurrency requests are handled at once, and the others are answered at once with
+503. A job may give "deadline_ms", and otherwise has the server's deadline; a request which is
+not answered by then gets 504.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from concurrent import futures
+
+from pyglimmpse import cli
+from pyglimmpse.constants import Constants
+from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException
+from pyglimmpse.plan import BatchPlan
+from pyglimmpse.samplesize import samplesize_batch
+
+# the arguments of a job which can be calculated in a batch, for each kind of job
+_DESIGN_ARGUMENTS = {'id', 'type', 'test', 'rank_C', 'rank_X', 'relative_group_sizes', 'alpha', 'sigma_star',
+                     'delta_es', 'tolerance'}
+_BATCH_ARGUMENTS = {'power': _DESIGN_ARGUMENTS | {'rep_N'},
+                    'samplesize': _DESIGN_ARGUMENTS | {'targetPower', 'starting_smallest_group_size'}}
+
+_STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error', 503: 'Service Unavailable', 504: 'Gateway Timeout'}
+
+MAX_BODY = 16 * 1024 * 1024
+
+
+class PowerServer(object):
+    """
+    The HTTP service. Start it with :meth:`start` in a running event loop, or run it with :func:`serve`.
+
+    :param host: the address to listen on
+    :param port: the port to listen on, 0 for any free port, see :attr:`port`
+    :param batch_window: seconds a request waits for others to be calculated with it
+    :param max_batch_size: the most requests calculated together
+    :param max_concurrency: the most requests handled at once, further requests are answered with 503
+    :param deadline: seconds allowed for each request, unless the job gives deadline_ms
+    :param workers: threads calculating batches
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8080, batch_window: float = 0.002,
+                 max_batch_size: int = 256, max_concurrency: int = 1024, deadline: float = 30.0, workers: int = 1):
+        if max_batch_size < 1:
+            raise GlimmpseValidationException('max_batch_size must be at least 1.')
+        self.host = host
+        self.port = port
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.deadline = deadline
+        self.workers = workers
+        self.counters = Counter()
+        self.in_flight = 0
+        self._server = None
+        self._executor = None
+        self._pending = {}
+        self._timers = {}
+
+    async def start(self):
+        """ listen for requests. If port is 0, :attr:`port` is then the port chosen"""
+        self._executor = futures.ThreadPoolExecutor(self.workers, thread_name_prefix='pyglimmpse')
+        self._server = await asyncio.start_server(self._connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        """ stop listening, and wait for the calculations which have started"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for key in list(self._pending):
+            self._flush(key)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def run_job(self, kind: str, job: dict) -> dict:
+        """
+        The result of a job, calculated in a batch with other jobs if it can be.
+
+        :param kind: 'power' or 'samplesize'
+        :param job: the job, as in :mod:`pyglimmpse.cli`
+        :raises asyncio.TimeoutError: if the deadline passes first
+        """
+        job = dict(job)
+        deadline = job.pop('deadline_ms', None)
+        deadline = self.deadline if deadline is None else deadline / 1000
+        loop = asyncio.get_running_loop()
+        key = _batch_key(kind, job)
+        if key is None:
+            self.counters['single_jobs'] += 1
+            future = loop.run_in_executor(self._executor, cli.run_job, dict(job, type=job.get('type', kind)))
+        else:
+            future = loop.create_future()
+            pending = self._pending.setdefault(key, [])
+            pending.append((job, future))
+            if len(pending) >= self.max_batch_size:
+                self._flush(key)
+            elif len(pending) == 1:
+                self._timers[key] = loop.call_later(self.batch_window, self._flush, key)
+        return await asyncio.wait_for(future, deadline)
+
+    def _flush(self, key):
+        """ start calculating the batch of requests waiting for key"""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        pending = self._pending.pop(key, None)
+        if not pending:
+            return
+        # requests which passed their deadline while waiting are not calculated
+        pending = [(job, future) for job, future in pending if not future.done()]
+        if not pending:
+            return
+        self.counters['batches'] += 1
+        self.counters['batched_jobs'] += len(pending)
+        started = time.perf_counter()
+        calculation = asyncio.get_running_loop().run_in_executor(self._executor, run_batch, key[0],
+                                                                 [job for job, _ in pending])
+
+        def answer(calculation):
+            self.counters['batch_seconds'] += time.perf_counter() - started
+            if calculation.exception() is not None:
+                results = [calculation.exception()] * len(pending)
+            else:
+                results = calculation.result()
+            for (_, future), result in zip(pending, results):
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        calculation.add_done_callback(answer)
+
+    async def _connection(self, reader, writer):
+        """ answer the requests on one connection, which is kept open between requests for HTTP/1.1"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'malformed request'}, False)
+                    break
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, {'error': 'request body too large'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                status, payload = await self.handle(method, target.split('?', 1)[0], body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle(self, method: str, path: str, body: bytes):
+        """
+        Answer one request.
+
+        :return: status, and the response, a dict sent as JSON or a str sent as text
+        """
+        if path == '/metrics':
+            if method != 'GET':
+                return 405, {'error': 'use GET for /metrics'}
+            return 200, self.metrics()
+        kind = path.strip('/')
+        if kind not in _BATCH_ARGUMENTS:
+            return 404, {'error': 'no such path, use /power, /samplesize or /metrics'}
+        if method != 'POST':
+            return 405, {'error': 'use POST for {0}'.format(path)}
+        self.counters['requests_' + kind] += 1
+        if self.in_flight >= self.max_concurrency:
+            self.counters['rejected'] += 1
+            return 503, {'error': 'too many requests in progress'}
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            job = json.loads(body)
+            if not isinstance(job, dict):
+                raise GlimmpseValidationException('The request must be one JSON object.')
+            return 200, await self.run_job(kind, job)
+        except asyncio.TimeoutError:
+            self.counters['deadline_exceeded'] += 1
+            return 504, {'error': 'the deadline passed before the result was calculated'}
+        except (ValueError, TypeError, KeyError, ArithmeticError, GlimmpseValidationException) as e:
+            return 400, {'error': '{0}: {1}'.format(type(e).__name__, e)}
+        except Exception as e:
+            return 500, {'error': '{0}: {1}'.format(type(e).__name__, e)}
+        finally:
+            self.in_flight -= 1
+            self.counters['request_seconds'] += time.perf_counter() - started
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        self.counters['responses_{0}'.format(status)] += 1
+        if isinstance(payload, str):
+            content_type, body = 'text/plain; version=0.0.4', payload.encode()
+        else:
+            content_type, body = 'application/json', json.dumps(payload, allow_nan=False).encode()
+        head = 'HTTP/1.1 {0} {1}\r\nContent-Type: {2}\r\nContent-Length: {3}\r\nConnection: {4}\r\n\r\n'.format(
+            status, _STATUS[status], content_type, len(body), 'keep-alive' if keep_alive else 'close')
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    def metrics(self) -> str:
+        """ the counters in the Prometheus text format"""
+        counters = self.counters
+        lines = ['# TYPE pyglimmpse_requests_total counter']
+        lines += ['pyglimmpse_requests_total{{kind="{0}"}} {1}'.format(kind, counters['requests_' + kind])
+                  for kind in sorted(_BATCH_ARGUMENTS)]
+        lines.append('# TYPE pyglimmpse_responses_total counter')
+        lines += ['pyglimmpse_responses_total{{status="{0}"}} {1}'.format(name[len('responses_'):], counters[name])
+                  for name in sorted(counters) if name.startswith('responses_')]
+        for name, kind, value in [('batches_total', 'counter', counters['batches']),
+                                  ('batched_jobs_total', 'counter', counters['batched_jobs']),
+                                  ('single_jobs_total', 'counter', counters['single_jobs']),
+                                  ('batch_seconds_total', 'counter', counters['batch_seconds']),
+                                  ('request_seconds_total', 'counter', counters['request_seconds']),
+                                  ('rejected_total', 'counter', counters['rejected']),
+                                  ('deadline_exceeded_total', 'counter', counters['deadline_exceeded']),
+                                  ('in_flight', 'gauge', self.in_flight),
+                                  ('waiting_jobs', 'gauge', sum(len(p) for p in self._pending.values()))]:
+            lines.append('# TYPE pyglimmpse_{0} {1}'.format(name, kind))
+            lines.append('pyglimmpse_{0} {1}'.format(name, value))
+        return '\n'.join(lines) + '\n'
+
+
+def run_batch(kind: str, jobs) -> list:
+    """
+    The results of jobs which share a batch key, calculated together. If that fails, e.g. because
+    one job is invalid, each job is calculated on its own, and the result of a job which fails is
+    its exception.
+    """
+    try:
+        return _batch_results(kind, jobs)
+    except Exception:
+        results = []
+        for job in jobs:
+            try:
+                results.append(cli.run_job(dict(job, type=kind)))
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+def _batch_results(kind, jobs):
+    first = jobs[0]
+    design = dict(rank_C=[job['rank_C'] for job in jobs],
+                  rank_X=[job['rank_X'] for job in jobs],
+                  relative_group_sizes=[job['relative_group_sizes'] for job in jobs],
+                  alpha=[job['alpha'] for job in jobs],
+                  sigma_star=[job['sigma_star'] for job in jobs],
+                  delta_es=[job['delta_es'] for job in jobs],
+                  tolerance=first.get('tolerance', 1e-12))
+    test = cli.TESTS[first['test']]
+    if kind == 'power':
+        powers = BatchPlan(test, **design).power([job['rep_N'] for job in jobs])
+        total_N = None
+    else:
+        total_N, powers = samplesize_batch(test,
+                                           targetPower=[job['targetPower'] for job in jobs],
+                                           starting_smallest_group_size=first.get('starting_smallest_group_size',
+                                                                                  Constants.STARTING_SAMPLE_SIZE.value),
+                                           **design)
+    results = []
+    for i, (job, power) in enumerate(zip(jobs, powers)):
+        result = {'id': job.get('id'), 'type': kind, 'test': job['test']}
+        if total_N is not None:
+            result['total_N'] = cli.json_value(total_N[i])
+        result.update(cli.power_record(power))
+        results.append(result)
+    return results
+
+
+def _batch_key(kind, job):
+    """ the jobs with the same key can be calculated together, None if this job can not"""
+    if not set(job) <= _BATCH_ARGUMENTS[kind] or job.get('type', kind) != kind:
+        return None
+    try:
+        shape = (len(job['sigma_star']), len(job['relative_group_sizes']))
+    except (KeyError, TypeError):
+        return None
+    return (kind, job.get('test'), shape, job.get('tolerance'), job.get('starting_smallest_group_size'))
+
+
+def serve(**kwargs):
+    """ run a :class:`PowerServer` with these arguments until interrupted"""
+    async def run():
+        async with PowerServer(**kwargs) as server:
+            print('pyglimmpse server listening on http://{0}:{1}'.format(server.host, server.port), flush=True)
+            await asyncio.Event().wait()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m pyglimmpse.server', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--batch-window-ms', type=float, default=2, help='milliseconds a request waits for a batch')
+    parser.add_argument('--max-batch-size', type=int, default=256)
+    parser.add_argument('--max-concurrency', type=int, default=1024, help='requests handled at once')
+    parser.add_argument('--deadline', type=float, default=30, help='seconds allowed for each request')
+    parser.add_argument('--workers', type=int, default=1, help='threads calculating batches')
+    args = parser.parse_args(argv)
+    serve(host=args.host, port=args.port, batch_window=args.batch_window_ms / 1000, max_batch_size=args.max_batch_size,
+          max_concurrency=args.max_concurrency, deadline=args.deadline, workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
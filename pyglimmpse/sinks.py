@@ -0,0 +1,284 @@
+"""
+Streaming writers for power results, so that a large sweep never holds all of its results in memory.
+
+    plan = BatchPlan(test, rank_C=..., sigma_star=[...], delta_es=[...])
+    with open_sink('sweep.csv') as sink:
+        write_sweep(plan, rep_N=range(2, 200), sink=sink)
+
+or chunk by chunk, from any calculation:
+
+    with open_sink('results.jsonl', chunk_size=1000) as sink:
+        for rep_N in ...:
+            sink.write(test(rep_N=rep_N, ...), rep_N=rep_N, alpha=0.05)
+
+Each row holds the input scalars given to :meth:`Sink.write`, followed by the fields of
+:class:`pyglimmpse.model.power.Power`: power, noncentrality_parameter and fmethod, the power,
+noncentrality and fmethod of the lower and upper bounds, error_message and the names of the
+diagnostic codes separated by ';'. Rows are buffered and written chunk_size at a time.
+
+CSV and JSON lines are always available. Arrow IPC files and Parquet need pyarrow, and are
+written one record batch, or row group, per chunk.
+"""
+import csv
+import json
+import math
+import os
+
+import numpy as np
+
+from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException
+from pyglimmpse.model.power import Power
+from pyglimmpse.model.power_batch import PowerBatch, diagnostic_codes, _FMETHODS
+
+RESULT_COLUMNS = ['power', 'noncentrality_parameter', 'fmethod',
+                  'lower_power', 'lower_noncentrality', 'lower_fmethod',
+                  'upper_power', 'upper_noncentrality', 'upper_fmethod',
+                  'error_message', 'diagnostics']
+
+# fmethod code to the text written, with None last so that code -1 gives None
+_FMETHOD_VALUES = np.array([member.value for member in _FMETHODS] + [None], dtype=object)
+
+_FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.arrow': 'arrow', '.feather': 'arrow',
+            '.ipc': 'arrow', '.parquet': 'parquet'}
+
+
+class Sink(object):
+    """
+    Base class of the writers. Subclasses implement :meth:`_write_chunk`, and :meth:`_close` if they
+    hold more than the file.
+
+    :param file: path, or file object opened in the mode the format needs
+    :param chunk_size: the number of rows buffered before they are written
+    """
+    binary = False
+
+    def __init__(self, file, chunk_size: int = 10000):
+        if chunk_size < 1:
+            raise GlimmpseValidationException('chunk_size must be at least 1.')
+        if isinstance(file, (str, bytes, os.PathLike)):
+            self.file = open(file, 'wb') if self.binary else open(file, 'w', newline='', encoding='utf-8')
+            self._owns_file = True
+        else:
+            self.file = file
+            self._owns_file = False
+        self.chunk_size = chunk_size
+        self.columns = None
+        self.rows = 0
+        self.chunks = 0
+        self._buffer = []
+        self._buffered = 0
+
+    def write(self, results, **inputs):
+        """
+        Add results to the sink.
+
+        :param results: a :class:`pyglimmpse.model.power_batch.PowerBatch`, a Power or a list of them
+        :param inputs: the input scalars to write with them, each a scalar or an array with one value per result
+        """
+        if isinstance(results, Power):
+            results = [results]
+        if isinstance(results, PowerBatch):
+            error_message = np.full(len(results), None, dtype=object)
+        else:
+            error_message = _object_array([power.error_message for power in results])
+            results = PowerBatch.from_powers(results)
+        size = len(results)
+        if self.columns is None:
+            self.columns = list(inputs) + RESULT_COLUMNS
+        elif list(inputs) + RESULT_COLUMNS != self.columns:
+            raise GlimmpseValidationException('Every write to a sink must give the same inputs.')
+
+        chunk = {name: np.broadcast_to(np.asarray(value), (size,)) for name, value in inputs.items()}
+        chunk.update(_result_columns(results, error_message))
+        # the chunk is split so that no more than chunk_size rows are ever waiting
+        start = 0
+        while start < size:
+            stop = min(size, start + self.chunk_size - self._buffered)
+            self._buffer.append({name: column[start:stop] for name, column in chunk.items()})
+            self._buffered += stop - start
+            start = stop
+            if self._buffered >= self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        """ write the buffered rows"""
+        if self._buffered:
+            columns = {name: np.concatenate([chunk[name] for chunk in self._buffer]) for name in self.columns}
+            self._write_chunk(columns)
+            self.rows += self._buffered
+            self.chunks += 1
+            self._buffer = []
+            self._buffered = 0
+        self.file.flush()
+
+    def close(self):
+        """ write the buffered rows and close the file, if the sink opened it"""
+        self.flush()
+        self._close()
+        if self._owns_file:
+            self.file.close()
+
+    def _write_chunk(self, columns):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CSVSink(Sink):
+    """ comma separated values with a header row. Missing values are written as empty fields"""
+
+    def _write_chunk(self, columns):
+        writer = csv.writer(self.file)
+        if not self.rows:
+            writer.writerow(self.columns)
+        writer.writerows(zip(*[_python_values(columns[name], missing='') for name in self.columns]))
+
+
+class JSONLSink(Sink):
+    """ one JSON object per line. Missing values, including NaN, are written as null"""
+
+    def _write_chunk(self, columns):
+        names = self.columns
+        rows = zip(*[_python_values(columns[name], missing=None) for name in names])
+        self.file.write(''.join(json.dumps(dict(zip(names, row)), allow_nan=False) + '\n' for row in rows))
+
+
+class ArrowSink(Sink):
+    """ Arrow IPC file, one record batch per chunk. Needs pyarrow"""
+    binary = True
+
+    def __init__(self, file, chunk_size: int = 10000):
+        import pyarrow
+        self._pyarrow = pyarrow
+        self._writer = None
+        super().__init__(file, chunk_size)
+
+    def _table(self, columns):
+        pyarrow = self._pyarrow
+        arrays = {}
+        for name in self.columns:
+            column = columns[name]
+            if column.dtype.kind == 'O':
+                # typed, so that a chunk where every value is None has the schema of the others
+                arrays[name] = pyarrow.array([None if v is None else str(v) for v in column.tolist()],
+                                             type=pyarrow.string())
+            else:
+                arrays[name] = pyarrow.array(np.ascontiguousarray(column))
+        return pyarrow.table(arrays)
+
+    def _write_chunk(self, columns):
+        table = self._table(columns)
+        if self._writer is None:
+            self._writer = self._open_writer(table.schema)
+        self._writer.write_table(table)
+
+    def _open_writer(self, schema):
+        return self._pyarrow.ipc.new_file(self.file, schema)
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class ParquetSink(ArrowSink):
+    """ Parquet file, one row group per chunk. Needs pyarrow"""
+
+    def _open_writer(self, schema):
+        import pyarrow.parquet
+        return pyarrow.parquet.ParquetWriter(self.file, schema)
+
+
+_SINKS = {'csv': CSVSink, 'jsonl': JSONLSink, 'arrow': ArrowSink, 'parquet': ParquetSink}
+
+
+def open_sink(path, format: str = None, chunk_size: int = 10000) -> Sink:
+    """
+    A sink writing to path.
+
+    :param path: the file to write
+    :param format: 'csv', 'jsonl', 'arrow' or 'parquet'. Defaults to the one named by the extension of path
+    :param chunk_size: the number of rows buffered before they are written
+    :return: :class:`Sink`
+    """
+    if format is None:
+        format = _FORMATS.get(os.path.splitext(os.fspath(path))[1].lower())
+        if format is None:
+            raise GlimmpseValidationException('The format of {0} can not be told from its extension.'.format(path))
+    if format not in _SINKS:
+        raise GlimmpseValidationException('format must be one of {0}.'.format(', '.join(_SINKS)))
+    return _SINKS[format](path, chunk_size=chunk_size)
+
+
+def write_sweep(plan, rep_N, sink: Sink, chunk_size: int = None) -> int:
+    """
+    Calculate power for every design of a :class:`pyglimmpse.plan.BatchPlan` at every rep_N, and write
+    it to sink, one chunk at a time. Each row holds the design's index and its rank_C, rank_X, alpha,
+    rep_N and total_N.
+
+    :param plan: :class:`pyglimmpse.plan.BatchPlan`
+    :param rep_N: the values of rep_N
+    :param sink: :class:`Sink` to write to
+    :param chunk_size: the number of powers calculated at once, defaults to the sink's chunk_size
+    :return: the number of rows written
+    """
+    rep_N = np.atleast_1d(np.asarray(rep_N, dtype=float))
+    chunk_size = chunk_size or sink.chunk_size
+    total = plan.size * rep_N.size
+    for start in range(0, total, chunk_size):
+        position = np.arange(start, min(total, start + chunk_size))
+        design, n = np.divmod(position, rep_N.size)
+        sink.write(plan.power(rep_N[n], design),
+                   design=design,
+                   rank_C=plan.rank_C[design],
+                   rank_X=plan.rank_X[design],
+                   alpha=plan.alpha[design],
+                   rep_N=rep_N[n],
+                   total_N=rep_N[n] * plan.group_total[design])
+    return total
+
+
+def _result_columns(batch, error_message):
+    """ the RESULT_COLUMNS for a PowerBatch"""
+    data = batch.data
+    masks = data['diagnostics']
+    names = {mask: ';'.join(code.name for code in diagnostic_codes(mask)) for mask in np.unique(masks)}
+    return {'power': data['power'],
+            'noncentrality_parameter': data['noncentrality_parameter'],
+            'fmethod': _FMETHOD_VALUES[data['fmethod']],
+            'lower_power': data['lower_power'],
+            'lower_noncentrality': data['lower_noncentrality'],
+            'lower_fmethod': _FMETHOD_VALUES[data['lower_fmethod']],
+            'upper_power': data['upper_power'],
+            'upper_noncentrality': data['upper_noncentrality'],
+            'upper_fmethod': _FMETHOD_VALUES[data['upper_fmethod']],
+            'error_message': error_message,
+            'diagnostics': _object_array([names[mask] for mask in masks])}
+
+
+def _object_array(values):
+    """ 1-D object array of values"""
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _python_values(column, missing):
+    """ the values of column as Python objects, with None and NaN replaced by missing"""
+    if column.dtype.kind == 'f':
+        nan = np.isnan(column)
+        if not nan.any():
+            return column.tolist()
+        values = column.astype(object)
+        values[nan] = missing
+        return values.tolist()
+    if column.dtype.kind == 'O':
+        return [missing if v is None or (isinstance(v, float) and math.isnan(v)) else v for v in column.tolist()]
+    return column.tolist()
+
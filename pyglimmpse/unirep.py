@@ -1,8 +1,10 @@
+import functools
 import math
-import warnings
 import inspect
 import numpy as np
 
+from pyglimmpse import diagnostics, instrumentation
+from pyglimmpse._arrays import as_array
 from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException
 from pyglimmpse.finv import finv
 
@@ -10,6 +12,7 @@ from pyglimmpse.constants import Constants
 from pyglimmpse.model.epsilon import Epsilon
 from pyglimmpse.model.hypothesis_error import HypothesisError
 from pyglimmpse.model.power import Power
+from pyglimmpse.model.power_batch import PowerBatch
 from pyglimmpse.multirep import calc_properties, __calc_quantile_omega
 from pyglimmpse.probf import probf
 
@@ -57,10 +60,7 @@ def chi_muller(rank_C: float,
                sigma_star: np.matrix,
                delta_es: np.matrix,
                **kwargs) -> Power:
-    epsilon_estimator = _chi_muller_muller_edwards_simpson_taylor_2007
-    if 'epsilon_estimator' in kwargs.keys() and kwargs['epsilon_estimator'] == Constants.EPSILON_MULLER1989:
-        epsilon_estimator = _chi_muller_muller_barton_1989
-    return _unirep_power(epsilon_estimator=epsilon_estimator,
+    return _unirep_power(epsilon_estimator=_resolve_epsilon_estimator(Constants.CM, kwargs.pop('epsilon_estimator', None)),
                          rank_C=rank_C,
                          rank_X=rank_X,
                          relative_group_sizes=relative_group_sizes,
@@ -80,10 +80,7 @@ def geisser_greenhouse(rank_C: float,
                        sigma_star: np.matrix,
                        delta_es: np.matrix,
                        **kwargs):
-    epsilon_estimator = _geisser_greenhouse_muller_edwards_simpson_taylor_2007
-    if 'epsilon_estimator' in kwargs.keys() and kwargs['epsilon_estimator'] == Constants.EPSILON_MULLER1989:
-        epsilon_estimator = _geisser_greenhouse_muller_barton_1989
-    return _unirep_power(epsilon_estimator=epsilon_estimator,
+    return _unirep_power(epsilon_estimator=_resolve_epsilon_estimator(Constants.GG, kwargs.pop('epsilon_estimator', None)),
                          rank_C=rank_C,
                          rank_X=rank_X,
                          relative_group_sizes=relative_group_sizes,
@@ -103,10 +100,7 @@ def hyuhn_feldt(rank_C: float,
                 sigma_star: np.matrix,
                 delta_es: np.matrix,
                 **kwargs):
-    epsilon_estimator = _hyuhn_feldt_muller_edwards_simpson_taylor_2007
-    if 'epsilon_estimator' in kwargs.keys() and kwargs['epsilon_estimator'] == Constants.EPSILON_MULLER1989:
-        epsilon_estimator = _hyuhn_feldt_muller_barton_1989
-    return _unirep_power(epsilon_estimator=epsilon_estimator,
+    return _unirep_power(epsilon_estimator=_resolve_epsilon_estimator(Constants.HF, kwargs.pop('epsilon_estimator', None)),
                          rank_C=rank_C,
                          rank_X=rank_X,
                          relative_group_sizes=relative_group_sizes,
@@ -137,6 +131,7 @@ def box(rank_C: float,
                          unirep_method=Constants.BOX,
                          **kwargs)
 
+@diagnostics.attach
 def _unirep_power(epsilon_estimator,
                   rank_C: float,
                   rank_X: float,
@@ -147,28 +142,30 @@ def _unirep_power(epsilon_estimator,
                   delta_es: np.matrix,
                   unirep_method,
                   **kwargs):
+    sigma_star = as_array(sigma_star)
     error_sum_square, hypo_sum_square, rank_U, total_N = calc_properties(delta_es=delta_es,
                                                                                rank_X=rank_X,
                                                                                relative_group_sizes=relative_group_sizes,
                                                                                rep_N=rep_N,
                                                                                sigma_star=sigma_star)
-    if len(inspect.signature(epsilon_estimator).parameters) == 0:
-        expected_epsilon = epsilon_estimator()
-    elif len(inspect.signature(epsilon_estimator).parameters) == 1:
-        expected_epsilon = epsilon_estimator(rank_U=rank_U)
-    else:
-        expected_epsilon = epsilon_estimator(sigma_star=sigma_star, rank_U=rank_U, total_N=total_N, rank_X=rank_X)
+    expected_epsilon = _bind_epsilon_estimator(epsilon_estimator)(sigma_star=sigma_star,
+                                                                  rank_U=rank_U,
+                                                                  total_N=total_N,
+                                                                  rank_X=rank_X)
     epsilon = _calc_epsilon(sigma_star, rank_U)
     power = Power(power='Not Calculable.')
 
     sigma_source = Constants.SIGMA_KNOWN
 
-    confidence_interval = None
-    if 'confidence_interval' in kwargs.keys():
-        confidence_interval = kwargs['confidence_interval']
-    if confidence_interval:
+    if kwargs.get('confidence_interval'):
         sigma_source = Constants.SIGMA_ESTIMATED
 
+    internal_pilot = kwargs.get('internal_pilot')
+    if internal_pilot and internal_pilot.ip_plan:
+        if sigma_source == Constants.SIGMA_ESTIMATED:
+            raise GlimmpseValidationException('ERROR 91: SIGMA must be known when planning an internal pilot.')
+        sigma_source = Constants.INTERNAL_PILOT
+
     if sigma_source == Constants.SIGMA_KNOWN:
         power = _unirep_power_known_sigma(rank_C=rank_C,
                                           rank_U=rank_U,
@@ -196,9 +193,6 @@ def _unirep_power(epsilon_estimator,
                                               **kwargs)
 
     if sigma_source == Constants.INTERNAL_PILOT:
-        # get the eigenvalues of sigma_star using a singular value decomposition
-        # sigmastareval is an array of dimension 1 x b
-        sigmastareval = np.linalg.svd(sigma_star, full_matrices=False, compute_uv=False, hermitian=True)
         power = _unirep_power_known_sigma_internal_pilot(rank_C,
                                                          rank_U,
                                                          total_N,
@@ -206,14 +200,89 @@ def _unirep_power(epsilon_estimator,
                                                          sigma_star,
                                                          hypo_sum_square,
                                                          expected_epsilon,
-                                                         epsilon,
+                                                         epsilon.eps,
                                                          alpha,
-                                                         sigmastareval,
+                                                         _sigma_star_eigenvalues(sigma_star),
                                                          unirep_method,
                                                          **kwargs)
     return power
 
 
+@diagnostics.attach
+def internal_pilot_power_sweep(test,
+                               rank_C: float,
+                               rank_X: float,
+                               relative_group_sizes,
+                               rep_N: float,
+                               alpha: float,
+                               sigma_star: np.matrix,
+                               delta_es: np.matrix,
+                               n_ip,
+                               rank_ip: float,
+                               epsilon_estimator=None,
+                               **kwargs):
+    """
+    Calculate internal pilot power for a unirep test for each of several internal pilot sizes.
+
+    Everything which does not depend on the size of the internal pilot, including the eigenvalues
+    of SIGMA star, their moment sums, the expected value of epsilon and the critical value, is
+    calculated once and shared by every element of n_ip.
+
+    Parameters
+    ----------
+    test
+        One of the unirep tests: uncorrected, chi_muller, geisser_greenhouse, hyuhn_feldt or box
+    rank_C: float
+        rank of the C matrix
+    rank_X: float
+        rank of the X matrix
+    relative_group_sizes
+        a list of ratios of size of the groups in your design.
+    rep_N: float
+        number of times each row of the essence design matrix is repeated
+    alpha: float
+        Significance level for target GLUM test
+    sigma_star: np.matrix
+        U` * SIGMA * U
+    delta_es: np.matrix
+        (Theta - Theta_0)`M^-1(Theta-Theta_0)
+    n_ip
+        list of total N for the internal pilot study
+    rank_ip: float
+        rank of the design matrix used in the internal pilot study
+    epsilon_estimator:
+        Constants.EPSILON_MULLER1989 or Constants.EPSILON_MULLER2004
+
+    Returns
+    -------
+    powers: :class:`pyglimmpse.model.power_batch.PowerBatch`
+        power for each element of n_ip
+    """
+    if test not in _UNIREP_METHODS:
+        raise GlimmpseValidationException('Internal pilot power can only be calculated for the unirep tests.')
+    unirep_method = _UNIREP_METHODS[test]
+    n_ip = np.atleast_1d(n_ip)
+    if np.any(n_ip <= rank_ip):
+        raise GlimmpseValidationException('ERROR 90: N_IP must > RANK_IP')
+
+    sigma_star = as_array(sigma_star)
+    error_sum_square, hypo_sum_square, rank_U, total_N = calc_properties(delta_es=delta_es,
+                                                                         rank_X=rank_X,
+                                                                         relative_group_sizes=relative_group_sizes,
+                                                                         rep_N=rep_N,
+                                                                         sigma_star=sigma_star)
+    estimator = _bind_epsilon_estimator(_resolve_epsilon_estimator(unirep_method, epsilon_estimator))
+    expected_epsilon = estimator(sigma_star=sigma_star, rank_U=rank_U, total_N=total_N, rank_X=rank_X)
+    epsilon = _calc_epsilon(sigma_star, rank_U)
+    undf1, undf2 = _calc_undf1_undf2(unirep_method, expected_epsilon, total_N - rank_X, rank_C, rank_U)
+    hypothesis_error = HypothesisError(hypo_sum_square, sigma_star, rank_U)
+    moment_sums = _internal_pilot_moment_sums(_sigma_star_eigenvalues(sigma_star))
+    return PowerBatch.from_powers(_internal_pilot_powers(unirep_method, expected_epsilon, epsilon.eps,
+                                                         hypothesis_error, moment_sums, rank_C, rank_U, undf1, undf2,
+                                                         alpha, n_ip, rank_ip))
+
+
+@instrumentation.timed('unirep_power_known_sigma')
 def _unirep_power_known_sigma(rank_C,
                               rank_U,
                               total_N,
@@ -224,6 +293,9 @@ def _unirep_power_known_sigma(rank_C,
                               epsilon,
                               alpha,
                               unirep_method,
+                              approximation_method=Constants.UCDF_MULLER2004_APPROXIMATION,
+                              noncentrality_distribution=None,
+                              quantile=None,
                               **kwargs):
     """
     This function calculates power for univariate repeated measures power calculations with known Sigma.
@@ -275,21 +347,7 @@ def _unirep_power_known_sigma(rank_C,
     power: Power
         power for the univariate test.
     """
-    # optional_args = __process_optional_args(**kwargs)
-    approximation_method = Constants.UCDF_MULLER2004_APPROXIMATION
-    noncentrality_dist = None
-    quantile = None
-    tolerance = 1e-12
-    for key, value in kwargs.items():
-        if key == 'approximation_method':
-            approximation_method = value
-        if key == 'noncentrality_distribution':
-            noncentrality_dist = value
-        if key == 'quantile':
-            quantile = value
-        if key == 'tolerance':
-            tolerance = value
-
+    noncentrality_dist = noncentrality_distribution
     nue = total_N - rank_X
     undf1, undf2 = _calc_undf1_undf2(unirep_method, expected_epsilon, nue, rank_C, rank_U)
     # Create defaults - same for either SIGMA known or estimated
@@ -323,6 +381,7 @@ def _get_cl_type(confidence_interval):
         cl_type = Constants.CLTYPE_DESIRED_ESTIMATE
     return cl_type
 
+@instrumentation.timed('unirep_power_estimated_sigma')
 def _unirep_power_estimated_sigma(rank_C,
                                   rank_U,
                                   total_N,
@@ -333,6 +392,9 @@ def _unirep_power_estimated_sigma(rank_C,
                                   epsilon,
                                   alpha,
                                   unirep_method,
+                                  approximation_method=Constants.UCDF_MULLER2004_APPROXIMATION,
+                                  confidence_interval=None,
+                                  tolerance=1e-12,
                                   **kwargs):
     """
     This function calculates power for univariate repeated measures power calculations with known Sigma.
@@ -394,23 +456,6 @@ def _unirep_power_estimated_sigma(rank_C,
     power: Power
         power for the univariate test.
     """
-    approximation_method = Constants.UCDF_MULLER2004_APPROXIMATION
-    confidence_interval = None
-    noncentrality_dist = None
-    quantile = None
-    tolerance = 1e-12
-    for key, value in kwargs.items():
-        if key == 'approximation_method':
-            approximation_method = value
-        if key == 'confidence_interval':
-            confidence_interval = value
-        if key == 'noncentrality_distribution':
-            noncentrality_dist = value
-        if key == 'quantile':
-            quantile = value
-        if key == 'tolerance':
-            tolerance = value
-
     # optional_args = __process_optional_args(**kwargs)
     # E = SIGMASTAR # (N - rX)
     nue = total_N - rank_X
@@ -455,6 +500,7 @@ def _unirep_power_estimated_sigma(rank_C,
     return power
 
 
+@instrumentation.timed('unirep_power_internal_pilot')
 def _unirep_power_known_sigma_internal_pilot(rank_C,
                                              rank_U,
                                              total_N,
@@ -466,6 +512,8 @@ def _unirep_power_known_sigma_internal_pilot(rank_C,
                                              alpha,
                                              sigmastareval,
                                              unirep_method,
+                                             approximation_method=Constants.UCDF_MULLER2004_APPROXIMATION,
+                                             internal_pilot=None,
                                              **kwargs):
     """
     This function calculates power for univariate repeated measures power calculations with known Sigma.
@@ -515,50 +563,92 @@ def _unirep_power_known_sigma_internal_pilot(rank_C,
         eigenvalues  of SIGMASTAR=U`*SIGMA*U
     sigmastarevec:
         eigenvectors of SIGMASTAR=U`*SIGMA*U
-    n_ip
-        total N from internal pilot study
-    rank_ip
-        rank of WHAT??? in internal pilot
+    internal_pilot
+        :class:`pyglimmpse.input.IP` with n_ip, the total N from the internal pilot study,
+        and rank_ip, the rank of the design matrix of the internal pilot study
 
     Returns
     -------
     power: Power
         power for the univariate test.
     """
-    approximation_method = Constants.UCDF_MULLER2004_APPROXIMATION
-    internal_pilot = None
-    noncentrality_dist = None
-    quantile = None
-    tolerance = 1e-12
-    for key, value in kwargs.items():
-        if key == 'approximation_method':
-            approximation_method = value
-        if key == 'internal_pilot':
-            internal_pilot = value
-        if key == 'noncentrality_distribution':
-            noncentrality_dist = value
-        if key == 'quantile':
-            quantile = value
-        if key == 'tolerance':
-            tolerance = value
     # optional_args = __process_optional_args(**kwargs)
     # E = SIGMASTAR # (N - rX)
     nue = total_N - rank_X
     undf1, undf2 = _calc_undf1_undf2(unirep_method, expected_epsilon, nue, rank_C, rank_U)
     # Create defaults - same for either SIGMA known or estimated
     hypothesis_error = HypothesisError(hypo_sum_square, sigma_star, rank_U)
-    e_1_2, e_3_5, e_4 = _calc_multipliers_internal_pilot(unirep_method, expected_epsilon, epsilon, hypothesis_error, sigmastareval, rank_C, rank_U, internal_pilot.n_ip, internal_pilot.rank_ip)
+    moment_sums = _internal_pilot_moment_sums(sigmastareval)
+    return _internal_pilot_powers(unirep_method, expected_epsilon, epsilon, hypothesis_error, moment_sums,
+                                  rank_C, rank_U, undf1, undf2, alpha,
+                                  [internal_pilot.n_ip], internal_pilot.rank_ip)[0]
+
 
+def _internal_pilot_powers(unirep_method, expected_epsilon, eps, hypothesis_error, moment_sums,
+                           rank_C, rank_U, undf1, undf2, alpha, n_ip, rank_ip):
+    """ Internal pilot power for each element of n_ip. Only E_3_5, and so omega, depends on n_ip."""
     # Error checking
-    e_1_2 = _err_checking(e_1_2, rank_U)
-    omega = e_3_5 * hypothesis_error.q2 / hypothesis_error.lambar
+    e_1_2 = _err_checking(expected_epsilon, rank_U)
     fcrit = finv(1 - alpha, undf1 * e_1_2, undf2 * e_1_2)
 
-    df1, df2, power = _calc_power_muller_approx(undf1, undf2, omega, alpha, e_3_5, e_4, fcrit)
+    powers = []
+    for n in n_ip:
+        _, e_3_5, e_4 = _calc_multipliers_internal_pilot(unirep_method, expected_epsilon, eps, hypothesis_error,
+                                                         moment_sums, rank_C, rank_U, n, rank_ip)
+        omega = e_3_5 * hypothesis_error.q2 / hypothesis_error.lambar
+        df1, df2, power = _calc_power_muller_approx(undf1, undf2, omega, alpha, e_3_5, e_4, fcrit)
+        powers.append(Power(power, omega, Constants.INTERNAL_PILOT))
+    return powers
 
-    power = Power(power, omega, Constants.BOX)
 
-    return power
+_UNIREP_METHODS = {uncorrected: Constants.UN,
+                    chi_muller: Constants.CM,
+                    geisser_greenhouse: Constants.GG,
+                    hyuhn_feldt: Constants.HF,
+                    box: Constants.BOX}
+
+
+def _resolve_epsilon_estimator(unirep_method, epsilon_estimator=None):
+    """
+    Choose the approximator of the expected value of epsilon for a unirep test.
+
+    Parameters
+    ----------
+    unirep_method:
+        one of Constants.UN, Constants.CM, Constants.GG, Constants.HF or Constants.BOX
+    epsilon_estimator:
+        Constants.EPSILON_MULLER1989 or Constants.EPSILON_MULLER2004. Muller, Edwards, Simpson and Taylor 2007
+        is used unless Constants.EPSILON_MULLER1989 is given.
+
+    Returns
+    -------
+    epsilon_estimator: function
+        the approximator of the expected value of epsilon
+    """
+    muller_barton = epsilon_estimator == Constants.EPSILON_MULLER1989
+    if unirep_method == Constants.CM:
+        return _chi_muller_muller_barton_1989 if muller_barton else _chi_muller_muller_edwards_simpson_taylor_2007
+    if unirep_method == Constants.GG:
+        return _geisser_greenhouse_muller_barton_1989 if muller_barton else _geisser_greenhouse_muller_edwards_simpson_taylor_2007
+    if unirep_method == Constants.HF:
+        return _hyuhn_feldt_muller_barton_1989 if muller_barton else _hyuhn_feldt_muller_edwards_simpson_taylor_2007
+    if unirep_method == Constants.BOX:
+        return _box
+    return _uncorrected
+
+
+@functools.lru_cache(maxsize=None)
+def _bind_epsilon_estimator(epsilon_estimator):
+    """
+    Wrap an approximator of the expected value of epsilon so that it can always be called with
+    sigma_star, rank_U, total_N and rank_X. The signature is only inspected the first time.
+    """
+    n_parameters = len(inspect.signature(epsilon_estimator).parameters)
+    if n_parameters == 0:
+        return lambda sigma_star, rank_U, total_N, rank_X: epsilon_estimator()
+    elif n_parameters == 1:
+        return lambda sigma_star, rank_U, total_N, rank_X: epsilon_estimator(rank_U=rank_U)
+    return epsilon_estimator
 
 
 def _uncorrected():
@@ -772,6 +862,7 @@ def _box(rank_U: float):
     return expected_epsilon
 
 
+@instrumentation.timed('calc_epsilon')
 def _calc_epsilon(sigma_star: np.matrix, rank_U: float) -> Epsilon:
     """
     This module produces matrices required for Geisser-Greenhouse,
@@ -848,8 +939,8 @@ def _calc_g_1(epsilon, f_i, f_ii):
     else:
         t2 = np.multiply(np.multiply(f_i, epsilon.deigval), epsilon.mtp)
         t3 = np.multiply(epsilon.deigval, epsilon.mtp)
-        tm1 = t2 * t3.T
-        t4 = epsilon.deigval * np.full((1, epsilon.d), 1)
+        tm1 = t2 @ t3.T
+        t4 = epsilon.deigval @ np.full((1, epsilon.d), 1)
         tm2 = t4 - t4.T
         tm2inv = 1 / (tm2 + np.identity(epsilon.d)) - np.identity(epsilon.d)
         tm3 = np.multiply(tm1, tm2inv)
@@ -1084,21 +1175,36 @@ def _calc_multipliers_est_sigma(unirep_method, eps, hypothesis_error, nue, rank_
     return cl1df, e_1_2, e_3_5, e_4, omegaua
 
 
-def _calc_multipliers_internal_pilot(unirep_method, exeps, eps, hypothesis_error, sigmastareval, rank_C, rank_U, n_ip, rank_ip):
+def _sigma_star_eigenvalues(sigma_star):
+    """ eigenvalues of SIGMA star, from a singular value decomposition, as a b x 1 column"""
+    sigmastareval = np.linalg.svd(sigma_star, full_matrices=False, compute_uv=False, hermitian=True)
+    return sigmastareval.reshape(-1, 1)
+
+
+def _internal_pilot_moment_sums(sigmastareval):
+    """
+    Sums of the first four powers of the eigenvalues of SIGMA star, as a 4 x 1 column, and the sum
+    over all pairs of eigenvalues. These do not depend on the internal pilot size.
+    """
+    sigmastareval = np.asarray(sigmastareval, dtype=float).reshape(-1, 1)
+    lambdap = np.concatenate((sigmastareval,
+                              np.power(sigmastareval, 2),
+                              np.power(sigmastareval, 3),
+                              np.power(sigmastareval, 4)), axis=1)
+    sumlam = np.sum(lambdap, axis=0).reshape(-1, 1)
+    return sumlam, np.sum(sigmastareval @ sigmastareval.T)
+
+
+def _calc_multipliers_internal_pilot(unirep_method, exeps, eps, hypothesis_error, moment_sums, rank_C, rank_U, n_ip, rank_ip):
     nu_ip = n_ip - rank_ip
     e_1_2 = exeps
     e_4 = eps
 
     if unirep_method == Constants.HF or unirep_method == Constants.CM or unirep_method == Constants.GG:
-        lambdap = np.concatenate((sigmastareval,
-                                  np.power(sigmastareval, 2),
-                                  np.power(sigmastareval, 3),
-                                  np.power(sigmastareval, 4)), axis=1)
-        sumlam = np.matrix(np.sum(lambdap, axis=0)).T
-        kappa = np.multiply(np.multiply(np.matrix([[1], [2], [8], [48]]), nu_ip), sumlam)
-        muprime2 = np.asscalar(kappa[1] + np.power(kappa[0], 2))
-        meanq2 = np.asscalar(np.multiply(np.multiply(nu_ip, nu_ip + 1), sumlam[1]) + np.multiply(nu_ip, np.sum(
-            sigmastareval * sigmastareval.T)))
+        sumlam, sum_pairs = moment_sums
+        kappa = np.multiply(np.multiply(np.array([[1], [2], [8], [48]]), nu_ip), sumlam)
+        muprime2 = (kappa[1] + np.power(kappa[0], 2)).item()
+        meanq2 = (np.multiply(np.multiply(nu_ip, nu_ip + 1), sumlam[1]) + np.multiply(nu_ip, sum_pairs)).item()
 
         et1 = muprime2 / np.power(nu_ip, 2)
         et2 = meanq2 / np.power(nu_ip, 2)
@@ -1128,8 +1234,7 @@ def _calc_power_muller_approx(undf1, undf2, omega, alpha, e_3_5, e_4, fcrit):
 
 def _calc_undf1_undf2(unirep_method, exeps, nue, rank_C, rank_U):
     if rank_U > nue and (unirep_method == Constants.UN or unirep_method == Constants.GG or unirep_method == Constants.BOX):
-        warnings.warn('Power is missing, because Uncorrected, Geisser-Greenhouse and Box tests are '
-                      'poorly behaved (super low power and test size) when B > N-R, i.e., HDLSS.')
+        diagnostics.record(Constants.WARN_HDLSS)
         '''During the sample size searching process, the smaller sample size can raise this error but we dont want to 
         stop searching '''
         # raise GlimmpseValidationException('Power is missing, because Uncorrected, Geisser-Greenhouse and Box tests are'
@@ -1144,10 +1249,10 @@ def _calc_undf1_undf2(unirep_method, exeps, nue, rank_C, rank_U):
 def _err_checking(e_1_2, rank_U):
     if e_1_2 < 1 / rank_U:
         e_1_2 = 1 / rank_U
-        warnings.warn('PowerWarn17: The approximate expected value of estimated epsilon was truncated up to 1/B.')
+        diagnostics.record(Constants.WARN_EPSILON_TRUNCATED_UP)
     if e_1_2 > 1:
         e_1_2 = 1
-        warnings.warn('PowerWarn18: The approximate expected value of estimated epsilon was truncated down to 1.')
+        diagnostics.record(Constants.WARN_EPSILON_TRUNCATED_DOWN)
 
     return e_1_2
 
@@ -5,21 +5,30 @@ from pyglimmpse.constants import Constants
 from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException
 
 
+def validate(CL=None, Option=None, Scalar=None, CalcMethod=None, IP=None):
+    """
+    Runs every pre-calculation validation check once. Throws exceptions if any fail.
+    Each of the inputs is optional and the checks which need a missing input are skipped.
+
+    :param CL: :class:`pyglimmpse.input.CL`
+    :param Option: :class:`pyglimmpse.input.Option`
+    :param Scalar: :class:`pyglimmpse.input.Scalar`
+    :param CalcMethod: :class:`pyglimmpse.input.CalcMethod`
+    :param IP: :class:`pyglimmpse.input.IP`
+    """
+    _check_options(CL, Option)
+    _check_repn(Scalar, Option)
+    _check_parameters(Scalar)
+    _check_approximations(CalcMethod)
+    _check_internal_pilot(CL, IP)
+
+
 def check_options( function ):
     """ validates the options """
 
     @functools.wraps( function )
     def check_options_wrapper( **kwargs ):
-        CL = None
-        Option = None
-        for key, value in kwargs.items():
-            if key == 'CL':
-                CL = value
-            if key == 'Option':
-                Option = value
-
-        if CL and Option and CL.cl_type == Constants.CLTYPE_NOT_DESIRED and Option.opt_noncencl:
-            raise GlimmpseValidationException("ERROR 83: NONCENCL is not a valid option when CL not desired.")
+        _check_options(kwargs.get('CL'), kwargs.get('Option'))
         return function( **kwargs )
     return check_options_wrapper
 
@@ -28,20 +37,7 @@ def repn_positive( function ):
 
     @functools.wraps( function )
     def repn_positive_wrapper ( **kwargs ):
-        Scalar = None
-        Option = None
-        for key, value in kwargs.items():
-            if key == 'Scalar':
-                Scalar = value
-            if key == 'Option':
-                Option = value
-        # Check repn
-        if Scalar and Scalar.rep_n <= Scalar.tolerance:
-            raise GlimmpseValidationException('ERROR 10: All REPN values must be > TOLERANCE > 0.')
-
-        if Scalar and Option and Option.opt_fracrepn and Scalar.rep_n % 1 != 1:
-            raise GlimmpseValidationException('ERROR 11: All REPN values must be positive integers. To allow fractional REPN values, '
-                            'specify opt_fracrepn')
+        _check_repn(kwargs.get('Scalar'), kwargs.get('Option'))
         return function(**kwargs)
     return repn_positive_wrapper
 
@@ -51,28 +47,9 @@ def parameters_positive(function):
 
     @functools.wraps(function)
     def parameters_positive_wrapper(**kwargs):
-        Scalar = None
-        for key, value in kwargs.items():
-            if key == 'Scalar':
-                Scalar = value
-
-        if Scalar:
-            # Check sigscal
-            if Scalar.sigma_scalar <= Scalar.tolerance:
-                raise GlimmpseValidationException('ERROR 12: All SIGSCAL values must be > TOLERANCE > 0.')
-
-            # Check alpha
-            if Scalar.alpha <= Scalar.tolerance or Scalar.alpha >= 1:
-                raise GlimmpseValidationException('ERROR 13: All ALPHA values must be > TOLERANCE > 0 and < 1.')
-
-            # Check tolerance
-            if Scalar.tolerance <= 0:
-                raise GlimmpseValidationException('ERROR 17: User specified TOLERANCE <= zero.')
-            if Scalar.tolerance >= 0.01:
-                raise GlimmpseValidationException('WARNING 6: User specified TOLERANCE >= 0.01. This is the value assumed to be numeric '
-                                'zero and affects many calculations. Please check that this value is correct.')
-            return function(**kwargs)
-        return parameters_positive_wrapper
+        _check_parameters(kwargs.get('Scalar'))
+        return function(**kwargs)
+    return parameters_positive_wrapper
 
 
 def valid_approximations(function):
@@ -80,20 +57,7 @@ def valid_approximations(function):
 
     @functools.wraps(function)
     def valid_approximation_wrapper(**kwargs):
-        CalcMethod = None
-        for key, value in kwargs.items():
-            if key == 'CalcMethod':
-                CalcMethod = value
-        if CalcMethod.UnirepUncorrected == Constants.UCDF_MULLER1989_APPROXIMATION or \
-                        CalcMethod.UnirepHuynhFeldt == Constants.UCDF_MULLER1989_APPROXIMATION or \
-                        CalcMethod.UnirepHuynhFeldtChiMuller == Constants.UCDF_MULLER1989_APPROXIMATION or \
-                        CalcMethod.UnirepGeisserGreenhouse == Constants.UCDF_MULLER1989_APPROXIMATION or \
-                        CalcMethod.UnirepBox == Constants.UCDF_MULLER1989_APPROXIMATION:
-            warnings.warn('WARNING 7: You have chosen the Muller, Barton (1989) approximation for the UNIREP '
-                          'statistic CDF. Muller, Edwards, Taylor (2004) found NO condition where their approximation '
-                          'was not superior to this Muller, Barton approximation.  Suggest specifying '
-                          'UCDF_MULLER2004_APPROXIMATION; '
-                          'unless you are performing a backwards comparison calculation.')
+        _check_approximations(kwargs.get('CalcMethod'))
         return function(**kwargs)
     return valid_approximation_wrapper
 
@@ -103,14 +67,58 @@ def valid_internal_pilot(function):
 
     @functools.wraps(function)
     def valid_internal_pilot_wrapper(**kwargs):
-        CL = None
-        for key, value in kwargs.items():
-            if key == 'CL':
-                CL = value
-            if key == 'IP':
-                IP = value
-        # Check IP_PLAN and SIGTYPE
-        if IP.ip_plan and CL.sigma_type:
-            raise GlimmpseValidationException('ERROR 91: SIGMA must be known when planning an internal pilot.')
+        _check_internal_pilot(kwargs.get('CL'), kwargs.get('IP'))
         return function(**kwargs)
-    return valid_internal_pilot_wrapper
\ No newline at end of file
+    return valid_internal_pilot_wrapper
+
+
+def _check_options(CL, Option):
+    if CL and Option and CL.cl_type == Constants.CLTYPE_NOT_DESIRED and Option.opt_noncencl:
+        raise GlimmpseValidationException("ERROR 83: NONCENCL is not a valid option when CL not desired.")
+
+
+def _check_repn(Scalar, Option):
+    # Check repn
+    if Scalar and Scalar.rep_n <= Scalar.tolerance:
+        raise GlimmpseValidationException('ERROR 10: All REPN values must be > TOLERANCE > 0.')
+
+    if Scalar and Option and not Option.opt_fracrepn and Scalar.rep_n % 1 != 0:
+        raise GlimmpseValidationException('ERROR 11: All REPN values must be positive integers. To allow fractional REPN values, '
+                        'specify opt_fracrepn')
+
+
+def _check_parameters(Scalar):
+    if Scalar:
+        # Check sigscal
+        if Scalar.sigma_scalar <= Scalar.tolerance:
+            raise GlimmpseValidationException('ERROR 12: All SIGSCAL values must be > TOLERANCE > 0.')
+
+        # Check alpha
+        if Scalar.alpha <= Scalar.tolerance or Scalar.alpha >= 1:
+            raise GlimmpseValidationException('ERROR 13: All ALPHA values must be > TOLERANCE > 0 and < 1.')
+
+        # Check tolerance
+        if Scalar.tolerance <= 0:
+            raise GlimmpseValidationException('ERROR 17: User specified TOLERANCE <= zero.')
+        if Scalar.tolerance >= 0.01:
+            raise GlimmpseValidationException('WARNING 6: User specified TOLERANCE >= 0.01. This is the value assumed to be numeric '
+                            'zero and affects many calculations. Please check that this value is correct.')
+
+
+def _check_approximations(CalcMethod):
+    if CalcMethod and (CalcMethod.UnirepUncorrected == Constants.UCDF_MULLER1989_APPROXIMATION or
+                       CalcMethod.UnirepHuynhFeldt == Constants.UCDF_MULLER1989_APPROXIMATION or
+                       CalcMethod.UnirepHuynhFeldtChiMuller == Constants.UCDF_MULLER1989_APPROXIMATION or
+                       CalcMethod.UnirepGeisserGreenhouse == Constants.UCDF_MULLER1989_APPROXIMATION or
+                       CalcMethod.UnirepBox == Constants.UCDF_MULLER1989_APPROXIMATION):
+        warnings.warn('WARNING 7: You have chosen the Muller, Barton (1989) approximation for the UNIREP '
+                      'statistic CDF. Muller, Edwards, Taylor (2004) found NO condition where their approximation '
+                      'was not superior to this Muller, Barton approximation.  Suggest specifying '
+                      'UCDF_MULLER2004_APPROXIMATION; '
+                      'unless you are performing a backwards comparison calculation.')
+
+
+def _check_internal_pilot(CL, IP):
+    # Check IP_PLAN and SIGTYPE
+    if IP and CL and IP.ip_plan and CL.sigma_type:
+        raise GlimmpseValidationException('ERROR 91: SIGMA must be known when planning an internal pilot.')
@@ -1,9 +1,16 @@
+import re
+
 import setuptools
 
+with open('pyglimmpse/__init__.py') as f:
+    version = re.search(r'^__version__ = "(.*)"', f.read(), re.M).group(1)
+
 setuptools.setup(
     name='pyglimmpse',
-    version="0.0.33",
-    packages=setuptools.find_packages(exclude=['tests*']),
+    version=version,
+    packages=setuptools.find_packages(exclude=['tests*', 'benchmarks*']),
     include_package_data=True,
+    python_requires='>=3.9',
     install_requires=['scipy', 'numpy'],
-)
\ No newline at end of file
+    entry_points={'console_scripts': ['pyglimmpse = pyglimmpse.cli:main']},
+)
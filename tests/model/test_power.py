@@ -1,9 +1,12 @@
 from unittest import TestCase
+from unittest.mock import patch
 
-from pyglimmpse.finv import finv
+import numpy as np
+
+from pyglimmpse.finv import finv, finv_array
 
 from pyglimmpse.constants import Constants
-from pyglimmpse.model.power import Power
+from pyglimmpse.model.power import Power, confidence_limits
 
 
 class TestGlmmpcl(TestCase):
@@ -45,3 +48,127 @@ class TestGlmmpcl(TestCase):
         self.assertEqual(expected.upper_bound.power, power_u)
         self.assertEqual(round(expected.upper_bound.noncentrality_parameter, 5), noncen_u)
         self.assertEqual(expected.upper_bound.fmethod, fmethod)
+
+    def test_glmmpcl_is_lazy(self):
+        """The bounds should only be calculated when they are read"""
+        power = Power(0.9, 0.05, Constants.FMETHOD_NOAPPROXIMATION)
+        with patch.object(Power, '_calc_bound', wraps=power._calc_bound) as calc_bound:
+            power.glmmpcl(is_multirep=True,
+                          alphatest=0.05,
+                          dfh=20,
+                          n2=30,
+                          dfe2=28,
+                          cl_type=Constants.CLTYPE_DESIRED_KNOWN,
+                          n_est=20,
+                          rank_est=1,
+                          alpha_cl=0.048,
+                          alpha_cu=0.052,
+                          fcrit=finv(0.95, 20, 28),
+                          tolerance=0.01,
+                          omega=200)
+            self.assertEqual(0, calc_bound.call_count)
+            lower = power.lower_bound
+            self.assertEqual(2, calc_bound.call_count)
+            self.assertIs(lower, power.lower_bound)
+            power.upper_bound
+            self.assertEqual(2, calc_bound.call_count)
+
+
+class TestConfidenceLimits(TestCase):
+
+    def check_against_glmmpcl(self, is_multirep, cl_type):
+        omega = np.array([0.5, 5, 20, 200])
+        dfh = 3
+        dfe2 = np.array([10, 20, 40, 80])
+        df1_unirep = 2.4
+        fcrit = finv_array(0.95, df1_unirep if not is_multirep else dfh, dfe2)
+        limits = confidence_limits(is_multirep=is_multirep,
+                                   alphatest=0.05,
+                                   dfh=dfh,
+                                   dfe2=dfe2,
+                                   cl_type=cl_type,
+                                   n_est=25,
+                                   rank_est=2,
+                                   alpha_cl=0.025,
+                                   alpha_cu=np.array([0.025, 0.025, 0, 0.025]),
+                                   fcrit=fcrit,
+                                   omega=omega,
+                                   df1_unirep=df1_unirep)
+        for i in range(len(omega)):
+            power = Power(0.5, omega[i], Constants.FMETHOD_NOAPPROXIMATION)
+            power.glmmpcl(is_multirep=is_multirep,
+                          alphatest=0.05,
+                          dfh=dfh,
+                          n2=25,
+                          dfe2=dfe2[i],
+                          cl_type=cl_type,
+                          n_est=25,
+                          rank_est=2,
+                          alpha_cl=0.025,
+                          alpha_cu=[0.025, 0.025, 0, 0.025][i],
+                          fcrit=fcrit[i],
+                          tolerance=1e-12,
+                          omega=omega[i],
+                          df1_unirep=df1_unirep)
+            self.assertAlmostEqual(power.lower_bound.power, limits.lower_power[i], places=10)
+            self.assertAlmostEqual(power.lower_bound.noncentrality_parameter, limits.lower_noncentrality[i], places=8)
+            self.assertEqual(power.lower_bound.fmethod, limits.lower_fmethod[i])
+            self.assertAlmostEqual(power.upper_bound.power, limits.upper_power[i], places=10)
+            self.assertAlmostEqual(power.upper_bound.noncentrality_parameter, limits.upper_noncentrality[i], places=8)
+            self.assertEqual(power.upper_bound.fmethod, limits.upper_fmethod[i])
+
+    def test_confidence_limits_beta_known(self):
+        self.check_against_glmmpcl(True, Constants.CLTYPE_DESIRED_KNOWN)
+        self.check_against_glmmpcl(False, Constants.CLTYPE_DESIRED_KNOWN)
+
+    def test_confidence_limits_beta_estimated(self):
+        self.check_against_glmmpcl(True, Constants.CLTYPE_DESIRED_ESTIMATE)
+        self.check_against_glmmpcl(False, Constants.CLTYPE_DESIRED_ESTIMATE)
+
+    def test_confidence_limit_sweep(self):
+        """Each n_est in the sweep should match glmmpcl with that n_est"""
+        for cl_type in [Constants.CLTYPE_DESIRED_KNOWN, Constants.CLTYPE_DESIRED_ESTIMATE]:
+            arguments = dict(is_multirep=True,
+                             alphatest=0.05,
+                             dfh=3,
+                             n2=40,
+                             dfe2=36,
+                             cl_type=cl_type,
+                             rank_est=2,
+                             alpha_cl=0.025,
+                             alpha_cu=0.025,
+                             fcrit=finv(0.95, 3, 36),
+                             tolerance=1e-12,
+                             omega=12)
+            power = Power(0.5, 12, Constants.FMETHOD_NOAPPROXIMATION)
+            power.glmmpcl(n_est=20, **arguments)
+            n_est = [10, 20, 40, 80, 160]
+            sweep = power.confidence_limit_sweep(n_est)
+            for i, n in enumerate(n_est):
+                expected = Power(0.5, 12, Constants.FMETHOD_NOAPPROXIMATION)
+                expected.glmmpcl(n_est=n, **arguments)
+                self.assertAlmostEqual(expected.lower_bound.power, sweep.lower_power[i], places=10)
+                self.assertAlmostEqual(expected.upper_bound.power, sweep.upper_power[i], places=10)
+            self.assertTrue(np.all(np.diff(sweep.width) < 0))
+
+    def test_confidence_limit_sweep_unirep(self):
+        """The unirep sweep should reproduce the point estimate limits at the original n_est"""
+        power = Power(0.5, 12, Constants.SIGMA_ESTIMATED)
+        power.glmmpcl(is_multirep=False,
+                      alphatest=0.05,
+                      dfh=30.5,
+                      n2=40,
+                      dfe2=70,
+                      cl_type=Constants.CLTYPE_DESIRED_KNOWN,
+                      n_est=20,
+                      rank_est=2,
+                      alpha_cl=0.025,
+                      alpha_cu=0.025,
+                      fcrit=finv(0.95, 2.5, 70),
+                      tolerance=1e-12,
+                      omega=12,
+                      df1_unirep=2.5)
+        sweep = power.confidence_limit_sweep([20, 40])
+        self.assertAlmostEqual(power.lower_bound.power, sweep.lower_power[0], places=10)
+        self.assertAlmostEqual(power.upper_bound.power, sweep.upper_power[0], places=10)
+        self.assertLess(sweep.width[1], sweep.width[0])
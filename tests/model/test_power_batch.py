@@ -0,0 +1,103 @@
+import importlib.util
+from unittest import TestCase, skipIf
+
+import numpy as np
+
+from pyglimmpse import multirep, unirep
+from pyglimmpse.constants import Constants
+from pyglimmpse.finv import finv
+from pyglimmpse.model.power import Power, confidence_limits
+from pyglimmpse.model.power_batch import PowerBatch, diagnostic_codes
+from pyglimmpse.plan import BatchPlan
+
+
+class TestPowerBatch(TestCase):
+
+    def setUp(self):
+        self.power = Power(0.5, 12, Constants.FMETHOD_NOAPPROXIMATION)
+        self.power.glmmpcl(is_multirep=True,
+                           alphatest=0.05,
+                           dfh=3,
+                           n2=40,
+                           dfe2=36,
+                           cl_type=Constants.CLTYPE_DESIRED_KNOWN,
+                           n_est=20,
+                           rank_est=2,
+                           alpha_cl=0.025,
+                           alpha_cu=0.025,
+                           fcrit=finv(0.95, 3, 36),
+                           tolerance=1e-12,
+                           omega=12)
+        self.missing = Power(float('nan'), float('nan'), Constants.FMETHOD_MISSING)
+        self.missing.diagnostics = (Constants.WARN_HDLSS, Constants.WARN_CL_MISSING)
+
+    def test_from_powers(self):
+        """ indexing should give back an equal Power"""
+        batch = PowerBatch.from_powers([self.power, self.missing])
+        self.assertEqual(2, len(batch))
+        power, missing = batch
+        self.assertEqual((self.power.power, self.power.noncentrality_parameter, self.power.fmethod),
+                         (power.power, power.noncentrality_parameter, power.fmethod))
+        for expected, actual in [(self.power.lower_bound, power.lower_bound), (self.power.upper_bound, power.upper_bound)]:
+            self.assertEqual((expected.power, expected.noncentrality_parameter, expected.fmethod),
+                             (actual.power, actual.noncentrality_parameter, actual.fmethod))
+        self.assertIsNone(missing.lower_bound)
+        self.assertTrue(np.isnan(missing.power))
+        self.assertEqual(Constants.FMETHOD_MISSING, missing.fmethod)
+        self.assertEqual((Constants.WARN_HDLSS, Constants.WARN_CL_MISSING), missing.diagnostics)
+        self.assertEqual([False, True], list(batch.has_diagnostic(Constants.WARN_CL_MISSING)))
+
+    def test_views(self):
+        """ columns and slices should share the data"""
+        batch = PowerBatch.from_powers([self.power, self.missing, self.power])
+        self.assertTrue(np.shares_memory(batch.power, batch.data))
+        tail = batch[1:]
+        self.assertIsInstance(tail, PowerBatch)
+        self.assertTrue(np.shares_memory(tail.data, batch.data))
+        self.assertEqual(self.power.power, tail[1].power)
+        self.assertEqual([Constants.FMETHOD_NOAPPROXIMATION, Constants.FMETHOD_MISSING], list(batch[[0, 1]].fmethod))
+        batch.add_diagnostics([Constants.WARN_HDLSS])
+        self.assertEqual((Constants.WARN_HDLSS,), diagnostic_codes(batch.data['diagnostics'][0]))
+
+    def test_from_arrays(self):
+        limits = confidence_limits(is_multirep=True, alphatest=0.05, dfh=3, dfe2=36,
+                                   cl_type=Constants.CLTYPE_DESIRED_KNOWN, n_est=20, rank_est=2, alpha_cl=0.025,
+                                   alpha_cu=0.025, fcrit=finv(0.95, 3, 36), omega=[12, 12])
+        batch = PowerBatch.from_arrays([0.5, 0.5], [12, 12], Constants.FMETHOD_NOAPPROXIMATION, limits)
+        self.assertAlmostEqual(self.power.lower_bound.power, batch[1].lower_bound.power, places=12)
+        self.assertEqual(self.power.upper_bound.fmethod, batch.upper_fmethod[0])
+
+    def test_batch_apis(self):
+        design = dict(rank_C=1,
+                      rank_X=2,
+                      relative_group_sizes=[1, 1],
+                      alpha=0.05,
+                      sigma_star=np.array([[1, 0.3, 0.1], [0.3, 1, 0.3], [0.1, 0.3, 1]]),
+                      delta_es=np.array([[0.5, 0.1, 0], [0.1, 0.4, 0.1], [0, 0.1, 0.3]]))
+        for test in [multirep.hlt_two_moment_null_approximator, unirep.geisser_greenhouse]:
+            batch = BatchPlan(test, **design).power([2, 10], [0, 0])
+            self.assertIsInstance(batch, PowerBatch)
+            for rep_N, power in zip([2, 10], batch):
+                expected = test(rep_N=rep_N, **design)
+                np.testing.assert_allclose(expected.power, power.power, rtol=1e-10)
+                self.assertEqual(expected.fmethod, power.fmethod)
+        # the general unirep calculation keeps the diagnostics of each power
+        self.assertEqual([True, False], list(batch.has_diagnostic(Constants.WARN_HDLSS)))
+        sweep = unirep.internal_pilot_power_sweep(unirep.hyuhn_feldt, rep_N=3, n_ip=[6, 10], rank_ip=2,
+                                                  **dict(design, sigma_star=np.identity(3)))
+        self.assertEqual([True, True], list(sweep.has_diagnostic(Constants.WARN_EPSILON_TRUNCATED_DOWN)))
+
+    @skipIf(importlib.util.find_spec('pandas') is None, 'pandas is not installed')
+    def test_to_pandas(self):
+        batch = PowerBatch.from_powers([self.power, self.missing])
+        frame = batch.to_pandas()
+        self.assertEqual(list(batch.power[:1]), list(frame['power'][:1]))
+        self.assertEqual(Constants.FMETHOD_MISSING.value, frame['fmethod'][1])
+        self.assertTrue(np.isnan(frame['lower_power'][1]))
+
+    @skipIf(importlib.util.find_spec('pyarrow') is None, 'pyarrow is not installed')
+    def test_to_arrow(self):
+        table = PowerBatch.from_powers([self.power, self.missing]).to_arrow()
+        self.assertEqual(2, table.num_rows)
+        self.assertEqual(Constants.FMETHOD_MISSING.value, table.column('fmethod')[1].as_py())
+        self.assertIsNone(table.column('lower_fmethod')[1].as_py())
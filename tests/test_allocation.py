@@ -0,0 +1,57 @@
+import itertools
+from unittest import TestCase
+
+import numpy as np
+
+from pyglimmpse.allocation import optimal_allocation
+from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException
+from pyglimmpse.multirep import hlt_two_moment_null_approximator_obrien_shieh, special
+from pyglimmpse.unirep import geisser_greenhouse, hyuhn_feldt
+
+
+class TestAllocation(TestCase):
+
+    def setUp(self):
+        self.c_matrix = np.array([[1, -1, 0], [1, 0, -1]])
+        self.theta = np.array([[2, 1], [3, 0.5]])
+        self.sigma_star = np.array([[4, 1], [1, 3]])
+
+    def power(self, test, sizes):
+        m = self.c_matrix @ np.diag(1 / np.array(sizes, dtype=float)) @ self.c_matrix.T
+        return test(rank_C=2,
+                    rank_X=3,
+                    relative_group_sizes=list(sizes),
+                    rep_N=1,
+                    alpha=0.05,
+                    sigma_star=self.sigma_star,
+                    delta_es=self.theta.T @ np.linalg.inv(m) @ self.theta).power
+
+    def test_fixed_total_N(self):
+        """The allocation should be as good as the best of every allocation of total_N"""
+        for test in [hlt_two_moment_null_approximator_obrien_shieh, geisser_greenhouse]:
+            sizes, power = optimal_allocation(test, self.c_matrix, self.theta, self.sigma_star, 0.05, total_N=21)
+            self.assertEqual(21, sum(sizes))
+            best = max(self.power(test, s) for s in itertools.product(range(1, 20), repeat=3) if sum(s) == 21)
+            self.assertAlmostEqual(best, power.power, places=12)
+            self.assertAlmostEqual(self.power(test, sizes), power.power, places=12)
+
+    def test_balanced(self):
+        """A single contrast between two groups is best balanced"""
+        sizes, _ = optimal_allocation(special, np.array([[1, -1]]), np.array([[1]]), np.array([[4]]), 0.05, total_N=20)
+        self.assertEqual([10, 10], sizes)
+
+    def test_target_power(self):
+        """No allocation of one subject fewer should reach the target"""
+        # Huynh-Feldt has no error degrees of freedom at the smallest total N tried
+        for test in [hlt_two_moment_null_approximator_obrien_shieh, hyuhn_feldt]:
+            sizes, power = optimal_allocation(test, self.c_matrix, self.theta, self.sigma_star, 0.05, target_power=0.9)
+            self.assertGreaterEqual(power.power, 0.9)
+            total_N = sum(sizes) - 1
+            best = max(self.power(test, s) for s in itertools.product(range(1, total_N), repeat=3) if sum(s) == total_N)
+            self.assertLess(best, 0.9)
+
+    def test_total_N_or_target_power(self):
+        with self.assertRaises(GlimmpseValidationException):
+            optimal_allocation(special, self.c_matrix, self.theta, self.sigma_star, 0.05)
+        with self.assertRaises(GlimmpseValidationException):
+            optimal_allocation(special, self.c_matrix, self.theta, self.sigma_star, 0.05, total_N=20, target_power=0.9)
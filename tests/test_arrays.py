@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+import numpy as np
+
+from pyglimmpse import multirep, unirep
+from pyglimmpse._arrays import as_array
+from pyglimmpse.model.epsilon import Epsilon
+
+
+class TestArrays(TestCase):
+
+    def setUp(self):
+        self.sigma_star = [[1, 0.3, 0.1], [0.3, 1, 0.3], [0.1, 0.3, 1]]
+        self.delta_es = [[0.5, 0.1, 0], [0.1, 0.4, 0.1], [0, 0.1, 0.3]]
+
+    def test_as_array(self):
+        matrix = np.matrix(self.sigma_star)
+        array = as_array(matrix)
+        self.assertIs(type(array), np.ndarray)
+        self.assertTrue(np.shares_memory(array, matrix))
+        self.assertEqual((1, 1), as_array(2).shape)
+        self.assertEqual((1, 3), as_array([1, 2, 3]).shape)
+
+    def test_matrix_inputs(self):
+        """ np.matrix, ndarray and nested list inputs should give the same power"""
+        for test in [multirep.hlt_two_moment_null_approximator, multirep.wlk_two_moment_null_approx,
+                     unirep.geisser_greenhouse, unirep.hyuhn_feldt]:
+            powers = [test(rank_C=1, rank_X=2, relative_group_sizes=[1, 1], rep_N=10, alpha=0.05,
+                           sigma_star=convert(self.sigma_star), delta_es=convert(self.delta_es)).power
+                      for convert in (np.matrix, np.array, list)]
+            self.assertEqual(powers[0], powers[1])
+            self.assertEqual(powers[0], powers[2])
+
+    def test_epsilon(self):
+        epsilon = Epsilon(np.matrix(self.sigma_star), 3)
+        self.assertIs(type(epsilon.deigval), np.ndarray)
+        self.assertEqual((epsilon.d, 1), epsilon.deigval.shape)
+        self.assertEqual((epsilon.d, 1), epsilon.mtp.shape)
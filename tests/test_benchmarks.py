@@ -0,0 +1,29 @@
+from unittest import TestCase
+
+from benchmarks import cases
+from benchmarks.run import compare, run
+
+
+class TestBenchmarks(TestCase):
+
+    def test_cases(self):
+        """ every case should have its own name and every probf regime should be reached"""
+        names = [name for name, _ in cases.cases()]
+        self.assertEqual(len(names), len(set(names)))
+        for fmethod in cases.PROBF_REGIMES:
+            self.assertIn('probf/' + fmethod.name, names)
+
+    def test_run(self):
+        result = run('probf/', repeat=1, min_time=0.001, verbose=False)
+        self.assertEqual(len(cases.PROBF_REGIMES), len(result['results']))
+        for measurement in result['results'].values():
+            self.assertGreater(measurement['seconds'], 0)
+
+    def test_compare(self):
+        """ only increases beyond the threshold should be flagged, and small peak memory never"""
+        def results(**measurements):
+            return dict(results={name: dict(seconds=s, peak_bytes=b) for name, (s, b) in measurements.items()})
+        baseline = results(a=(1.0, 10 ** 6), b=(1.0, 1000), c=(1.0, 10 ** 6))
+        current = results(a=(1.2, 10 ** 6), b=(2.0, 5000), c=(0.5, 2 * 10 ** 6), d=(5.0, 10 ** 7))
+        regressions = compare(baseline, current, threshold=0.25)
+        self.assertEqual([('b', 'seconds', 1.0, 2.0, 2.0), ('c', 'peak_bytes', 10 ** 6, 2 * 10 ** 6, 2.0)], regressions)
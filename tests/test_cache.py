@@ -0,0 +1,88 @@
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+
+from pyglimmpse import multirep, unirep
+from pyglimmpse.cache import DirectoryStore, ResultCache, SQLiteStore
+from pyglimmpse.input import CL
+
+
+class TestResultCache(TestCase):
+
+    def setUp(self):
+        self.design = dict(rank_C=1,
+                           rank_X=2,
+                           relative_group_sizes=[1, 1],
+                           alpha=0.05,
+                           sigma_star=np.array([[1, 0.3, 0.1], [0.3, 1, 0.3], [0.1, 0.3, 1]]),
+                           delta_es=np.array([[0.5, 0.1, 0], [0.1, 0.4, 0.1], [0, 0.1, 0.3]]))
+        self.test = multirep.hlt_two_moment_null_approximator
+
+    def test_hits(self):
+        """ equal inputs should share a result however they are written"""
+        cache = ResultCache()
+        power = cache.power(self.test, rep_N=10, **self.design)
+        same = dict(self.design, rank_C=1.0, sigma_star=np.asarray(self.design['sigma_star']).tolist(),
+                    relative_group_sizes=np.array([1, 1]))
+        self.assertIs(power, cache.power(self.test, rep_N=10.0, **same))
+        self.assertEqual(self.test(rep_N=10, **self.design).power, power.power)
+        self.assertIsNot(power, cache.power(self.test, rep_N=11, **self.design))
+        self.assertIsNot(power, cache.power(multirep.hlt_one_moment_null_approximator, rep_N=10, **self.design))
+        self.assertIsNot(power, cache.power(self.test, rep_N=10, cl=CL(), **self.design))
+        self.assertEqual(dict(hits=1, store_hits=0, misses=4, evictions=0, uncacheable=0, size=4, maxsize=1024),
+                         cache.stats())
+
+    def test_eviction(self):
+        cache = ResultCache(maxsize=2)
+        first = cache.power(self.test, rep_N=10, **self.design)
+        cache.power(self.test, rep_N=11, **self.design)
+        cache.power(self.test, rep_N=10, **self.design)
+        cache.power(self.test, rep_N=12, **self.design)
+        # rep_N=10 was used more recently than rep_N=11, so 11 is evicted
+        self.assertIs(first, cache.power(self.test, rep_N=10, **self.design))
+        stats = cache.stats()
+        self.assertEqual((2, 1, 2), (stats['hits'], stats['evictions'], stats['size']))
+
+    def test_key(self):
+        cache = ResultCache()
+        key = cache.key(self.test, self.design)
+        with patch('pyglimmpse.__version__', '0.0.0'):
+            self.assertNotEqual(key, cache.key(self.test, self.design))
+        self.assertNotEqual(key, cache.key(self.test, dict(self.design, alpha='0.05')))
+        with self.assertRaises(TypeError):
+            cache.key(self.test, dict(self.design, cost=lambda n: n))
+
+    def test_uncacheable(self):
+        """ arguments which can not be hashed should bypass the cache"""
+        cache = ResultCache()
+        seen = []
+        record = lambda value: seen.append(value) or value
+        self.assertEqual(1, cache.call(lambda callback: callback(1), callback=record))
+        self.assertEqual(1, cache.call(lambda callback: callback(1), callback=record))
+        self.assertEqual([1, 1], seen)
+        self.assertEqual(2, cache.stats()['uncacheable'])
+
+    def test_canonicalize(self):
+        cache = ResultCache(canonicalize=True)
+        power = cache.power(unirep.hyuhn_feldt, rep_N=10, **self.design)
+        scaled = dict(self.design, sigma_star=4 * self.design['sigma_star'], delta_es=4 * self.design['delta_es'])
+        self.assertIs(power, cache.power(unirep.hyuhn_feldt, rep_N=10, **scaled))
+        self.assertAlmostEqual(unirep.hyuhn_feldt(rep_N=10, **scaled).power, power.power, places=12)
+        self.assertIsNot(power, ResultCache().power(unirep.hyuhn_feldt, rep_N=10, **scaled))
+
+    def test_stores(self):
+        """ a store should keep results for a new cache"""
+        with tempfile.TemporaryDirectory() as directory:
+            for store in [SQLiteStore(directory + '/results.sqlite'), DirectoryStore(directory + '/results')]:
+                total_N, power = ResultCache(store=store).samplesize(unirep.geisser_greenhouse, targetPower=0.9,
+                                                                     **self.design)
+                cache = ResultCache(store=store)
+                stored_N, stored = cache.samplesize(unirep.geisser_greenhouse, targetPower=0.9, **self.design)
+                self.assertEqual(total_N, stored_N)
+                self.assertEqual(power.power, stored.power)
+                self.assertEqual(1, cache.stats()['store_hits'])
+                self.assertEqual(1, len(store))
+                if isinstance(store, SQLiteStore):
+                    store.close()
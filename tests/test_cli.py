@@ -0,0 +1,73 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from pyglimmpse import cli, multirep, unirep
+from pyglimmpse.samplesize import samplesize
+
+
+class TestCli(TestCase):
+
+    def setUp(self):
+        self.design = dict(rank_C=1,
+                           rank_X=2,
+                           relative_group_sizes=[1, 1],
+                           alpha=0.05,
+                           sigma_star=[[1, 0.3, 0.1], [0.3, 1, 0.3], [0.1, 0.3, 1]],
+                           delta_es=[[0.5, 0.1, 0], [0.1, 0.4, 0.1], [0, 0.1, 0.3]])
+        self.jobs = [dict(self.design, id=rep_N, test='hyuhn_feldt', rep_N=rep_N) for rep_N in range(3, 23)]
+
+    def run_jobs(self, jobs, **kwargs):
+        results = []
+        stats = cli.run([json.dumps(job) for job in jobs], results.append, **kwargs)
+        return results, stats
+
+    def test_jobs(self):
+        confidence_interval = dict(beta_known=True, lower_tail=0.025, upper_tail=0.025, rank_est=2, n_est=30)
+        jobs = [dict(self.design, test='hlt_two_moment_null_approximator', rep_N=10),
+                dict(self.design, type='samplesize', test='geisser_greenhouse', targetPower=0.9, target='TARGET_POWER'),
+                dict(self.design, type='cl', test='hlt_two_moment_null_approximator', rep_N=10,
+                     confidence_interval=confidence_interval),
+                dict(self.design, type='cl', test='hlt_two_moment_null_approximator', rep_N=10),
+                dict(self.design, id='x', test='print', rep_N=10)]
+        results, stats = self.run_jobs(jobs, workers=0)
+        design = dict(self.design, sigma_star=np.array(self.design['sigma_star']),
+                      delta_es=np.array(self.design['delta_es']))
+        self.assertEqual(multirep.hlt_two_moment_null_approximator(rep_N=10, **design).power, results[0]['power'])
+        self.assertIsNone(results[0]['lower_power'])
+        self.assertEqual(samplesize(unirep.geisser_greenhouse, targetPower=0.9, **design)[0], results[1]['total_N'])
+        self.assertLess(results[2]['lower_power'], results[2]['power'])
+        self.assertIn('confidence_interval', results[3]['error'])
+        self.assertEqual(('x', 4), (results[4]['id'], results[4]['index']))
+        self.assertEqual((5, 2), (stats['jobs'], stats['errors']))
+
+    def test_pool(self):
+        """ the pool should give the results of running in this process, in order unless asked not to"""
+        expected, _ = self.run_jobs(self.jobs, workers=0)
+        ordered, stats = self.run_jobs(self.jobs, workers=2, chunk_size=3, max_in_flight=2)
+        self.assertEqual(expected, ordered)
+        unordered, _ = self.run_jobs(self.jobs, workers=2, chunk_size=3, ordered=False)
+        self.assertEqual(expected, sorted(unordered, key=lambda result: result['index']))
+        self.assertEqual(len(self.jobs), stats['jobs'])
+        self.assertEqual(unirep.hyuhn_feldt(rep_N=22, **self.design).power, ordered[-1]['power'])
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            jobs = os.path.join(directory, 'jobs.jsonl')
+            output = os.path.join(directory, 'results.jsonl')
+            with open(jobs, 'w') as f:
+                f.write('\n'.join(json.dumps(job) for job in self.jobs[:3]) + '\n\nnot json\n')
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                status = cli.main([jobs, '--output', output, '--workers', '0'])
+            with open(output) as f:
+                results = [json.loads(line) for line in f]
+        self.assertEqual(1, status)
+        self.assertEqual([0, 1, 2, 3], [result['index'] for result in results])
+        self.assertIn('JSONDecodeError', results[3]['error'])
+        self.assertIn('4 jobs, 1 failed', stderr.getvalue())
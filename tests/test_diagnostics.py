@@ -0,0 +1,53 @@
+import warnings
+from unittest import TestCase
+
+import numpy as np
+
+from pyglimmpse import diagnostics, multirep, unirep
+from pyglimmpse.constants import Constants
+from pyglimmpse.samplesize import samplesize
+
+
+class TestDiagnostics(TestCase):
+
+    def setUp(self):
+        self.design = dict(rank_C=1,
+                           rank_X=2,
+                           relative_group_sizes=[1, 1],
+                           alpha=0.05,
+                           sigma_star=np.array([[1, 0.3, 0.1], [0.3, 1, 0.3], [0.1, 0.3, 1]]),
+                           delta_es=np.array([[0.5, 0.1, 0], [0.1, 0.4, 0.1], [0, 0.1, 0.3]]))
+
+    def test_no_warnings(self):
+        """ the diagnostics should be on the power, and no warning raised"""
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            hdlss = unirep.uncorrected(rep_N=2, **self.design)
+            truncated = unirep.hyuhn_feldt(rep_N=3, **dict(self.design, sigma_star=np.identity(3)))
+            missing = multirep.wlk_two_moment_null_approx(rep_N=2, **dict(self.design, rank_C=2))
+            defined = unirep.uncorrected(rep_N=20, **self.design)
+        self.assertEqual((Constants.WARN_HDLSS,), hdlss.diagnostics)
+        self.assertEqual((Constants.WARN_EPSILON_TRUNCATED_DOWN,), truncated.diagnostics)
+        self.assertEqual((Constants.WARN_NONCENTRALITY_UNDEFINED,), missing.diagnostics)
+        self.assertTrue(np.isnan(missing.power))
+        self.assertEqual((), defined.diagnostics)
+
+    def test_emit_warnings(self):
+        previous = diagnostics.emit_warnings(True)
+        try:
+            with self.assertWarns(diagnostics.DiagnosticWarning) as caught:
+                power = unirep.uncorrected(rep_N=2, **self.design)
+        finally:
+            diagnostics.emit_warnings(previous)
+        self.assertEqual(Constants.WARN_HDLSS.value, str(caught.warning))
+        self.assertEqual((Constants.WARN_HDLSS,), power.diagnostics)
+
+    def test_capture(self):
+        """ a capture should count the codes recorded by every power calculation of a search"""
+        with diagnostics.capture() as outer:
+            with diagnostics.capture() as recorded:
+                total_N, power = samplesize(unirep.uncorrected, targetPower=0.9, **self.design)
+            unirep.uncorrected(rep_N=2, **self.design)
+        self.assertEqual((), power.diagnostics)
+        self.assertEqual([Constants.WARN_HDLSS], list(recorded))
+        self.assertEqual(recorded[Constants.WARN_HDLSS] + 1, outer[Constants.WARN_HDLSS])
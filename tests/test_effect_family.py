@@ -0,0 +1,117 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+
+from pyglimmpse.effect_family import budget_design, effect_family_power
+from pyglimmpse.model.kronecker_operator import KroneckerOperator
+from pyglimmpse.multirep import hlt_two_moment_null_approximator_obrien_shieh
+from pyglimmpse.orpol import upoly
+from pyglimmpse.unirep import geisser_greenhouse, hyuhn_feldt
+
+
+class TestEffectFamily(TestCase):
+
+    def setUp(self):
+        self.u_family = upoly([np.array([1, 2, 3]), np.array([1, 2, 3, 4])], lazy=True)
+        self.sigma_time = np.array([[1, 0.5, 0.25, 0.125],
+                                    [0.5, 1, 0.5, 0.25],
+                                    [0.25, 0.5, 1, 0.5],
+                                    [0.125, 0.25, 0.5, 1]])
+        self.sigma_condition = np.array([[2, 0.5, 0.5], [0.5, 2, 0.5], [0.5, 0.5, 2]])
+        beta = np.array(np.arange(24).reshape(2, 12) % 5, dtype=float)
+        c_matrix = np.array([[1, -1]])
+        self.c_beta = c_matrix @ beta
+        self.m_matrix = c_matrix @ np.linalg.inv(np.identity(2)) @ c_matrix.T
+
+    def expected_power(self, u_matrix, sigma):
+        u_matrix = u_matrix.materialize()
+        sigma_star = u_matrix.T @ sigma @ u_matrix
+        theta = self.c_beta @ u_matrix
+        delta_es = theta.T @ np.linalg.inv(self.m_matrix) @ theta
+        return hlt_two_moment_null_approximator_obrien_shieh(rank_C=1,
+                                                             rank_X=2,
+                                                             relative_group_sizes=[1, 1],
+                                                             rep_N=10,
+                                                             alpha=0.05,
+                                                             sigma_star=sigma_star,
+                                                             delta_es=delta_es)
+
+    def check_table(self, sigma, dense_sigma):
+        table = effect_family_power(test=hlt_two_moment_null_approximator_obrien_shieh,
+                                    u_family=self.u_family,
+                                    sigma=sigma,
+                                    c_beta=self.c_beta,
+                                    m_matrix=self.m_matrix,
+                                    rank_C=1,
+                                    rank_X=2,
+                                    relative_group_sizes=[1, 1],
+                                    rep_N=10,
+                                    alpha=0.05)
+        self.assertEqual(3, len(table))
+        for row in table:
+            expected = self.expected_power(self.u_family[row['order']][row['effect']], dense_sigma)
+            self.assertAlmostEqual(expected.power, row['power'].power, places=10)
+        self.assertEqual([2, 3, 6], [row['rank_U'] for row in table])
+
+    def test_effect_family_dense_sigma(self):
+        """Each effect should get the same power as an independent calculation"""
+        dense_sigma = np.kron(self.sigma_condition, self.sigma_time)
+        self.check_table(dense_sigma, dense_sigma)
+
+    def test_effect_family_separable_sigma(self):
+        """A Kronecker separable SIGMA should be decomposed per factor"""
+        sigma = KroneckerOperator([self.sigma_condition, self.sigma_time])
+        self.check_table(sigma, sigma.materialize())
+
+
+class TestBudgetDesign(TestCase):
+
+    def setUp(self):
+        self.times = np.arange(1, 7.)
+        self.sigma = np.array([[4 * 0.6 ** abs(i - j) for j in range(6)] for i in range(6)])
+        self.c_beta = np.array([0.6 * self.times - 0.08 * self.times ** 2])
+        self.m_matrix = np.array([[2]])
+
+    def cheapest(self, test, cost):
+        """ the cheapest design by searching every candidate and every rep_N"""
+        best = None
+        for k in range(2, 7):
+            indices = sorted(set(np.round(np.linspace(0, 5, k)).astype(int)))
+            u_matrix = upoly([self.times[indices]])['u_maineffect']['f0']
+            sigma_star = u_matrix.T @ self.sigma[np.ix_(indices, indices)] @ u_matrix
+            theta = self.c_beta[:, indices] @ u_matrix
+            for rep_N in range(4, 500):
+                power = test(rank_C=1,
+                             rank_X=2,
+                             relative_group_sizes=[1, 1],
+                             rep_N=rep_N,
+                             alpha=0.05,
+                             sigma_star=sigma_star,
+                             delta_es=theta.T @ np.linalg.inv(self.m_matrix) @ theta)
+                if power.power >= 0.9:
+                    break
+            if best is None or cost(len(indices), 2 * rep_N) < best:
+                best = cost(len(indices), 2 * rep_N)
+        return best
+
+    def test_budget_design(self):
+        """The design should be as cheap as the cheapest found by exhaustive search"""
+        for test in [hlt_two_moment_null_approximator_obrien_shieh, geisser_greenhouse, hyuhn_feldt]:
+            for cost in [lambda n_times, total_N: total_N * (100 + 10 * n_times),
+                         lambda n_times, total_N: total_N * (1000 + n_times)]:
+                design = budget_design(test, self.times, self.sigma, self.c_beta, self.m_matrix,
+                                       rank_C=1, rank_X=2, relative_group_sizes=[1, 1], alpha=0.05,
+                                       target_power=0.9, cost=cost)
+                self.assertEqual(self.cheapest(test, cost), design['cost'])
+                self.assertGreaterEqual(design['power'].power, 0.9)
+                self.assertEqual(cost(len(design['times']), design['total_N']), design['cost'])
+
+    def test_budget_design_prunes_candidates(self):
+        """Candidates which cost more than the best design at the smallest N should not be built"""
+        with patch('pyglimmpse.effect_family.upoly', wraps=upoly) as built:
+            design = budget_design(hlt_two_moment_null_approximator_obrien_shieh, self.times, self.sigma,
+                                   self.c_beta, self.m_matrix, rank_C=1, rank_X=2, relative_group_sizes=[1, 1],
+                                   alpha=0.05, target_power=0.9, cost=lambda n_times, total_N: total_N + 10 ** 6 * n_times)
+        self.assertEqual(2, len(design['times']))
+        self.assertEqual(1, built.call_count)
@@ -2,7 +2,7 @@ from unittest import TestCase
 
 import numpy as np
 
-from pyglimmpse.finv import finv
+from pyglimmpse.finv import finv, finv_array
 
 
 class TestFinv(TestCase):
@@ -33,4 +33,17 @@ class TestFinv(TestCase):
         expected = 6.6348966
         actual = finv(0.99, 1, 10000000000)
         result = round(actual, 7)
-        self.assertEqual(expected, result)
\ No newline at end of file
+        self.assertEqual(expected, result)
+
+    def test_finv_array(self):
+        """The vectorized finv should agree with finv element by element"""
+        alpha = [0.05, 0.95, 0.05, 0.5, 0.5]
+        df1 = [100, 3, 10**8, 1, 2]
+        df2 = [100, 20, 1, -1, 10**10]
+        actual = finv_array(alpha, df1, df2)
+        for i in range(len(alpha)):
+            expected = finv(alpha[i], df1[i], df2[i])
+            if np.isnan(expected):
+                self.assertTrue(np.isnan(actual[i]))
+            else:
+                self.assertAlmostEqual(expected, actual[i], places=12)
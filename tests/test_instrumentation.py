@@ -0,0 +1,100 @@
+import io
+import json
+import threading
+from contextlib import redirect_stdout
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+
+from pyglimmpse import instrumentation, multirep, samplesize
+from pyglimmpse.constants import Constants
+from pyglimmpse.chisquareterm import ChiSquareTerm
+from pyglimmpse.probf import probf, probf_array
+from pyglimmpse.WeightedSumOfNoncentralChiSquaresDistribution import WeightedSumOfNoncentralChiSquaresDistribution
+
+
+class TestInstrumentation(TestCase):
+
+    def power(self):
+        return multirep.hlt_two_moment_null_approximator(rank_C=3,
+                                                         rank_X=4,
+                                                         relative_group_sizes=[1],
+                                                         rep_N=20,
+                                                         alpha=0.05,
+                                                         sigma_star=np.matrix([[0.6, 0], [0, 0.6]]),
+                                                         delta_es=np.matrix([[0.09375, 0.054126587736527], [0.054126587736527, 0.03125]]))
+
+    def test_disabled(self):
+        """ nothing should be recorded outside collect"""
+        collector = instrumentation.Collector()
+        self.power()
+        self.assertIsNone(instrumentation.active())
+        self.assertEqual({}, collector.as_dict()['stages'])
+
+    def test_stages(self):
+        with instrumentation.collect() as collector:
+            power = self.power()
+        self.assertIsNone(instrumentation.active())
+        metrics = collector.as_dict()
+        for stage in ['calc_properties', 'calc_eval', 'finv', 'probf', 'multi_power']:
+            self.assertEqual(1, metrics['stages'][stage]['calls'])
+            self.assertGreater(metrics['stages'][stage]['seconds'], 0)
+        self.assertEqual({power.fmethod.name: 1}, metrics['histograms']['probf.fmethod'])
+        json.dumps(metrics)
+
+    def test_samplesize_power_evaluations(self):
+        """ the Newton search should count each power it calculates"""
+        with patch.object(samplesize.CompiledPlan, 'power_derivative', autospec=True,
+                          side_effect=samplesize.CompiledPlan.power_derivative) as power_derivative, \
+                instrumentation.collect() as collector:
+            samplesize.samplesize(multirep.hlt_two_moment_null_approximator,
+                                  rank_C=2,
+                                  rank_X=3,
+                                  relative_group_sizes=[1, 1, 1],
+                                  alpha=0.05,
+                                  sigma_star=np.matrix([[1, 0.3], [0.3, 1]]),
+                                  delta_es=np.matrix([[0.5, 0.1], [0.1, 0.2]]),
+                                  targetPower=0.9,
+                                  starting_smallest_group_size=2,
+                                  search=Constants.SEARCH_NEWTON)
+        self.assertGreater(power_derivative.call_count, 0)
+        self.assertEqual(power_derivative.call_count,
+                         collector.as_dict()['counters']['samplesize.power_evaluations'])
+
+    def test_probf_regimes(self):
+        with instrumentation.collect() as collector:
+            probf(1, 10 ** 5, 10, 10)
+            probf(2.5, 3, 20, 5)
+            probf_array(2.5, [3, 3, 10 ** 5], [20, 20, 10], 5)
+        self.assertEqual({'FMETHOD_NOAPPROXIMATION': 3, 'FMETHOD_TIKU': 2},
+                         collector.as_dict()['histograms']['probf.fmethod'])
+
+    def test_davies(self):
+        """ the Davies algorithm should record its progress instead of printing it"""
+        distribution = WeightedSumOfNoncentralChiSquaresDistribution(
+            [ChiSquareTerm(7, 1, 10), ChiSquareTerm(-3, 2, 2), ChiSquareTerm(5, 1, 1)], 0.1, 0.001)
+        output = io.StringIO()
+        with redirect_stdout(output), instrumentation.collect() as collector:
+            distribution.cdf(50)
+        self.assertEqual('', output.getvalue())
+        metrics = collector.as_dict()
+        self.assertEqual(1, metrics['stages']['davies_cdf']['calls'])
+        self.assertGreater(metrics['counters']['davies.steps'], 0)
+        self.assertGreater(metrics['counters']['davies.integration_terms'], 0)
+        self.assertEqual(['davies.cdf', 'davies.cutoff', 'davies.cutoff'], [e['event'] for e in metrics['events']])
+
+    def test_events_bounded(self):
+        with instrumentation.collect(instrumentation.Collector(max_events=2)) as collector:
+            for i in range(5):
+                instrumentation.event('e', i=i)
+        self.assertEqual(2, len(collector.events))
+        self.assertEqual(3, collector.dropped_events)
+
+    def test_threads(self):
+        """ a collector should only see calculations in its own context"""
+        other = threading.Thread(target=self.power)
+        with instrumentation.collect() as collector:
+            other.start()
+            other.join()
+        self.assertEqual({}, collector.as_dict()['stages'])
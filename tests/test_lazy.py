@@ -0,0 +1,34 @@
+import subprocess
+import sys
+from unittest import TestCase
+
+import pyglimmpse
+
+
+class TestLazyImport(TestCase):
+
+    def run_python(self, source):
+        return subprocess.run([sys.executable, '-c', source], check=True, capture_output=True, text=True).stdout.split()
+
+    def test_import_pyglimmpse(self):
+        """ importing the package should not import numpy or scipy"""
+        self.assertEqual(['False', 'False'],
+                         self.run_python("import sys, pyglimmpse\n"
+                                         "print('numpy' in sys.modules, 'scipy' in sys.modules)"))
+
+    def test_power_without_scipy_stats(self):
+        """ a power calculation should neither need scipy.stats nor load it"""
+        loaded = self.run_python("import sys\n"
+                                 "import numpy as np\n"
+                                 "from pyglimmpse import multirep\n"
+                                 "multirep.hlt_two_moment_null_approximator(rank_C=1, rank_X=1, relative_group_sizes=[1], "
+                                 "rep_N=10, alpha=0.05, sigma_star=np.matrix([[2.0]]), delta_es=np.matrix([[1.0]]))\n"
+                                 "print('scipy.stats._continuous_distns' in sys.modules, 'scipy.special._ufuncs' in sys.modules)")
+        self.assertEqual(['False', 'True'], loaded)
+
+    def test_api(self):
+        for attribute in pyglimmpse.__all__:
+            self.assertIsNotNone(getattr(pyglimmpse, attribute))
+        self.assertIs(pyglimmpse.Power, sys.modules['pyglimmpse.model.power'].Power)
+        with self.assertRaises(AttributeError):
+            pyglimmpse.not_an_attribute
@@ -478,3 +478,56 @@ class TestMultirep(TestCase):
 
 
 
+
+    def test_multirep_power_array(self):
+        """The vectorized kernel should match each test, for a batch of designs with different rank_U"""
+        designs = [dict(rank_C=2,
+                        rank_X=3,
+                        relative_group_sizes=[1, 1, 1],
+                        sigma_star=np.matrix([[1, 0.3, 0.1], [0.3, 1, 0.3], [0.1, 0.3, 1]]),
+                        delta_es=np.matrix([[0.75, 0.3, 0.15], [0.3, 0.12, 0.06], [0.15, 0.06, 0.03]])),
+                   dict(rank_C=1,
+                        rank_X=2,
+                        relative_group_sizes=[1, 1],
+                        sigma_star=np.matrix([[1, 0.3], [0.3, 1]]),
+                        delta_es=np.matrix([[0.5, 0.1], [0.1, 0.3]])),
+                   dict(rank_C=3,
+                        rank_X=4,
+                        relative_group_sizes=[1, 2, 1, 1],
+                        sigma_star=np.matrix([[1, 0.3], [0.3, 1]]),
+                        delta_es=np.matrix([[0.5, 0.1], [0.1, 0.3]])),
+                   dict(rank_C=2,
+                        rank_X=3,
+                        relative_group_sizes=[1, 1, 1],
+                        sigma_star=np.matrix([[2.0]]),
+                        delta_es=np.matrix([[0.7]]))]
+        spectrum = np.zeros((len(designs), 3))
+        for i, design in enumerate(designs):
+            spectrum[i, :design['sigma_star'].shape[0]] = multirep.calc_spectrum(design['sigma_star'], design['delta_es'])
+        rank_C = [d['rank_C'] for d in designs]
+        rank_U = [d['sigma_star'].shape[0] for d in designs]
+        rank_X = [d['rank_X'] for d in designs]
+        for test in multirep._MULTIREP_ARRAYS:
+            for rep_N in [3, 10, 40]:
+                total_N = [rep_N * sum(d['relative_group_sizes']) for d in designs]
+                power, omega, fmethod = multirep.multirep_power_array(test, rank_C, rank_U, rank_X, total_N, rep_N, 0.05, spectrum)
+                for i, design in enumerate(designs):
+                    expected = test(rep_N=rep_N, alpha=0.05, **design)
+                    self.assertAlmostEqual(expected.power, power[i], places=10)
+                    self.assertEqual(expected.fmethod, fmethod[i])
+
+    def test_multirep_power_array_derivative(self):
+        """dPower/dN should agree with a central difference of power"""
+        sigma_star = np.matrix([[1, 0.3, 0.1], [0.3, 1, 0.3], [0.1, 0.3, 1]])
+        delta_es = np.matrix([[0.75, 0.3, 0.15], [0.3, 0.12, 0.06], [0.15, 0.06, 0.03]])
+        spectrum = multirep.calc_spectrum(sigma_star, delta_es)
+        step = 1e-3
+        for test in multirep._MULTIREP_ARRAYS:
+            for rank_C in [1, 2]:
+                for rep_N in [5, 20, 60]:
+                    _, _, _, derivative = multirep.multirep_power_array(test, rank_C, 3, 3, 3 * rep_N, rep_N, 0.05,
+                                                                        spectrum, derivative=True)
+                    up = multirep.multirep_power_array(test, rank_C, 3, 3, 3 * (rep_N + step), rep_N + step, 0.05, spectrum)[0]
+                    down = multirep.multirep_power_array(test, rank_C, 3, 3, 3 * (rep_N - step), rep_N - step, 0.05, spectrum)[0]
+                    # ncfdtr itself is only accurate to about 1e-6, so the difference quotient is too
+                    self.assertAlmostEqual((up[0] - down[0]) / (6 * step), derivative[0], delta=1e-3 * abs(derivative[0]))
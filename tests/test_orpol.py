@@ -0,0 +1,78 @@
+from functools import reduce
+from unittest import TestCase
+
+import numpy as np
+
+from pyglimmpse.model.kronecker_operator import KroneckerOperator
+from pyglimmpse.orpol import upoly, orpol
+
+
+class TestUpoly(TestCase):
+
+    def setUp(self):
+        self.factor_list = [np.array([1, 2, 3]), np.array([1, 2, 4, 8]), np.array([0, 1])]
+
+    def dense_trends(self):
+        centered = [orpol((x - np.mean(x)) / np.sqrt(np.dot(x - np.mean(x), x - np.mean(x))))
+                    for x in self.factor_list]
+        return [c[:, :1] for c in centered], [c[:, 1:] for c in centered]
+
+    def test_upoly_matches_dense_kronecker(self):
+        """The lazy U matrices should materialize to the dense Kronecker products"""
+        zero, higher = self.dense_trends()
+        u = upoly(self.factor_list, lazy=True)
+
+        expected_f1 = reduce(np.kron, [zero[0], higher[1], zero[2]])
+        expected_f02 = reduce(np.kron, [higher[0], zero[1], higher[2]])
+        expected_f012 = reduce(np.kron, higher)
+
+        self.assertTrue(np.allclose(u['u_maineffect']['f1'].materialize(), expected_f1))
+        self.assertTrue(np.allclose(u['u_twoways']['f(0, 2)'].materialize(), expected_f02))
+        self.assertTrue(np.allclose(u['u_threeways']['f(0, 1, 2)'].materialize(), expected_f012))
+        self.assertEqual(u['u_twoways']['f(0, 2)'].shape, expected_f02.shape)
+
+    def test_upoly_dense_by_default(self):
+        """Without lazy the U matrices should be the dense products"""
+        dense = upoly(self.factor_list)
+        lazy = upoly(self.factor_list, lazy=True)
+        for order in dense:
+            for name, u_matrix in dense[order].items():
+                self.assertIsInstance(u_matrix, np.matrix)
+                self.assertTrue(np.array_equal(lazy[order][name].materialize(), u_matrix))
+
+    def test_upoly_any_order(self):
+        """Interactions of order higher than three should be generated"""
+        u = upoly(self.factor_list + [np.array([1, 2])])
+        self.assertEqual(list(u['u_4ways'].keys()), ['f(0, 1, 2, 3)'])
+        self.assertEqual(u['u_4ways']['f(0, 1, 2, 3)'].shape, (48, 6))
+
+    def test_upoly_max_order(self):
+        u = upoly(self.factor_list, max_order=2)
+        self.assertEqual(sorted(u.keys()), ['u_maineffect', 'u_twoways'])
+
+    def test_sandwich_dense_sigma(self):
+        """U' * SIGMA * U should not depend on whether U is materialized"""
+        u = upoly(self.factor_list, lazy=True)['u_twoways']['f(0, 1)']
+        a = np.random.RandomState(0).normal(size=(24, 24))
+        sigma = a @ a.T + 24 * np.identity(24)
+        dense_u = u.materialize()
+        self.assertTrue(np.allclose(u.sandwich(sigma), dense_u.T @ sigma @ dense_u))
+
+    def test_sandwich_separable_sigma(self):
+        """A Kronecker separable SIGMA should give a Kronecker separable SIGMA star"""
+        u = upoly(self.factor_list, lazy=True)['u_maineffect']['f1']
+        sigma = KroneckerOperator([np.identity(3),
+                                   np.array([[1, 0.5, 0.25, 0.125],
+                                             [0.5, 1, 0.5, 0.25],
+                                             [0.25, 0.5, 1, 0.5],
+                                             [0.125, 0.25, 0.5, 1]]),
+                                   np.array([[2, 1], [1, 2]])])
+        sigma_star = u.sandwich(sigma)
+        self.assertIsInstance(sigma_star, KroneckerOperator)
+        dense_u = u.materialize()
+        self.assertTrue(np.allclose(sigma_star.materialize(), dense_u.T @ sigma.materialize() @ dense_u))
+
+    def test_dot(self):
+        u = upoly(self.factor_list, lazy=True)['u_threeways']['f(0, 1, 2)']
+        x = np.random.RandomState(1).normal(size=(6, 2))
+        self.assertTrue(np.allclose(u.dot(x), u.materialize() @ x))
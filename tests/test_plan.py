@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+import numpy as np
+
+from pyglimmpse.constants import Constants
+from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException
+from pyglimmpse.input import CalcMethod, Option, Scalar
+from pyglimmpse.multirep import hlt_two_moment_null_approximator_obrien_shieh
+from pyglimmpse.plan import CompiledPlan
+from pyglimmpse.unirep import geisser_greenhouse, box
+
+
+class TestCompiledPlan(TestCase):
+
+    def setUp(self):
+        self.sigma_star = np.matrix([[1, 0.3, 0.1], [0.3, 1, 0.3], [0.1, 0.3, 1]])
+        self.delta_es = np.matrix([[0.5, 0.1, 0], [0.1, 0.4, 0.1], [0, 0.1, 0.3]])
+        self.design = dict(rank_C=1,
+                           rank_X=2,
+                           relative_group_sizes=[1, 1],
+                           alpha=0.05,
+                           sigma_star=self.sigma_star,
+                           delta_es=self.delta_es)
+
+    def test_multirep_plan(self):
+        """A plan should give the same power as calling the test directly"""
+        plan = CompiledPlan(hlt_two_moment_null_approximator_obrien_shieh, **self.design)
+        for rep_N in [5, 10, 20]:
+            expected = hlt_two_moment_null_approximator_obrien_shieh(rep_N=rep_N, **self.design)
+            self.assertAlmostEqual(expected.power, plan.power(rep_N).power, places=12)
+
+    def test_unirep_plan_calc_method(self):
+        """The epsilon estimator and approximation should be taken from CalcMethod"""
+        calc_method = CalcMethod(unirepgeissergreenhouse=Constants.UCDF_MULLER1989_APPROXIMATION,
+                                 epsilonappgeissergreenhouse=Constants.EPSILON_MULLER1989)
+        plan = CompiledPlan(geisser_greenhouse, calc_method=calc_method, **self.design)
+        expected = geisser_greenhouse(rep_N=10,
+                                      epsilon_estimator=Constants.EPSILON_MULLER1989,
+                                      approximation_method=Constants.UCDF_MULLER1989_APPROXIMATION,
+                                      **self.design)
+        self.assertAlmostEqual(expected.power, plan(10).power, places=12)
+
+    def test_unirep_plan_no_estimator_choice(self):
+        plan = CompiledPlan(box, **self.design)
+        self.assertAlmostEqual(box(rep_N=10, **self.design).power, plan.power(10).power, places=12)
+
+    def test_plan_validates_once(self):
+        """Invalid inputs should be rejected when the plan is built"""
+        with self.assertRaises(GlimmpseValidationException):
+            CompiledPlan(box, scalar=Scalar(rep_n=2.5), option=Option(), **self.design)
+        design = dict(self.design, delta_es=np.matrix([[1]]))
+        with self.assertRaises(GlimmpseValidationException):
+            CompiledPlan(box, **design)
@@ -2,7 +2,7 @@ from unittest import TestCase
 from unittest.mock import patch
 
 from pyglimmpse.constants import Constants
-from pyglimmpse.probf import probf, _normal_approximation, _get_zscore, _tiku_approximation, _nonadjusted
+from pyglimmpse.probf import probf, probf_array, _normal_approximation, _get_zscore, _tiku_approximation, _nonadjusted
 
 
 class TestProbf(TestCase):
@@ -180,3 +180,15 @@ class TestProbf(TestCase):
 
 
 
+
+    def test_probf_array(self):
+        """The vectorized probf should choose the same method and probability as probf for each element"""
+        fcrit = [1.96, 1, 1, 0.5, 66.3490, 1.2, 1.5]
+        df1 = [0.5, 1, 1, 10**7, 1, 10**9.5, 10**5]
+        df2 = [3, 10, 100, 10, 10**10, 20, 10**9.3]
+        noncen = [0, 5, 100, 10, 100, 10, 10**6.5]
+        prob, fmethod = probf_array(fcrit, df1, df2, noncen)
+        for i in range(len(fcrit)):
+            expected_prob, expected_fmethod = probf(fcrit[i], df1[i], df2[i], noncen[i])
+            self.assertEqual(expected_fmethod, fmethod[i])
+            self.assertAlmostEqual(expected_prob, prob[i], places=12)
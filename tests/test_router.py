@@ -0,0 +1,72 @@
+from unittest import TestCase
+
+import numpy as np
+
+from pyglimmpse import multirep, unirep
+from pyglimmpse.constants import Constants
+from pyglimmpse.plan import CompiledPlan
+from pyglimmpse.router import route
+
+
+class TestRouter(TestCase):
+
+    def setUp(self):
+        self.multivariate = dict(rank_C=1,
+                                 rank_X=2,
+                                 relative_group_sizes=[1, 1],
+                                 alpha=0.05,
+                                 sigma_star=np.matrix([[1, 0.3, 0.1], [0.3, 1, 0.3], [0.1, 0.3, 1]]),
+                                 delta_es=np.matrix([[0.25, 0.1, 0.05], [0.1, 0.04, 0.02], [0.05, 0.02, 0.01]]))
+        self.univariate = dict(rank_C=2,
+                               rank_X=3,
+                               relative_group_sizes=[1, 1, 1],
+                               alpha=0.05,
+                               sigma_star=np.matrix([[2.0]]),
+                               delta_es=np.matrix([[0.7]]))
+        self.multirep_tests = [multirep.hlt_one_moment_null_approximator,
+                               multirep.hlt_two_moment_null_approximator_obrien_shieh,
+                               multirep.pbt_two_moment_null_approx,
+                               multirep.wlk_two_moment_null_approx_obrien_shieh,
+                               multirep.special]
+        self.unirep_tests = [unirep.uncorrected, unirep.geisser_greenhouse, unirep.hyuhn_feldt, unirep.box]
+
+    def check_route(self, test, design, rep_N, expected_path):
+        path, power = route(test, rep_N=rep_N, **design)
+        expected = test(rep_N=rep_N, **design)
+        self.assertEqual(expected_path, path)
+        self.assertAlmostEqual(expected.power, power.power, places=10)
+        self.assertAlmostEqual(float(np.squeeze(expected.noncentrality_parameter)),
+                               float(np.squeeze(power.noncentrality_parameter)),
+                               places=10)
+        self.assertEqual(expected.fmethod, power.fmethod)
+
+    def test_rank_C_one(self):
+        """Every multirep test is exact F when rank_C == 1"""
+        for test in self.multirep_tests:
+            for rep_N in [4, 10, 30]:
+                self.check_route(test, self.multivariate, rep_N, Constants.ROUTE_EXACT_F)
+
+    def test_rank_U_one(self):
+        """Multirep and unirep tests are exact F when rank_U == 1"""
+        for test in self.multirep_tests + self.unirep_tests:
+            for rep_N in [4, 10, 30]:
+                self.check_route(test, self.univariate, rep_N, Constants.ROUTE_EXACT_F)
+
+    def test_general_path(self):
+        """Unirep tests with rank_U > 1 and designs with min(rank_C, rank_U) > 1 are not routed"""
+        self.check_route(unirep.geisser_greenhouse, self.multivariate, 10, Constants.ROUTE_GENERAL)
+        design = dict(self.multivariate, rank_C=2, rank_X=3, relative_group_sizes=[1, 1, 1])
+        self.check_route(multirep.hlt_two_moment_null_approximator, design, 10, Constants.ROUTE_GENERAL)
+
+    def test_too_few_error_degrees_of_freedom(self):
+        """Degenerate sample sizes are left to the test itself"""
+        path, power = route(multirep.special, rep_N=1, **self.univariate)
+        self.assertEqual(Constants.ROUTE_GENERAL, path)
+        self.assertTrue(np.isnan(power.power))
+        self.assertEqual(Constants.FMETHOD_MISSING, power.fmethod)
+
+    def test_plan_route(self):
+        plan = CompiledPlan(unirep.hyuhn_feldt, **self.univariate)
+        path, power = plan.route(10)
+        self.assertEqual(Constants.ROUTE_EXACT_F, path)
+        self.assertAlmostEqual(unirep.hyuhn_feldt(rep_N=10, **self.univariate).power, power.power, places=10)
@@ -1,9 +1,13 @@
+from types import SimpleNamespace
 from unittest import TestCase
+from unittest.mock import patch
 import numpy as np
 
 from pyglimmpse import samplesize
 from pyglimmpse.constants import Constants
-from pyglimmpse.unirep import uncorrected
+from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException
+from pyglimmpse.model.power_batch import PowerBatch
+from pyglimmpse.unirep import chi_muller, hyuhn_feldt, uncorrected
 from pyglimmpse.multirep import hlt_two_moment_null_approximator_obrien_shieh
 
 
@@ -106,3 +110,182 @@ class TestSamplesize(TestCase):
     #                                    optional_args=args)
     #     self.assertTrue(target_power <= result[1])
     #     self.assertEqual(expected, result[0])
+
+    def test_samplesize_lower_bound(self):
+        """The lower confidence limit on power should reach the target at the returned size but not one row before"""
+        confidence_interval = SimpleNamespace(beta_known=True, lower_tail=0.025, upper_tail=0.025, rank_est=1, n_est=30)
+        design = dict(rank_C=1,
+                      rank_X=1,
+                      relative_group_sizes=[1],
+                      alpha=0.01,
+                      sigma_star=np.matrix([[312.5]]),
+                      delta_es=np.matrix([[100]]))
+        test = hlt_two_moment_null_approximator_obrien_shieh
+        size, power = samplesize.samplesize(test=test,
+                                            targetPower=0.9,
+                                            target=Constants.TARGET_LOWER_BOUND,
+                                            starting_smallest_group_size=10,
+                                            confidence_interval=confidence_interval,
+                                            **design)
+        self.assertGreater(size, 50)
+        self.assertGreaterEqual(power.lower_bound.power, 0.9)
+        self.assertIsNotNone(power.upper_bound)
+        smaller = test(rep_N=size - 1, confidence_interval=confidence_interval, **design)
+        self.assertLess(smaller.lower_bound.power, 0.9)
+
+    def test_samplesize_lower_bound_needs_confidence_interval(self):
+        with self.assertRaises(GlimmpseValidationException):
+            samplesize.samplesize(test=hlt_two_moment_null_approximator_obrien_shieh,
+                                  rank_C=1,
+                                  rank_X=1,
+                                  relative_group_sizes=[1],
+                                  alpha=0.01,
+                                  sigma_star=np.matrix([[312.5]]),
+                                  delta_es=np.matrix([[100]]),
+                                  targetPower=0.9,
+                                  target=Constants.TARGET_LOWER_BOUND)
+
+    def test_samplesize_several_targets(self):
+        """Several targets should give the same answers as separate searches, sharing the power calculations"""
+        design = dict(test=hlt_two_moment_null_approximator_obrien_shieh,
+                      rank_C=2,
+                      rank_X=3,
+                      relative_group_sizes=[6, 1, 2],
+                      alpha=0.01,
+                      sigma_star=np.matrix([[112.5]]),
+                      delta_es=np.matrix([[31.16279070]]))
+        targets = [0.8, 0.85, 0.9, 0.95]
+        with patch.object(samplesize.CompiledPlan, 'power', autospec=True,
+                          side_effect=samplesize.CompiledPlan.power) as power:
+            sizes, powers = samplesize.samplesize(targetPower=targets, **design)
+            together = power.call_count
+            power.reset_mock()
+            samplesize.samplesize(targetPower=0.95, **design)
+            hardest = power.call_count
+        for target, size, result in zip(targets, sizes, powers):
+            expected_size, expected_power = samplesize.samplesize(targetPower=target, **design)
+            self.assertEqual(expected_size, size)
+            self.assertEqual(expected_power.power, result.power)
+            self.assertGreaterEqual(result.power, target)
+        self.assertIsInstance(powers, PowerBatch)
+        self.assertLess(together, 2 * hardest)
+
+    def test_samplesize_batch(self):
+        """The batch solver should give the same answers as samplesize for each design"""
+        sigma_star = np.matrix([[1, 0.3, 0.1], [0.3, 1, 0.3], [0.1, 0.3, 1]])
+        delta_es = np.matrix([[0.25, 0.1, 0.05], [0.1, 0.04, 0.02], [0.05, 0.02, 0.01]])
+        designs = [(hlt_two_moment_null_approximator_obrien_shieh, [sigma_star] * 4, [delta_es * e for e in [0.5, 1, 4, 8]]),
+                   (uncorrected, [np.matrix([[2.0]]), sigma_star], [np.matrix([[0.7]]), delta_es * 8]),
+                   # too few error degrees of freedom at the starting size
+                   (hyuhn_feldt, [sigma_star] * 2, [delta_es * 4, delta_es * 8]),
+                   (chi_muller, [sigma_star] * 2, [delta_es * 4, delta_es * 8])]
+        for test, sigma_stars, deltas in designs:
+            sizes, powers = samplesize.samplesize_batch(test=test,
+                                                        rank_C=2,
+                                                        rank_X=3,
+                                                        relative_group_sizes=[1, 1, 1],
+                                                        alpha=0.05,
+                                                        sigma_star=sigma_stars,
+                                                        delta_es=deltas,
+                                                        targetPower=0.9,
+                                                        starting_smallest_group_size=2)
+            for i, (sigma, delta) in enumerate(zip(sigma_stars, deltas)):
+                size, power = samplesize.samplesize(test=test,
+                                                    rank_C=2,
+                                                    rank_X=3,
+                                                    relative_group_sizes=[1, 1, 1],
+                                                    alpha=0.05,
+                                                    sigma_star=sigma,
+                                                    delta_es=delta,
+                                                    targetPower=0.9,
+                                                    starting_smallest_group_size=2)
+                self.assertEqual(size, sizes[i])
+                self.assertAlmostEqual(power.power, powers.power[i], places=10)
+                self.assertEqual(power.fmethod, powers[i].fmethod)
+
+    def test_samplesize_newton(self):
+        """The Newton search should find the same samplesize as bisection with fewer power calculations"""
+        sigma_star = np.matrix([[1, 0.3, 0.1], [0.3, 1, 0.3], [0.1, 0.3, 1]])
+        delta_es = np.matrix([[0.25, 0.1, 0.05], [0.1, 0.04, 0.02], [0.05, 0.02, 0.01]])
+        designs = [(hlt_two_moment_null_approximator_obrien_shieh, sigma_star, delta_es * 0.3),
+                   (hlt_two_moment_null_approximator_obrien_shieh, sigma_star, delta_es * 4),
+                   (uncorrected, np.matrix([[2.0]]), np.matrix([[0.7]])),
+                   (uncorrected, sigma_star, delta_es * 3)]
+        for test, sigma, delta in designs:
+            design = dict(test=test,
+                          rank_C=2,
+                          rank_X=3,
+                          relative_group_sizes=[1, 1, 1],
+                          alpha=0.05,
+                          sigma_star=sigma,
+                          delta_es=delta,
+                          targetPower=0.9,
+                          starting_smallest_group_size=2)
+            with patch.object(samplesize.CompiledPlan, 'route', autospec=True,
+                              side_effect=samplesize.CompiledPlan.route) as route:
+                size, power = samplesize.samplesize(**design)
+                bisection = route.call_count
+            with patch.object(samplesize.CompiledPlan, 'power_derivative', autospec=True,
+                              side_effect=samplesize.CompiledPlan.power_derivative) as power_derivative:
+                newton_size, newton_power = samplesize.samplesize(search=Constants.SEARCH_NEWTON, **design)
+            self.assertEqual(size, newton_size)
+            self.assertAlmostEqual(power.power, newton_power.power, places=12)
+            self.assertLess(power_derivative.call_count, bisection)
+
+    def test_samplesize_newton_unirep(self):
+        """The Newton search should step past sizes with too few error degrees of freedom"""
+        design = dict(rank_C=1,
+                      rank_X=2,
+                      relative_group_sizes=[1, 2],
+                      alpha=0.05,
+                      sigma_star=np.matrix([[2, 0.3], [0.3, 1.5]]),
+                      delta_es=np.matrix([[0.2, 0.1], [0.1, 0.3]]),
+                      targetPower=0.8)
+        for test in [hyuhn_feldt, chi_muller]:
+            size, power = samplesize.samplesize(test, **design)
+            newton_size, newton_power = samplesize.samplesize(test, search=Constants.SEARCH_NEWTON, **design)
+            self.assertEqual(size, newton_size)
+            self.assertAlmostEqual(power.power, newton_power.power, places=12)
+
+    def test_samplesize_parallel(self):
+        """The parallel search should find the same samplesize as bisection for any number of workers"""
+        design = dict(test=uncorrected,
+                      rank_C=2,
+                      rank_X=3,
+                      relative_group_sizes=[1, 1, 1],
+                      alpha=0.05,
+                      sigma_star=np.matrix([[1, 0.3, 0.1], [0.3, 1, 0.3], [0.1, 0.3, 1]]),
+                      delta_es=np.matrix([[0.75, 0.3, 0.15], [0.3, 0.12, 0.06], [0.15, 0.06, 0.03]]))
+        expected = samplesize.samplesize(targetPower=[0.8, 0.9], **design)
+        for workers in [1, 3]:
+            actual = samplesize.samplesize(targetPower=[0.8, 0.9], search=Constants.SEARCH_PARALLEL, workers=workers, **design)
+            np.testing.assert_array_equal(expected[0], actual[0])
+            np.testing.assert_allclose(expected[1].power, actual[1].power, rtol=0, atol=1e-12)
+
+    def test_detectable_effect(self):
+        """Power at the detectable effect should be the target, and a list of rep_N should match each rep_N alone"""
+        sigma_star = np.matrix([[1, 0.3, 0.1], [0.3, 1, 0.3], [0.1, 0.3, 1]])
+        delta_es = np.matrix([[0.25, 0.1, 0.05], [0.1, 0.04, 0.02], [0.05, 0.02, 0.01]])
+        designs = [(hlt_two_moment_null_approximator_obrien_shieh, sigma_star, delta_es),
+                   (uncorrected, sigma_star, delta_es),
+                   (uncorrected, np.matrix([[2.0]]), np.matrix([[0.7]]))]
+        for test, sigma, delta in designs:
+            design = dict(test=test,
+                          rank_C=2,
+                          rank_X=3,
+                          relative_group_sizes=[1, 1, 1],
+                          alpha=0.05,
+                          sigma_star=sigma,
+                          delta_es=delta,
+                          targetPower=0.9)
+            beta_scalars, powers = samplesize.detectable_effect(rep_N=[5, 10, 40], **design)
+            self.assertIsInstance(powers, PowerBatch)
+            for rep_N, beta_scalar, power in zip([5, 10, 40], beta_scalars, powers):
+                self.assertAlmostEqual(0.9, power.power, places=8)
+                self.assertGreaterEqual(power.power, 0.9)
+                single_beta_scalar, _ = samplesize.detectable_effect(rep_N=rep_N, **design)
+                self.assertEqual(single_beta_scalar, beta_scalar)
+                smaller = test(rep_N=rep_N, rank_C=2, rank_X=3, relative_group_sizes=[1, 1, 1], alpha=0.05,
+                               sigma_star=sigma, delta_es=delta * (beta_scalar * 0.999) ** 2)
+                self.assertLess(smaller.power, 0.9)
+            self.assertTrue(beta_scalars[0] > beta_scalars[1] > beta_scalars[2])
@@ -0,0 +1,88 @@
+import asyncio
+import json
+from unittest import IsolatedAsyncioTestCase
+
+from pyglimmpse import cli
+from pyglimmpse.server import PowerServer
+
+
+async def request(port, method, path, body=None, reader_writer=None):
+    """ status and body of one HTTP request to the server on localhost"""
+    reader, writer = reader_writer or await asyncio.open_connection('127.0.0.1', port)
+    data = b'' if body is None else json.dumps(body).encode()
+    connection = 'keep-alive' if reader_writer else 'close'
+    writer.write('{0} {1} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {2}\r\nConnection: {3}\r\n\r\n'.format(
+        method, path, len(data), connection).encode() + data)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line == b'\r\n':
+            break
+        name, _, value = line.decode().partition(':')
+        headers[name.lower()] = value.strip()
+    payload = (await reader.readexactly(int(headers['content-length']))).decode()
+    if reader_writer is None:
+        writer.close()
+    return status, json.loads(payload) if headers['content-type'] == 'application/json' else payload
+
+
+class TestServer(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.design = dict(test='hlt_two_moment_null_approximator',
+                           rank_C=1,
+                           rank_X=2,
+                           relative_group_sizes=[1, 1],
+                           alpha=0.05,
+                           sigma_star=[[1, 0.3, 0.1], [0.3, 1, 0.3], [0.1, 0.3, 1]],
+                           delta_es=[[0.5, 0.1, 0], [0.1, 0.4, 0.1], [0, 0.1, 0.3]])
+
+    async def test_coalesce(self):
+        """ concurrent requests should be calculated in one batch, with the results of calculating them alone"""
+        jobs = [dict(self.design, id=n, rep_N=n) for n in range(3, 23)]
+        jobs += [dict(self.design, id='ss', targetPower=0.9, starting_smallest_group_size=2)]
+        async with PowerServer(port=0, batch_window=0.05) as server:
+            responses = await asyncio.gather(*[request(server.port, 'POST', '/samplesize' if 'targetPower' in job
+                                                       else '/power', job) for job in jobs])
+            status, metrics = await request(server.port, 'GET', '/metrics')
+        for job, (status, result) in zip(jobs, responses):
+            self.assertEqual(200, status)
+            expected = cli.run_job(dict(job, type='samplesize' if 'targetPower' in job else 'power'))
+            self.assertEqual(expected['id'], result['id'])
+            self.assertEqual(expected.get('total_N'), result.get('total_N'))
+            self.assertAlmostEqual(expected['power'], result['power'], places=10)
+        self.assertIn('pyglimmpse_batches_total 2\n', metrics)
+        self.assertIn('pyglimmpse_batched_jobs_total 21\n', metrics)
+        self.assertIn('pyglimmpse_requests_total{kind="power"} 20\n', metrics)
+
+    async def test_single_and_errors(self):
+        confidence_interval = dict(beta_known=True, lower_tail=0.025, upper_tail=0.025, rank_est=2, n_est=30)
+        async with PowerServer(port=0, batch_window=0.01) as server:
+            connection = await asyncio.open_connection('127.0.0.1', server.port)
+            # the requests share one keep alive connection
+            status, limits = await request(server.port, 'POST', '/power',
+                                           dict(self.design, type='cl', rep_N=10,
+                                                confidence_interval=confidence_interval), connection)
+            self.assertEqual(200, status)
+            self.assertLess(limits['lower_power'], limits['power'])
+            bad = await asyncio.gather(request(server.port, 'POST', '/power', dict(self.design, rep_N=10, rank_C='one')),
+                                       request(server.port, 'POST', '/power', dict(self.design, rep_N=10)))
+            self.assertEqual([400, 200], [status for status, _ in bad])
+            self.assertIn('TypeError', bad[0][1]['error'])
+            self.assertEqual(404, (await request(server.port, 'GET', '/nothing', None, connection))[0])
+            self.assertEqual(405, (await request(server.port, 'GET', '/power', None, connection))[0])
+            connection[1].close()
+
+    async def test_limits(self):
+        """ requests over the concurrency limit should be refused, and late ones time out"""
+        async with PowerServer(port=0, batch_window=0.2, max_concurrency=1) as server:
+            waiting = asyncio.ensure_future(request(server.port, 'POST', '/power', dict(self.design, rep_N=10)))
+            await asyncio.sleep(0.05)
+            self.assertEqual(503, (await request(server.port, 'POST', '/power', dict(self.design, rep_N=10)))[0])
+            self.assertEqual(200, (await waiting)[0])
+            timeout = await request(server.port, 'POST', '/power', dict(self.design, rep_N=10, deadline_ms=10))
+            self.assertEqual(504, timeout[0])
+            self.assertIn('pyglimmpse_deadline_exceeded_total 1\n', server.metrics())
+            self.assertIn('pyglimmpse_rejected_total 1\n', server.metrics())
@@ -0,0 +1,86 @@
+import csv
+import importlib.util
+import io
+import json
+import os
+import tempfile
+from unittest import TestCase, skipIf
+
+import numpy as np
+
+from pyglimmpse import multirep, unirep
+from pyglimmpse.constants import Constants
+from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException
+from pyglimmpse.plan import BatchPlan
+from pyglimmpse.sinks import CSVSink, JSONLSink, RESULT_COLUMNS, open_sink, write_sweep
+
+
+class TestSinks(TestCase):
+
+    def setUp(self):
+        self.design = dict(rank_C=1,
+                           rank_X=2,
+                           relative_group_sizes=[1, 1],
+                           alpha=0.05,
+                           sigma_star=np.array([[1, 0.3, 0.1], [0.3, 1, 0.3], [0.1, 0.3, 1]]),
+                           delta_es=np.array([[0.5, 0.1, 0], [0.1, 0.4, 0.1], [0, 0.1, 0.3]]))
+
+    def test_chunks(self):
+        """ rows should be written chunk_size at a time"""
+        f = io.StringIO()
+        sink = JSONLSink(f, chunk_size=2)
+        sink.write(multirep.wlk_two_moment_null_approx(rep_N=2, **dict(self.design, rank_C=2)), rep_N=2)
+        for rep_N in [2, 10]:
+            sink.write(unirep.geisser_greenhouse(rep_N=rep_N, **self.design), rep_N=rep_N)
+        self.assertEqual(2, len(f.getvalue().splitlines()))
+        sink.close()
+        rows = [json.loads(line) for line in f.getvalue().splitlines()]
+        self.assertEqual((3, 2), (sink.rows, sink.chunks))
+        self.assertEqual(['rep_N'] + RESULT_COLUMNS, list(rows[0]))
+        self.assertIsNone(rows[0]['power'])
+        self.assertEqual(Constants.WARN_NONCENTRALITY_UNDEFINED.value, rows[0]['error_message'])
+        self.assertEqual('WARN_HDLSS', rows[1]['diagnostics'])
+        self.assertEqual(unirep.geisser_greenhouse(rep_N=10, **self.design).power, rows[2]['power'])
+        self.assertEqual(Constants.SIGMA_KNOWN.value, rows[2]['fmethod'])
+        self.assertEqual('', rows[2]['diagnostics'])
+        with self.assertRaises(GlimmpseValidationException):
+            sink.write(unirep.geisser_greenhouse(rep_N=10, **self.design), alpha=0.05)
+
+    def test_write_sweep(self):
+        plan = BatchPlan(multirep.hlt_two_moment_null_approximator,
+                         **dict(self.design, delta_es=[self.design['delta_es'] * e for e in [0.5, 1, 2]]))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sweep.csv')
+            with open_sink(path, chunk_size=4) as sink:
+                self.assertIsInstance(sink, CSVSink)
+                self.assertEqual(6, write_sweep(plan, [5, 10], sink))
+            self.assertEqual(2, sink.chunks)
+            with open(path, newline='') as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual(6, len(rows))
+        for row in rows:
+            expected = plan.power(float(row['rep_N']), [int(row['design'])])
+            self.assertEqual(expected.power[0], float(row['power']))
+            self.assertEqual(2 * float(row['rep_N']), float(row['total_N']))
+            self.assertEqual('', row['lower_power'])
+
+    def test_open_sink(self):
+        with self.assertRaises(GlimmpseValidationException):
+            open_sink('results.txt')
+
+    @skipIf(importlib.util.find_spec('pyarrow') is None, 'pyarrow is not installed')
+    def test_arrow(self):
+        import pyarrow
+        import pyarrow.parquet
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ['sweep.arrow', 'sweep.parquet']:
+                path = os.path.join(directory, name)
+                with open_sink(path, chunk_size=2) as sink:
+                    for rep_N in [2, 5, 10]:
+                        sink.write(unirep.geisser_greenhouse(rep_N=rep_N, **self.design), rep_N=rep_N)
+                if name.endswith('.arrow'):
+                    table = pyarrow.ipc.open_file(path).read_all()
+                else:
+                    table = pyarrow.parquet.read_table(path)
+                self.assertEqual(3, table.num_rows)
+                self.assertEqual([2, 5, 10], table.column('rep_N').to_pylist())
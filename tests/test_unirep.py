@@ -5,6 +5,8 @@ from pyglimmpse import unirep
 from pyglimmpse.model import epsilon
 
 from pyglimmpse.constants import Constants
+from pyglimmpse.exceptions.glimmpse_exception import GlimmpseValidationException
+from pyglimmpse.input import IP
 from pyglimmpse.model.epsilon import Epsilon
 from pyglimmpse.unirep import _geisser_greenhouse_muller_edwards_simpson_taylor_2007, _calc_epsilon, OptionalArgs
 
@@ -228,3 +230,37 @@ class TestUnirep(TestCase):
                                                       tolerance=tolerance)
         actual = result.power
         self.assertAlmostEqual(actual, expected, places=5)
+
+    def test_internal_pilot_power(self):
+        """ Internal pilot power should be reachable through input.IP and converge to known SIGMA power"""
+        design = dict(rank_C=1,
+                      rank_X=2,
+                      relative_group_sizes=[1, 1],
+                      rep_N=20,
+                      alpha=0.05,
+                      sigma_star=np.matrix([[1, 0.5, 0.25], [0.5, 1, 0.5], [0.25, 0.5, 1]]),
+                      delta_es=np.matrix([[0.2, 0.1, 0], [0.1, 0.2, 0.1], [0, 0.1, 0.2]]))
+        small = unirep.geisser_greenhouse(internal_pilot=IP(ip_plan=True, n_ip=10, rank_ip=2), **design)
+        large = unirep.geisser_greenhouse(internal_pilot=IP(ip_plan=True, n_ip=10 ** 7, rank_ip=2), **design)
+        known = unirep.geisser_greenhouse(**design)
+        self.assertEqual(Constants.INTERNAL_PILOT, small.fmethod)
+        self.assertNotAlmostEqual(small.power, known.power, places=4)
+        self.assertAlmostEqual(large.power, known.power, places=6)
+
+    def test_internal_pilot_power_sweep(self):
+        """ The sweep should match separate internal pilot calculations"""
+        design = dict(rank_C=1,
+                      rank_X=2,
+                      relative_group_sizes=[1, 1],
+                      rep_N=20,
+                      alpha=0.05,
+                      sigma_star=np.matrix([[1, 0.5, 0.25], [0.5, 1, 0.5], [0.25, 0.5, 1]]),
+                      delta_es=np.matrix([[0.2, 0.1, 0], [0.1, 0.2, 0.1], [0, 0.1, 0.2]]))
+        n_ip = [6, 10, 20, 40]
+        powers = unirep.internal_pilot_power_sweep(unirep.hyuhn_feldt, n_ip=n_ip, rank_ip=2, **design)
+        self.assertEqual(len(n_ip), len(powers))
+        for n, power in zip(n_ip, powers):
+            expected = unirep.hyuhn_feldt(internal_pilot=IP(ip_plan=True, n_ip=n, rank_ip=2), **design)
+            self.assertAlmostEqual(expected.power, power.power, places=12)
+        with self.assertRaises(GlimmpseValidationException):
+            unirep.internal_pilot_power_sweep(unirep.hyuhn_feldt, n_ip=[2, 10], rank_ip=2, **design)